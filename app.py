@@ -1,90 +1,487 @@
+import argparse
+import contextlib
+import json
+import sys
 import time
-import pyperclip
-import yt_dlp
 import os
+
 import threading
-import queue
+
+from jobs import Job, JobQueue, JobPaused, check_quality, check_stop, file_label, normalized_quality, reserve_ids, PRIORITY_BULK
+from job_store import JobStore
+from info_cache import InfoCache
+import info_cache
+from history import DownloadHistory, output_path
+from urls import canonical_id, canonical_url, find_urls, is_collection_url, url_platform
+from playlists import EXPAND_OPTS, iter_entry_urls
+from clipboard_watch import create_watcher
+from worker_pool import WorkerPool
+from ydl_pool import YDLPool
+from transcode import TranscodePool, TranscodeError, can_stream
+from batch import BatchRun, iter_lines, parse_line
+from bandwidth import BandwidthScheduler
+from retry import RetryPolicy, RetryScheduler
 
 # --- Configuration ---
 DOWNLOAD_FOLDER = "Downloads"
-CHECK_INTERVAL = 0.5   # Checks clipboard every 0.5 seconds
+CHECK_INTERVAL = 0.5   # Polling fallback: checks clipboard every 0.5 seconds
+JOB_DB = os.path.join(".playget", "queue.db")  # Pending jobs survive restarts here
+INFO_DB = os.path.join(".playget", "info_cache.db")
+HISTORY_DB = os.path.join(".playget", "history.db")
+INFO_CACHE_TTL = 30 * 60   # Seconds; YouTube media URLs expire after a few hours
+INFO_CACHE_SIZE = 500
+MAX_WORKERS = 3        # Concurrent downloads
+PER_HOST_LIMIT = 2     # Concurrent downloads per platform, to avoid throttling
+SEGMENTS = 1           # Parallel connections per file (byte ranges / fragments)
+TRANSCODE_WORKERS = os.cpu_count() or 2  # Parallel encodes; downloads continue meanwhile
+AUDIO_PRESET = "mp3"   # Encoder preset, see transcode.PRESETS (mp3-fast, opus, aac, ...)
+SMART_AUDIO = False    # Opt-in: keep the original Opus/AAC stream (not an mp3) when it's already at or below the bitrate
+STREAM_AUDIO = False   # Pipe downloads straight into ffmpeg: no source file on disk, encode overlaps download
+BANDWIDTH_LIMIT = None   # Bytes/s shared by all downloads (e.g. 2 << 20 for 2 MB/s); None = unlimited
+BANDWIDTH_SCHEDULE = []  # Time-of-day overrides, e.g. [("22:00", "07:00", None)] for full speed at night
+JOB_RATE_LIMIT = None    # Bytes/s cap for each download on its own; None = unlimited
+SHUTDOWN_TIMEOUT = 5     # Seconds running downloads get to save their state on Ctrl+C
+RETRY_ATTEMPTS = 5       # Runs a job gets before a transient or throttled error fails it for good
+BATCH_BACKLOG = 1000   # Batch mode: jobs read ahead of the workers, so huge inputs stay out of memory
+ENGINE = "threads"     # "threads" (one thread per worker) or "asyncio" (event loop; extraction runs ahead of downloads)
+EXTRACT_WORKERS = 16   # asyncio engine: metadata extractions in flight while downloads run
+EXTRACTORS = ["youtube(:.*)?"]  # yt-dlp extractors each instance sets up; batch mode uses all (any site can be listed)
+
+# Create a queue to hold the URLs; repeats of a pending link are coalesced
+url_queue = JobQueue()
+
+def new_ydl(params):
+    """YDLPool factory. yt-dlp is imported on first use, so the script starts without waiting for it."""
+    from streams import ParallelStreamsYoutubeDL
+    return ParallelStreamsYoutubeDL(params)
+
+# Long-lived YoutubeDL instances, one set per option profile
+ydl_pool = YDLPool(factory=new_ydl)
+
+# Durable copy of the queue, extracted metadata (so re-copied links skip
+# extraction) and finished downloads (so the same link isn't fetched twice).
+# Opened by open_stores(), so importing this module leaves the disk alone.
+job_store = None
+extract_cache = None
+history = None
+
+# Second pipeline stage: audio encodes run here, off the download workers
+transcoder = TranscodePool(workers=TRANSCODE_WORKERS, smart=SMART_AUDIO)
 
-# Create a queue to hold the URLs
-url_queue = queue.Queue()
+# Shared bandwidth budget, paid from each download's progress hook
+bandwidth = BandwidthScheduler(BANDWIDTH_LIMIT, BANDWIDTH_SCHEDULE)
 
-def download_worker():
+# Failed jobs wait here for their backoff, then go back on the queue (see requeue)
+retry_policy = RetryPolicy(RETRY_ATTEMPTS)
+retries = RetryScheduler(lambda job: requeue(job))
+
+# Outcome tally while running with --batch
+current_batch = None
+
+# Jobs in a download right now, so shutdown() can stop them cleanly
+running_jobs = set()
+stopping = threading.Event()
+
+def open_stores():
+    """Opens the job store, info cache and download history under .playget/."""
+    global job_store, extract_cache, history
+    job_store = JobStore(JOB_DB)
+    reserve_ids(job_store.last_id())
+    extract_cache = InfoCache(INFO_DB, ttl=INFO_CACHE_TTL, max_entries=INFO_CACHE_SIZE)
+    history = DownloadHistory(HISTORY_DB)
+
+def already_downloaded(job):
+    """Path of an earlier download of this job's video, placed in DOWNLOAD_FOLDER."""
+    video_id = canonical_id(job.url)
+    entry = history.lookup(video_id, *job.variant) if video_id else None
+    if entry is None:
+        return None
+    try:
+        return history.materialize(entry, DOWNLOAD_FOLDER)
+    except OSError as e:
+        print(f"[!] Could not reuse {entry.path}: {e}")
+        return None
+
+def download_worker(job):
     """
-    Background task: waits for URLs in the queue and downloads them one by one.
+    Pool task: downloads one job (and its coalesced variants). Up to MAX_WORKERS of these run at once.
     """
-    while True:
-        # 1. Get the next URL from the queue (blocks if empty)
-        url = url_queue.get()
-        
-        print(f"\n[>>>] Processing: {url}")
-        print(f"      (Items pending in queue: {url_queue.qsize()})")
-
-        # 2. Ensure download folder exists
-        if not os.path.exists(DOWNLOAD_FOLDER):
-            os.makedirs(DOWNLOAD_FOLDER)
-
-        # 3. Original yt-dlp configuration
+    for j in [job] + job.variants:
+        if stopping.is_set():
+            return  # Still queued in the job store; the next run picks it up
+        download_one(j)
+
+def expand_collection(job):
+    """Queues each video of a playlist as its own job while the listing is still paging in."""
+    found = 0
+    opts = dict(EXPAND_OPTS, allowed_extractors=EXTRACTORS) if EXTRACTORS else EXPAND_OPTS
+    with ydl_pool.lease(("expand",), opts) as ydl:
+        for entry_url in iter_entry_urls(ydl, job.url):
+            enqueue(Job(entry_url, job.dtype, job.quality, priority=job.priority, rate_limit=job.rate_limit))
+            found += 1
+    print(f"[✓] Expanded #{job.id} into {found} jobs: {job.url}")
+
+def download_one(job):
+    url, dtype, quality = job
+    quality = normalized_quality(dtype, quality)  # Audio "best" is encoded at 320 kbps
+    print(f"\n[>>>] Processing #{job.id}: {url}")
+    print(f"      (Items pending in queue: {pool.pending()}, waiting to convert: {transcoder.depth()})")
+
+    # 1. Ensure download folder exists
+    os.makedirs(DOWNLOAD_FOLDER, exist_ok=True)
+
+    # 2. yt-dlp configuration for the job's type
+    profile, ydl_opts = build_ydl_opts(dtype, quality)
+
+    # 3. Hold the job while its site is rate limiting us, without spending an attempt
+    wait = retry_policy.host_wait(job.host)
+    if wait > 0:
+        print(f"[…] {job.host} is rate limiting, #{job.id} starts in {wait:.0f}s")
+        retries.schedule(job, wait)
+        return
+
+    # 4. Attempt download (the pool marks the task done afterwards)
+    def remember_part(d):
+        check_stop(job)
+        bandwidth.account(job, d)
+        if d['status'] == 'downloading':
+            job_store.set_part_path(job, d.get('tmpfilename'))
+
+    running_jobs.add(job)
+    try:
+        job_store.mark(job, "running")
+        if is_collection_url(url):
+            expand_collection(job)
+            job_store.mark(job, "done")
+            job_finished(job, "expanded")
+            return
+        existing = already_downloaded(job)
+        if existing:
+            job_store.mark(job, "done")
+            print(f"[=] Already downloaded: {existing}")
+            job_finished(job, "skipped")
+            return
+        with ydl_pool.lease(profile, ydl_opts, hook=remember_part) as ydl:
+            streamed = stream_audio(ydl, job) if dtype == "audio" and STREAM_AUDIO else None
+            if streamed is None:
+                info = info_cache.download(ydl, url, extract_cache)
+        retry_policy.succeeded(job.host)
+        if streamed is not None:
+            finish_transcode(job, streamed, None)
+            return
+        if dtype == "video":
+            record_download(job, output_path(info))
+            job_store.mark(job, "done")
+            print(f"[✓] Completed #{job.id}: {url}")
+            job_finished(job, "done")
+            return
+        # Blocks only if the transcode backlog is full
+        transcoder.submit(output_path(info), AUDIO_PRESET, quality,
+                          lambda result, error: finish_transcode(job, result, error))
+        print(f"[~] Downloaded #{job.id}, converting: {url}")
+    except JobPaused:
+        # Interrupted by shutdown(): the .part file stays and the job is replayed next run
+        job_store.mark(job, "queued")
+        print(f"[||] Stopped #{job.id}, resumes next run: {url}")
+    except Exception as e:
+        fail_job(job, e, "processing")
+    finally:
+        running_jobs.discard(job)
+        print("---------------------------------------------------")
+
+def build_ydl_opts(dtype, quality):
+    """(profile, ydl_opts) for a job; jobs with the same profile share a YoutubeDL."""
+    if dtype == "video":
+        if quality not in ("best", None):
+            fmt = f'bestvideo[height<={quality}]+bestaudio/best[height<={quality}]/best'
+        else:
+            fmt = 'bestvideo+bestaudio/best'
+        profile = ("video", quality)
         ydl_opts = {
-            'format': 'bestaudio/best',
-            'outtmpl': f'{DOWNLOAD_FOLDER}/%(title)s.%(ext)s',
-            'postprocessors': [{
-                'key': 'FFmpegExtractAudio',
-                'preferredcodec': 'mp3',
-                'preferredquality': '192',
-            }],
-            'quiet': False,
-            'no_warnings': True,
+            'format': fmt,
+            'merge_output_format': 'mp4',
+            'playget_parallel_streams': True,
         }
+    else:
+        # The mp3 postprocessor is gone: encoding happens in the transcode stage (see finish_transcode)
+        profile = ("audio", quality)
+        ydl_opts = {'format': 'bestaudio/best'}
+    ydl_opts.update({
+        # The encode keeps the raw file's name, so the label carries through to the mp3
+        'outtmpl': f'{DOWNLOAD_FOLDER}/%(title)s{file_label(dtype, quality)}.%(ext)s',
+        'quiet': False,
+        'no_warnings': True,
+        # Batch mode keeps stdout for the summary
+        'logtostderr': current_batch is not None,
+        'playget_segments': SEGMENTS,
+        'concurrent_fragment_downloads': SEGMENTS,
+    })
+    if EXTRACTORS:
+        ydl_opts['allowed_extractors'] = EXTRACTORS
+    return profile, ydl_opts
 
-        # 4. Attempt download
-        try:
-            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                ydl.download([url])
-                print(f"[✓] Completed: {url}")
-        except Exception as e:
-            print(f"[!] Error processing {url}: {e}")
-        finally:
-            # Mark task as done so the queue updates
-            url_queue.task_done()
-            print("---------------------------------------------------")
+def record_download(job, path):
+    if canonical_id(job.url) and path and os.path.exists(path):
+        history.record(canonical_id(job.url), *job.variant, path)
+
+def job_finished(job, outcome, error=None):
+    """Every job that reaches a worker ends here once: expanded, skipped, done or failed."""
+    if current_batch is not None:
+        current_batch.count(outcome, job, error)
+
+def stream_audio(ydl, job):
+    """Pipes the download into ffmpeg; None if the format can't be streamed and needs the file path."""
+    info = info_cache.download(ydl, job.url, extract_cache, download=False)
+    if not can_stream(info):
+        return None
+
+    def hook(d):
+        check_stop(job)
+        bandwidth.account(job, d)  # May sleep; the job can be stopped meanwhile
+        check_stop(job)
+
+    try:
+        return transcoder.stream(ydl, info, AUDIO_PRESET, normalized_quality(job.dtype, job.quality), hook)
+    except TranscodeError as e:
+        print(f"[!] Streaming failed ({e}), downloading to disk instead")
+        return None
+
+def finish_transcode(job, result, error):
+    """Called on a transcode thread once the file is converted (or ffmpeg failed)."""
+    if error is not None:
+        fail_job(job, error, "converting")
+        return
+    record_download(job, result.path)
+    job_store.mark(job, "done")
+    print(f"[✓] Completed #{job.id} ({result.summary()}): {job.url}")
+    job_finished(job, "done")
+
+def fail_job(job, error, stage):
+    """
+    Retries the job after a backoff if the error may pass (a timeout, a 5xx, a 429);
+    otherwise, or once it's out of attempts, it fails for good and stays in the
+    job store as a dead letter.
+    """
+    kind, delay = retry_policy.decide(job, error)
+    if delay is not None:
+        job.variants = []  # They already ran with this worker
+        job_store.mark(job, "queued", f"{kind}: {error}")
+        if stopping.is_set():
+            return  # Replayed next run
+        print(f"[↻] {kind.capitalize()} error {stage} #{job.id} (attempt {job.attempts}/{RETRY_ATTEMPTS}), "
+              f"retrying in {delay:.0f}s: {error}")
+        retries.schedule(job, delay)
+        return
+    job_store.mark(job, "failed", f"{kind}: {error}")
+    print(f"[!] Error {stage} {job.url} ({kind}, attempt {job.attempts}): {error}")
+    job_finished(job, "failed", error)
+
+def requeue(job):
+    """Called on the retry thread once a job's backoff is over."""
+    if stopping.is_set():
+        return  # Still 'queued' in the job store
+    if url_queue.put(job) == JobQueue.DUPLICATE:
+        # The same video was queued again meanwhile; that job downloads it
+        job_store.mark(job, "done")
+        job_finished(job, "duplicate")
+
+def prefetch_info(job):
+    """asyncio engine: extracts the job's metadata into the cache while it waits for a download slot."""
+    if is_collection_url(job.url) or already_downloaded(job):
+        return
+    profile, ydl_opts = build_ydl_opts(job.dtype, job.quality)
+    with ydl_pool.lease(profile, ydl_opts) as ydl:
+        info_cache.prefetch(ydl, job.url, extract_cache)
+
+def make_pool(engine):
+    if engine == "asyncio":
+        from async_engine import AsyncEngine  # asyncio itself is a noticeable import
+        return AsyncEngine(url_queue, download_worker, workers=MAX_WORKERS, per_host=PER_HOST_LIMIT,
+                           prefetch=prefetch_info, prefetch_workers=EXTRACT_WORKERS)
+    return WorkerPool(url_queue, download_worker, workers=MAX_WORKERS, per_host=PER_HOST_LIMIT)
+
+pool = make_pool(ENGINE)
+
+def shutdown(timeout=SHUTDOWN_TIMEOUT):
+    """Stops taking jobs and has the running downloads save their partial state before exit."""
+    stopping.set()
+    pool.stop()
+    for job in list(running_jobs):
+        job.paused = True
+    stopped = pool.wait(timeout)
+    transcoder.stop(timeout)
+    ydl_pool.close()
+    if stopped:
+        job_store.close()
+        extract_cache.close()
+        history.close()
+    else:
+        print("[!] Some downloads didn't stop in time; they resume from their last saved state")
 
 def is_youtube_url(text):
-    """Checks if the text looks like a YouTube URL."""
-    return "youtube.com/watch" in text or "youtu.be/" in text
+    """Checks if the text is a single YouTube video, playlist or channel link."""
+    return url_platform(text) == "youtube"
+
+def enqueue(job):
+    """
+    History check, journal, queue. Safe to call from any thread.
+    Returns the JobQueue status, or None if the video was already downloaded.
+    """
+    existing = already_downloaded(job)
+    if existing:
+        print(f"\n[=] Already downloaded: {existing}")
+        return None
+    job_store.add(job)
+    status = url_queue.put(job)
+    if status == JobQueue.DUPLICATE:
+        job_store.mark(job, "done")
+        print(f"\n[=] Already in queue: {job.url}")
+    else:
+        print(f"\n[+] Added to Queue: {job.url}")
+    return status
+
+def resume(pending, run=None):
+    """Puts jobs left queued by an earlier run back on the queue; in batch mode they count towards `run`."""
+    for job in pending:
+        print(f"[~] Resuming: {job.url}")
+        if run is not None:
+            run.hold(job)
+        if url_queue.put(job) == JobQueue.DUPLICATE:
+            job_store.mark(job, "done")
+            if run is not None:
+                run.count("duplicate", job)
+        elif run is not None:
+            run.count("resumed")
+
+def on_clipboard_change(current_text):
+    # Every YouTube link in the copied text (one link or a whole list) goes on the queue
+    for url in find_urls(current_text):
+        if is_youtube_url(url):
+            enqueue(Job(url, "audio", "192", priority=PRIORITY_BULK, rate_limit=JOB_RATE_LIMIT))
 
 def monitor_clipboard():
+    global EXTRACTORS
     print("--- Queue-Based YouTube Downloader (Original Config) ---")
     print("1. Copy YouTube links continuously.")
-    print("2. They will be added to the queue and downloaded one by one.")
+    print(f"2. They will be added to the queue and downloaded {MAX_WORKERS} at a time.")
     print("3. Press Ctrl+C to stop.")
     
-    # Start the worker thread in the background
-    # daemon=True means this thread will die when the main program exits
-    threading.Thread(target=download_worker, daemon=True).start()
+    # Pick up whatever was still queued when the script last stopped
+    pending = job_store.pending()
+    if any(not is_youtube_url(job.url) for job in pending):
+        EXTRACTORS = None  # Left over from a batch run of other sites
+    resume(pending)
+
+    # Start the worker pool and the transcode stage in the background
+    pool.start()
+    transcoder.start()
+    # Load yt-dlp while waiting for the first link instead of when it arrives
+    threading.Thread(target=ydl_pool.warm_up, args=build_ydl_opts("audio", "192"),
+                     name="playget-preload", daemon=True).start()
     
-    last_text = pyperclip.paste()
+    # Called from the watcher thread each time the clipboard text changes
+    import pyperclip  # only clipboard mode needs it; batch mode runs where there's no clipboard
+    watcher = create_watcher(pyperclip.paste, on_clipboard_change, CHECK_INTERVAL).start()
+    print(f"   (Clipboard watcher: {watcher.mode})")
 
     try:
         while True:
-            current_text = pyperclip.paste()
-
-            # Check if clipboard changed
-            if current_text != last_text:
-                last_text = current_text
-                
-                # If it's a YouTube link, add to Queue immediately
-                if is_youtube_url(current_text):
-                    print(f"\n[+] Added to Queue: {current_text}")
-                    url_queue.put(current_text)
-            
-            time.sleep(CHECK_INTERVAL)
+            time.sleep(3600)
             
     except KeyboardInterrupt:
+        watcher.stop()
+        shutdown()
+        if transcoder.cpu_saved:
+            print(f"\n[i] Skipped re-encodes saved ~{transcoder.cpu_saved:.0f}s of CPU this session")
         print("\n[!] Script stopped by user.")
 
+def run_batch(sources, dtype, quality, summary_path=None):
+    """
+    Downloads every job listed in `sources` (files, folders of files, "-" for stdin)
+    and returns the summary dict. Lines are read as the workers free up slots.
+    Progress goes to stderr; stdout gets only the summary JSON.
+    """
+    global current_batch, EXTRACTORS
+    EXTRACTORS = None  # Batch lines can be from any site yt-dlp supports
+    run = current_batch = BatchRun(BATCH_BACKLOG)
+    with contextlib.redirect_stdout(sys.stderr):
+        pool.start()
+        transcoder.start()
+        try:
+            # Jobs an interrupted run left queued finish as part of this one
+            resume(job_store.pending(), run)
+            for source, number, line in iter_lines(sources):
+                try:
+                    fields = parse_line(line, dtype, quality)
+                except ValueError as e:
+                    run.count("invalid", error=f"{source}:{number}: {e}")
+                    continue
+                if fields is None:
+                    continue
+                url, line_dtype, line_quality = fields
+                # Other sites' links are passed to yt-dlp as written
+                job = Job(canonical_url(url) or url, line_dtype, line_quality, rate_limit=JOB_RATE_LIMIT)
+                run.hold(job)
+                status = enqueue(job) or "already_downloaded"
+                if status in (JobQueue.QUEUED, JobQueue.MERGED):
+                    run.count(status)
+                else:
+                    # Never reaches a worker, so it gives its slot straight back
+                    run.count(status, job)
+            # A failed job may be waiting out its backoff; it comes back on the queue afterwards
+            while True:
+                url_queue.join()
+                transcoder.join()
+                if not retries.pending():
+                    break
+                retries.join()
+        except KeyboardInterrupt:
+            print("\n[!] Batch interrupted; unfinished jobs stay queued for the next run.")
+            shutdown()
+        finally:
+            transcoder.close()
+    summary = run.summary()
+    if summary_path:
+        with open(summary_path, "w") as f:
+            json.dump(summary, f, indent=2)
+    print(json.dumps(summary))
+    return summary
+
+def main():
+    global MAX_WORKERS, PER_HOST_LIMIT, pool
+    parser = argparse.ArgumentParser(description="Queue-based downloader: watches the clipboard, or runs a batch.")
+    parser.add_argument("--batch", nargs="+", metavar="SOURCE",
+                        help="files or folders of links, one 'url [audio|video [quality]]' per line; - for stdin")
+    parser.add_argument("--type", choices=("audio", "video"), default="audio", help="default type for batch lines")
+    parser.add_argument("--quality", help="default quality for batch lines of --type: kbps (128-320) "
+                                          "or height (360-1080), or best; 192 for audio, best for video if omitted")
+    parser.add_argument("--workers", type=int, default=MAX_WORKERS, help="concurrent downloads")
+    parser.add_argument("--per-host", type=int, default=PER_HOST_LIMIT, help="concurrent downloads per platform")
+    parser.add_argument("--engine", choices=("threads", "asyncio"), default=ENGINE,
+                        help="worker threads, or an asyncio loop that extracts ahead of the downloads")
+    parser.add_argument("--limit", metavar="RATE", help="bandwidth shared by all downloads, e.g. 500K or 2M per second")
+    parser.add_argument("--summary", metavar="FILE", help="also write the batch summary JSON here")
+    args = parser.parse_args()
+
+    MAX_WORKERS = max(1, args.workers)
+    PER_HOST_LIMIT = max(1, args.per_host)
+    if args.limit:
+        from yt_dlp.utils import parse_bytes
+        rate = parse_bytes(args.limit)
+        if not rate:
+            parser.error(f"bad --limit {args.limit!r}")
+        bandwidth.limit = rate
+    if args.batch:
+        try:
+            check_quality(args.type, args.quality)
+        except ValueError as e:
+            parser.error(str(e))
+    open_stores()
+    pool = make_pool(args.engine)
+    if args.batch:
+        summary = run_batch(args.batch, args.type, args.quality, args.summary)
+        sys.exit(1 if summary["counts"].get("failed") else 0)
+    monitor_clipboard()
+
 if __name__ == "__main__":
-    monitor_clipboard()
\ No newline at end of file
+    main()
\ No newline at end of file
@@ -6,22 +6,40 @@ A modern dark-themed multi-platform video downloader
 import sys
 import os
 import threading
-import queue
 from PyQt6.QtWidgets import (
     QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
     QLabel, QPushButton, QLineEdit, QComboBox, QFrame, QStackedWidget,
-    QProgressBar, QScrollArea, QGraphicsDropShadowEffect, QSpacerItem, QSizePolicy
+    QProgressBar, QScrollArea, QGraphicsDropShadowEffect, QSpacerItem, QSizePolicy, QListView, QMenu
 )
 from PyQt6.QtCore import Qt, QTimer, pyqtSignal, QObject, QStandardPaths
 from PyQt6.QtGui import QFont, QColor, QPalette, QIcon
-import yt_dlp
 import ctypes
 
+from jobs import Job, JobQueue, JobCancelled, JobPaused, check_quality, check_stop, file_label, reserve_ids, PRIORITY_HIGH, PRIORITY_NORMAL, PRIORITY_BULK
+from job_store import JobStore
+from info_cache import InfoCache
+import info_cache
+from history import DownloadHistory, output_path
+from urls import canonical_id, canonical_url, find_urls, is_collection_url
+from playlists import EXPAND_OPTS, iter_entry_urls
+from worker_pool import WorkerPool
+from ydl_pool import YDLPool
+from transcode import TranscodePool, TranscodeError, can_stream
+from control_api import ControlServer, JobBoard
+from progress import ProgressThrottle, UI_REFRESH_HZ
+from bandwidth import BandwidthScheduler
+from job_model import JobListModel, JobDelegate, JobRole
+from retry import RetryPolicy, RetryScheduler
+
 # --- Configuration ---
 # --- Configuration ---
 def get_download_path():
     return QStandardPaths.writableLocation(QStandardPaths.StandardLocation.DownloadLocation)
 
+def get_data_path():
+    base = QStandardPaths.writableLocation(QStandardPaths.StandardLocation.GenericDataLocation)
+    return os.path.join(base, "PlayGet")
+
 def get_ffmpeg_path():
     if getattr(sys, 'frozen', False):
         # Running as compiled executable
@@ -38,8 +56,32 @@ def get_ffmpeg_path():
     return os.path.dirname(ffmpeg_exe) if os.path.exists(ffmpeg_exe) else base_path
 
 DOWNLOAD_FOLDER = get_download_path()
-CHECK_INTERVAL = 500
+DATA_FOLDER = get_data_path()
+JOB_DB = os.path.join(DATA_FOLDER, "queue.db")
+INFO_DB = os.path.join(DATA_FOLDER, "info_cache.db")
+HISTORY_DB = os.path.join(DATA_FOLDER, "history.db")
+INFO_CACHE_TTL = 30 * 60   # Seconds; YouTube media URLs expire after a few hours
+INFO_CACHE_SIZE = 500      # Entries kept before least recently used are evicted
+CHECK_INTERVAL = 500      # Polling fallback for platforms without clipboard change events
+CLIPBOARD_EVENTS = True   # Watch QClipboard.dataChanged instead of polling where it's reliable
 FFMPEG_PATH = get_ffmpeg_path()
+MAX_WORKERS = 3        # Concurrent downloads
+PER_HOST_LIMIT = 2     # Concurrent downloads per platform, to avoid throttling
+ENGINE = "threads"     # "threads" (one thread per worker) or "asyncio" (event loop; extraction runs ahead of downloads)
+EXTRACT_WORKERS = 16   # asyncio engine: metadata extractions in flight while downloads run
+TRANSCODE_WORKERS = os.cpu_count() or 2  # Parallel ffmpeg encodes for audio jobs
+AUDIO_PRESET = "mp3"   # Encoder preset for audio jobs, see transcode.PRESETS (mp3-fast, opus, aac, ...)
+SMART_AUDIO = False    # Opt-in: keep the original Opus/AAC stream (not an mp3) when it's already at or below the chosen bitrate
+STREAM_AUDIO = False   # Pipe audio downloads straight into ffmpeg instead of writing the source file first
+BANDWIDTH_LIMIT = None   # Bytes/s shared by all downloads (e.g. 2 << 20 for 2 MB/s); None = unlimited
+BANDWIDTH_SCHEDULE = []  # Time-of-day overrides, e.g. [("22:00", "07:00", None)] for full speed at night
+JOB_RATE_LIMIT = None    # Bytes/s cap for each download on its own; None = unlimited
+SHUTDOWN_TIMEOUT = 5     # Seconds to let running downloads save their state when the window closes
+RETRY_ATTEMPTS = 5       # Runs a job gets before a transient or throttled error fails it for good
+CONTROL_API_PORT = 47820  # Local HTTP/JSON API for scripts (see control_api.py); 0 turns it off
+EXTRACTORS = ["youtube(:.*)?", "facebook(:.*)?", "generic"]  # yt-dlp extractors each instance sets up; None = all ~1800
+PRELOAD_DELAY = 300       # ms after the window shows before yt-dlp is loaded in the background
+SEGMENT_OPTIONS = {"1 conn": 1, "2 conns": 2, "4 conns": 4, "8 conns": 8}  # Connections per file
 
 # --- Stylesheet ---
 STYLESHEET = """
@@ -78,7 +120,7 @@ QLabel#appTitle {
     letter-spacing: -0.3px;
 }
 
-QPushButton#minimizeBtn, QPushButton#closeBtn {
+QPushButton#jobsBtn, QPushButton#minimizeBtn, QPushButton#closeBtn {
     background: rgba(255, 255, 255, 0.05);
     border: none;
     border-radius: 6px;
@@ -86,7 +128,7 @@ QPushButton#minimizeBtn, QPushButton#closeBtn {
     font-size: 11px;
 }
 
-QPushButton#minimizeBtn:hover, QPushButton#closeBtn:hover {
+QPushButton#jobsBtn:hover, QPushButton#minimizeBtn:hover, QPushButton#closeBtn:hover {
     background: rgba(255, 255, 255, 0.1);
     color: white;
 }
@@ -144,6 +186,12 @@ QPushButton#backBtn:hover {
     color: #ff3b5c;
 }
 
+QListView#jobList {
+    background: transparent;
+    border: none;
+    outline: none;
+}
+
 QLabel#ytHeaderTitle {
     font-size: 18px;
     font-weight: 700;
@@ -387,6 +435,15 @@ QLabel#queueBadge {
     padding: 3px 8px;
 }
 
+QLabel#transcodeBadge {
+    background: rgba(251, 191, 36, 0.15);
+    border-radius: 10px;
+    color: #fbbf24;
+    font-size: 10px;
+    font-weight: 700;
+    padding: 3px 8px;
+}
+
 /* Coming Soon Badge */
 QLabel.soonBadge {
     background: rgba(255, 255, 255, 0.05);
@@ -425,30 +482,93 @@ QScrollBar::add-page:vertical, QScrollBar::sub-page:vertical {
 
 class DownloadSignals(QObject):
     status_update = pyqtSignal(str)
-    progress_update = pyqtSignal(int)
-    download_complete = pyqtSignal(str)
-    download_error = pyqtSignal(str)
+    job_started = pyqtSignal(int, str)       # job id, url
+    progress_update = pyqtSignal(int, object)  # job id, progress.Progress (throttled per job)
+    download_complete = pyqtSignal(int, str) # job id, url
+    download_error = pyqtSignal(int, str)    # job id, error
     queue_update = pyqtSignal(int)
+    transcode_update = pyqtSignal(int)       # files waiting for or in ffmpeg
+    job_note = pyqtSignal(int, str)          # job id, what the transcode stage did
+    job_cancelled = pyqtSignal(int)          # job id
+    job_paused = pyqtSignal(int)             # job id
+    job_resumed = pyqtSignal(int)            # job id, back in the queue
+    job_retrying = pyqtSignal(int, str)      # job id, the error and when it runs again
+    job_queued = pyqtSignal(object)          # Job, for the queue view
+
+
+def new_ydl(params):
+    """YDLPool factory. yt-dlp is imported on first use instead of before the window opens."""
+    from streams import ParallelStreamsYoutubeDL
+    return ParallelStreamsYoutubeDL(params)
 
 
 class PlayGetApp(QMainWindow):
     def __init__(self):
         super().__init__()
         self.signals = DownloadSignals()
-        self.url_queue = queue.Queue()
+        self.url_queue = JobQueue()
         self.auto_mode_active = False
         self.last_clipboard = ""
         self.download_type = "video"
-        self.is_downloading = False
+        self.download_segments = 1  # read by workers; set from segments_combo on the GUI thread
+        self.active_jobs = {}  # job id -> percent, only touched on the GUI thread
+        self.job_notes = {}    # job id -> transcode summary shown on completion
+        self.progress_throttle = ProgressThrottle(UI_REFRESH_HZ)  # called on worker threads
+        self.bandwidth = BandwidthScheduler(BANDWIDTH_LIMIT, BANDWIDTH_SCHEDULE)
+        self.retry_policy = RetryPolicy(RETRY_ATTEMPTS)
+        self.retries = RetryScheduler(self.requeue)  # puts jobs back from its own thread
+        self.job_model = JobListModel()  # GUI thread only, fed by DownloadSignals
+        self.view_before_jobs = 0
+        self.shutting_down = False
         self.drag_pos = None
         
+        self.job_store = JobStore(JOB_DB)
+        reserve_ids(self.job_store.last_id())
+        self.ydl_pool = YDLPool(factory=new_ydl)
+        self.preload_thread = None
+        self.info_cache = InfoCache(INFO_DB, ttl=INFO_CACHE_TTL, max_entries=INFO_CACHE_SIZE)
+        self.history = DownloadHistory(HISTORY_DB)
+        self.job_board = JobBoard()
+        self.control_server = None
+        if ENGINE == "asyncio":
+            from async_engine import AsyncEngine  # asyncio itself is a noticeable import
+            # Signals emitted from the engine's executor threads are queued to the GUI thread by Qt
+            self.worker_pool = AsyncEngine(self.url_queue, self.download_job,
+                                           workers=MAX_WORKERS, per_host=PER_HOST_LIMIT,
+                                           prefetch=self.prefetch_info, prefetch_workers=EXTRACT_WORKERS,
+                                           on_change=lambda: self.signals.queue_update.emit(self.worker_pool.pending()))
+        else:
+            self.worker_pool = WorkerPool(self.url_queue, self.download_job,
+                                          workers=MAX_WORKERS, per_host=PER_HOST_LIMIT)
+        self.transcoder = TranscodePool(FFMPEG_PATH, workers=TRANSCODE_WORKERS, smart=SMART_AUDIO,
+                                        on_change=lambda: self.signals.transcode_update.emit(self.transcoder.depth()))
+        
         self.init_ui()
         self.connect_signals()
         self.start_worker()
+        self.resume_pending()
+        self.start_control_api()
         
         self.clipboard_timer = QTimer()
         self.clipboard_timer.timeout.connect(self.check_clipboard)
         
+    def showEvent(self, event):
+        super().showEvent(event)
+        if self.preload_thread is None:
+            QTimer.singleShot(PRELOAD_DELAY, self.preload_ytdlp)
+            
+    def preload_ytdlp(self):
+        """
+        Imports yt-dlp and sets up a YoutubeDL for the default profile on a
+        background thread, so the first download doesn't wait for it.
+        """
+        if self.preload_thread is not None:
+            return
+        profile, ydl_opts = self.build_ydl_opts("video", "best", "youtube.com")
+        self.preload_thread = threading.Thread(target=self.ydl_pool.warm_up, args=(profile, ydl_opts),
+                                               name="playget-preload", daemon=True)
+        self.preload_thread.start()
+        
     def init_ui(self):
         self.setWindowTitle("PlayGet")
         self.setFixedSize(380, 620)
@@ -481,6 +601,7 @@ class PlayGetApp(QMainWindow):
         self.create_main_view()
         self.create_youtube_view()
         self.create_facebook_view()
+        self.create_jobs_view()
         
         self.create_auto_mode_panel(main_layout)
         self.create_status_bar(main_layout)
@@ -503,6 +624,13 @@ class PlayGetApp(QMainWindow):
         title = QLabel("PlayGet")
         title.setObjectName("appTitle")
         
+        jobs_btn = QPushButton("☰")
+        jobs_btn.setObjectName("jobsBtn")
+        jobs_btn.setFixedSize(30, 30)
+        jobs_btn.setToolTip("Queue")
+        jobs_btn.setCursor(Qt.CursorShape.PointingHandCursor)
+        jobs_btn.clicked.connect(self.show_jobs_view)
+        
         minimize_btn = QPushButton("─")
         minimize_btn.setObjectName("minimizeBtn")
         minimize_btn.setFixedSize(30, 30)
@@ -519,6 +647,8 @@ class PlayGetApp(QMainWindow):
         layout.addSpacing(10)
         layout.addWidget(title)
         layout.addStretch()
+        layout.addWidget(jobs_btn)
+        layout.addSpacing(4)
         layout.addWidget(minimize_btn)
         layout.addSpacing(4)
         layout.addWidget(close_btn)
@@ -545,12 +675,20 @@ class PlayGetApp(QMainWindow):
         
         self.queue_badge = QLabel("0")
         self.queue_badge.setObjectName("queueBadge")
+        self.queue_badge.setToolTip("Waiting to download")
         self.queue_badge.setVisible(False)
         
+        self.transcode_badge = QLabel("0")
+        self.transcode_badge.setObjectName("transcodeBadge")
+        self.transcode_badge.setToolTip("Waiting to convert")
+        self.transcode_badge.setVisible(False)
+        
         layout.addWidget(self.status_icon)
         layout.addSpacing(8)
         layout.addWidget(self.status_text)
         layout.addStretch()
+        layout.addWidget(self.transcode_badge)
+        layout.addSpacing(6)
         layout.addWidget(self.queue_badge)
         
         parent_layout.addWidget(status_bar)
@@ -771,6 +909,66 @@ class PlayGetApp(QMainWindow):
         layout.addStretch()
         self.stack.addWidget(view)
 
+    def create_jobs_view(self):
+        view = QWidget()
+        layout = QVBoxLayout(view)
+        layout.setContentsMargins(20, 16, 20, 16)
+        layout.setSpacing(0)
+        
+        header = QWidget()
+        header_layout = QHBoxLayout(header)
+        header_layout.setContentsMargins(0, 0, 0, 12)
+        header_layout.setSpacing(0)
+        
+        back_btn = QPushButton("←  Back")
+        back_btn.setObjectName("backBtn")
+        back_btn.setCursor(Qt.CursorShape.PointingHandCursor)
+        back_btn.clicked.connect(lambda: self.stack.setCurrentIndex(self.view_before_jobs))
+        
+        jobs_title = QLabel("Queue")
+        jobs_title.setStyleSheet("font-size: 16px; font-weight: 700;")
+        
+        header_layout.addWidget(back_btn)
+        header_layout.addStretch()
+        header_layout.addWidget(jobs_title)
+        layout.addWidget(header)
+        
+        # Rows are painted by JobDelegate and only for what's on screen, so a
+        # long queue costs nothing until it's scrolled into view
+        self.job_view = QListView()
+        self.job_view.setObjectName("jobList")
+        self.job_view.setModel(self.job_model)
+        self.job_view.setItemDelegate(JobDelegate(self.job_view))
+        self.job_view.setUniformItemSizes(True)
+        self.job_view.setVerticalScrollMode(QListView.ScrollMode.ScrollPerPixel)
+        self.job_view.setSelectionMode(QListView.SelectionMode.SingleSelection)
+        self.job_view.setContextMenuPolicy(Qt.ContextMenuPolicy.CustomContextMenu)
+        self.job_view.customContextMenuRequested.connect(self.show_job_menu)
+        layout.addWidget(self.job_view, 1)
+        
+        self.stack.addWidget(view)
+        
+    def show_job_menu(self, pos):
+        row = self.job_view.indexAt(pos).data(JobRole)
+        if row is None:
+            return
+        menu = QMenu(self.job_view)
+        job_id = row.job.id
+        if row.state in ("queued", "running"):
+            menu.addAction("Pause", lambda: self.pause_job(job_id))
+        if row.state == "paused":
+            menu.addAction("Resume", lambda: self.resume_job(job_id))
+        if row.state in ("queued", "running", "paused"):
+            menu.addAction("Cancel", lambda: self.cancel_job(job_id))
+        if not menu.isEmpty():
+            menu.exec(self.job_view.viewport().mapToGlobal(pos))
+        
+    def show_jobs_view(self):
+        jobs_index = self.stack.indexOf(self.job_view.parentWidget())
+        if self.stack.currentIndex() != jobs_index:
+            self.view_before_jobs = self.stack.currentIndex()
+            self.stack.setCurrentIndex(jobs_index)
+        
     def create_youtube_view(self):
         view = QWidget()
         layout = QVBoxLayout(view)
@@ -863,11 +1061,27 @@ class PlayGetApp(QMainWindow):
         layout.addWidget(quality_label)
         layout.addSpacing(8)
         
+        quality_row = QWidget()
+        quality_row_layout = QHBoxLayout(quality_row)
+        quality_row_layout.setContentsMargins(0, 0, 0, 0)
+        quality_row_layout.setSpacing(8)
+        
         self.quality_combo = QComboBox()
         self.quality_combo.setObjectName("qualityCombo")
         self.quality_combo.setCursor(Qt.CursorShape.PointingHandCursor)
         self.update_quality_options()
-        layout.addWidget(self.quality_combo)
+        quality_row_layout.addWidget(self.quality_combo, 1)
+        
+        # Parallel connections per file (segmented / concurrent fragment downloads)
+        self.segments_combo = QComboBox()
+        self.segments_combo.setObjectName("qualityCombo")
+        self.segments_combo.setCursor(Qt.CursorShape.PointingHandCursor)
+        self.segments_combo.setToolTip("Parallel connections per download")
+        self.segments_combo.addItems(list(SEGMENT_OPTIONS))
+        self.segments_combo.currentTextChanged.connect(self.set_segments)
+        quality_row_layout.addWidget(self.segments_combo)
+        
+        layout.addWidget(quality_row)
         layout.addSpacing(20)
         
         # Download Button
@@ -895,6 +1109,10 @@ class PlayGetApp(QMainWindow):
         self.progress_bar.setFixedHeight(8)
         progress_card_layout.addWidget(self.progress_bar, 1)
 
+        self.progress_detail = QLabel("")
+        self.progress_detail.setObjectName("progressStatus")
+        progress_card_layout.addWidget(self.progress_detail)
+
         self.progress_percent = QLabel("0%")
         self.progress_percent.setObjectName("progressPercent")
         progress_card_layout.addWidget(self.progress_percent)
@@ -908,10 +1126,44 @@ class PlayGetApp(QMainWindow):
         
     def connect_signals(self):
         self.signals.status_update.connect(self.update_status)
+        self.signals.job_started.connect(self.on_job_started)
         self.signals.progress_update.connect(self.update_progress)
         self.signals.download_complete.connect(self.on_download_complete)
         self.signals.download_error.connect(self.on_download_error)
         self.signals.queue_update.connect(self.update_queue_display)
+        self.signals.transcode_update.connect(self.update_transcode_display)
+        self.signals.job_note.connect(self.job_notes.__setitem__)
+        self.signals.job_cancelled.connect(self.on_job_cancelled)
+        self.signals.job_paused.connect(self.on_job_paused)
+        self.signals.job_retrying.connect(lambda job_id, reason: self.on_job_stopped(job_id, "Retrying..."))
+        
+        # The queue view, updated row by row through the model
+        model = self.job_model
+        self.signals.job_queued.connect(model.add_job)
+        self.signals.job_started.connect(lambda job_id, url: model.set_state(job_id, "running"))
+        self.signals.progress_update.connect(model.set_progress)
+        self.signals.job_note.connect(model.set_note)
+        self.signals.download_complete.connect(lambda job_id, url: model.set_state(job_id, "done"))
+        self.signals.download_error.connect(lambda job_id, error: model.set_state(job_id, "failed", error))
+        self.signals.job_cancelled.connect(lambda job_id: model.set_state(job_id, "cancelled"))
+        self.signals.job_paused.connect(lambda job_id: model.set_state(job_id, "paused"))
+        self.signals.job_resumed.connect(lambda job_id: model.set_state(job_id, "queued"))
+        self.signals.job_retrying.connect(lambda job_id, reason: model.set_state(job_id, "retrying", reason))
+        
+        # The control API's view of the jobs. Direct connections: the board is
+        # thread-safe and updated on the emitting thread, even with the UI busy
+        board = self.job_board
+        direct = Qt.ConnectionType.DirectConnection
+        self.signals.job_started.connect(lambda job_id, url: board.update(job_id, "running"), direct)
+        self.signals.progress_update.connect(
+            lambda job_id, p: board.update(job_id, percent=int(p.percent), speed=p.speed, eta=p.eta), direct)
+        self.signals.download_complete.connect(lambda job_id, url: board.update(job_id, "done", percent=100), direct)
+        self.signals.download_error.connect(lambda job_id, error: board.update(job_id, "failed", error=error), direct)
+        self.signals.job_cancelled.connect(lambda job_id: board.update(job_id, "cancelled"), direct)
+        self.signals.job_paused.connect(lambda job_id: board.update(job_id, "paused"), direct)
+        self.signals.job_resumed.connect(lambda job_id: board.update(job_id, "queued"), direct)
+        self.signals.job_retrying.connect(
+            lambda job_id, reason: board.update(job_id, "retrying", error=reason), direct)
         
     def set_type(self, type_name):
         self.download_type = type_name
@@ -926,22 +1178,37 @@ class PlayGetApp(QMainWindow):
         else:
             self.quality_combo.addItems(["320 kbps (Best)", "256 kbps", "192 kbps", "128 kbps"])
             
+    def set_segments(self, text):
+        self.download_segments = SEGMENT_OPTIONS.get(text, 1)
+            
     def paste_url(self, input_field=None):
         clipboard = QApplication.clipboard()
         target = input_field if input_field else self.url_input
         target.setText(clipboard.text())
         
+    def clipboard_events_supported(self):
+        # On macOS Qt only notices other apps' clipboard changes when PlayGet is focused
+        return CLIPBOARD_EVENTS and sys.platform != 'darwin'
+        
     def toggle_auto_mode(self):
         self.auto_mode_active = self.auto_btn.isChecked()
+        use_events = self.clipboard_events_supported()
         if self.auto_mode_active:
             self.auto_btn.setText("STOP")
-            self.clipboard_timer.start(CHECK_INTERVAL)
+            if use_events:
+                QApplication.clipboard().dataChanged.connect(self.check_clipboard)
+            else:
+                self.clipboard_timer.start(CHECK_INTERVAL)
             self.update_status_display("Watching clipboard...", "#ff3b5c")
             # Don't suppress current clipboard - let check_clipboard handle it
             # self.last_clipboard = QApplication.clipboard().text() 
+            self.check_clipboard()
         else:
             self.auto_btn.setText("START")
-            self.clipboard_timer.stop()
+            if use_events:
+                QApplication.clipboard().dataChanged.disconnect(self.check_clipboard)
+            else:
+                self.clipboard_timer.stop()
             self.update_status_display("Ready", "rgba(255, 255, 255, 0.3)")
             
     def check_clipboard(self):
@@ -950,21 +1217,19 @@ class PlayGetApp(QMainWindow):
         
         if current != self.last_clipboard:
             self.last_clipboard = current
-            if self.is_supported_url(current):
-                self.add_to_queue(current)
-                self.update_status_display("Added to queue", "#4ade80")
+            # Every link in the copied text, e.g. a whole list; Auto Mode jobs are
+            # bulk, so pasted links and the API go ahead of them
+            self.queue_urls(find_urls(current), PRIORITY_BULK)
+                
+    def queue_urls(self, urls, priority=PRIORITY_HIGH):
+        """Queues each of `urls` and reports how many went in. Returns that count."""
+        added = sum(1 for url in urls if self.add_to_queue(url, priority))
+        if added > 1:
+            self.update_status_display(f"Added {added} to queue", "#4ade80")
+        elif added:
+            self.update_status_display("Added to queue", "#4ade80")
+        return added
                 
-    def is_youtube_url(self, text):
-        if not text: return False
-        return "youtube.com" in text or "youtu.be" in text
-
-    def is_facebook_url(self, text):
-        if not text: return False
-        return "facebook.com" in text or "fb.watch" in text or "fb.com" in text
-
-    def is_supported_url(self, text):
-        return self.is_youtube_url(text) or self.is_facebook_url(text)
-        
     def get_quality_value(self):
         text = self.quality_combo.currentText()
         quality_map = {
@@ -977,136 +1242,521 @@ class PlayGetApp(QMainWindow):
         }
         return quality_map.get(text, "best")
         
-    def add_to_queue(self, url):
-        self.url_queue.put((url, self.download_type, self.get_quality_value()))
-        self.signals.queue_update.emit(self.url_queue.qsize())
+    def add_to_queue(self, url, priority=PRIORITY_HIGH):
+        """Queues a job, unless it's already been downloaded. Returns True if queued."""
+        job = Job(url, self.download_type, self.get_quality_value(), priority=priority, rate_limit=JOB_RATE_LIMIT)
+        status, existing = self.enqueue(job)
+        if existing:
+            self.update_status_display(f"Already downloaded: {os.path.basename(existing)}", "#4ade80")
+            return False
+        if status == JobQueue.DUPLICATE:
+            self.update_status_display("Already in queue", "#fbbf24")
+            return False
+        return True
+        
+    def enqueue(self, job):
+        """
+        Thread-safe: history check, journal, queue. Returns (queue status, existing path);
+        status is None when the video was already downloaded.
+        """
+        existing = self.find_downloaded(job)
+        if existing:
+            return None, existing
+        self.job_store.add(job)
+        status = self.url_queue.put(job)
+        if status == JobQueue.DUPLICATE:
+            self.job_store.mark(job, "done")
+        else:
+            self.job_board.add(job)
+            self.signals.job_queued.emit(job)
+            self.signals.queue_update.emit(self.worker_pool.pending())
+        return status, None
+        
+    def api_enqueue(self, url, dtype, quality, priority="normal", rate_limit=None):
+        """Control API: queues a job from any thread. Raises ValueError for bad input."""
+        if dtype not in ("audio", "video"):
+            raise ValueError(f"unknown type {dtype!r}")
+        quality = check_quality(dtype, quality)
+        url = canonical_url(url)
+        if url is None:
+            raise ValueError("unsupported URL")
+        priorities = {"high": PRIORITY_HIGH, "normal": PRIORITY_NORMAL, "bulk": PRIORITY_BULK}
+        if not isinstance(priority, str) or priority not in priorities:
+            raise ValueError(f"unknown priority {priority!r}")
+        if rate_limit is not None and (isinstance(rate_limit, bool) or not isinstance(rate_limit, (int, float))
+                                       or rate_limit <= 0):
+            raise ValueError("rate_limit must be a positive number of bytes per second")
+        job = Job(url, dtype, quality, priority=priorities[priority], rate_limit=rate_limit or JOB_RATE_LIMIT)
+        status, existing = self.enqueue(job)
+        if existing:
+            return {"id": None, "url": url, "status": "already_downloaded", "path": existing}
+        return {"id": job.id, "url": url, "status": status}
+        
+    def cancel_job(self, job_id):
+        """
+        Control API: cancels a job that hasn't finished. A waiting job is dropped
+        when a worker reaches it; a running one stops at its next progress update.
+        """
+        job = self.job_board.job(job_id)
+        if job is None:
+            return False
+        job.cancelled = True
+        if self.job_board.entry(job_id)["state"] in ("queued", "paused", "retrying"):
+            self.job_store.mark(job, "cancelled")
+            self.signals.job_cancelled.emit(job_id)
+        return True
+        
+    def pause_job(self, job_id):
+        """
+        Stops a queued or running job without losing its partial download, and frees
+        its worker. A running job stops at its next progress update; one that's
+        already converting finishes.
+        """
+        job = self.job_board.job(job_id)
+        if job is None or self.job_board.entry(job_id)["state"] not in ("queued", "running"):
+            return False
+        job.paused = True
+        if self.job_board.entry(job_id)["state"] == "queued":
+            self.job_store.mark(job, "paused")
+            self.signals.job_paused.emit(job_id)
+        return True
+        
+    def resume_job(self, job_id):
+        """Puts a paused job back on the queue; yt-dlp continues its .part file."""
+        job = self.job_board.job(job_id)
+        if job is None or self.job_board.entry(job_id)["state"] != "paused":
+            return False
+        job.paused = False
+        if not self.url_queue.waiting(job):
+            # Its variants were requeued when it stopped; the resumed run is this job alone
+            job.variants = []
+        self.job_store.mark(job, "queued")
+        self.url_queue.put(job)
+        self.signals.job_resumed.emit(job_id)
+        self.signals.queue_update.emit(self.worker_pool.pending())
+        return True
+        
+    def requeue(self, job):
+        """RetryScheduler callback: a job's retry delay is over."""
+        if job.cancelled or self.shutting_down:
+            return  # Cancelled meanwhile, or left 'queued' in the store for the next start
+        if self.url_queue.put(job) == JobQueue.DUPLICATE:
+            # The same video was queued again meanwhile; that job downloads it
+            self.job_store.mark(job, "done")
+            self.signals.download_complete.emit(job.id, job.url)
+            return
+        self.signals.job_resumed.emit(job.id)
+        self.signals.queue_update.emit(self.worker_pool.pending())
+        
+    def start_control_api(self):
+        if not CONTROL_API_PORT:
+            return
+        try:
+            self.control_server = ControlServer(self.job_board, self.api_enqueue, self.cancel_job,
+                                                port=CONTROL_API_PORT, pause=self.pause_job,
+                                                resume=self.resume_job,
+                                                dead_letters=self.job_store.dead_letters).start()
+        except OSError as e:
+            print(f"Control API not started on port {CONTROL_API_PORT}: {e}")
+        
+    def find_downloaded(self, job):
+        """Path of an earlier download of the same video/type/quality, placed in DOWNLOAD_FOLDER."""
+        video_id = canonical_id(job.url)
+        entry = self.history.lookup(video_id, *job.variant) if video_id else None
+        if entry is None:
+            return None
+        try:
+            return self.history.materialize(entry, DOWNLOAD_FOLDER)
+        except OSError as e:
+            print(f"ERROR: could not reuse {entry.path}: {e}")
+            return None
+        
+    def resume_pending(self):
+        """Puts jobs left over from the last session back on the queue; paused ones wait for a resume."""
+        jobs = self.job_store.pending()
+        for job in jobs:
+            if self.url_queue.put(job) == JobQueue.DUPLICATE:
+                self.job_store.mark(job, "done")
+            else:
+                self.job_board.add(job)
+                self.signals.job_queued.emit(job)
+        for job in self.job_store.paused():
+            self.job_board.add(job, "paused")
+            self.signals.job_queued.emit(job)
+            self.signals.job_paused.emit(job.id)
+        if jobs:
+            self.update_status_display(f"Resumed {len(jobs)} queued", "#4ade80")
+            self.signals.queue_update.emit(self.worker_pool.pending())
         
     def start_download(self, input_field=None):
         target = input_field if input_field else self.url_input
-        url = target.text().strip()
-        if not url:
+        text = target.text().strip()
+        if not text:
             self.update_status_display("Enter a URL", "#fbbf24")
             return
-        if not self.is_supported_url(url):
+        urls = list(find_urls(text))
+        if not urls:
             self.update_status_display("Invalid URL", "#ef4444")
             return
             
-        self.add_to_queue(url)
+        self.queue_urls(urls)
         target.clear()
         
     def start_worker(self):
-        worker = threading.Thread(target=self.download_worker, daemon=True)
-        worker.start()
-        
-    def download_worker(self):
-        while True:
-            url, dtype, quality = self.url_queue.get()
-            self.is_downloading = True
-            self.signals.status_update.emit("Downloading...")
-            self.signals.queue_update.emit(self.url_queue.qsize())
+        self.worker_pool.start()
+        self.transcoder.start()
+        
+    def build_ydl_opts(self, dtype, quality, host):
+        """Returns (profile, ydl_opts) for a job; jobs with the same profile share a YoutubeDL."""
+        # Other qualities of the same video get files of their own (see file_label)
+        outtmpl = f'{DOWNLOAD_FOLDER}/%(title)s{file_label(dtype, quality)}.%(ext)s'
+        if dtype == "audio":
+            # Only the raw stream is fetched here; the encode runs in the transcode stage
+            profile = ("audio", quality)
+            ydl_opts = {
+                'format': 'bestaudio/best',
+                'outtmpl': outtmpl,
+                'ffmpeg_location': FFMPEG_PATH,
+                'quiet': True,
+                'no_warnings': True,
+            }
+        else:
+            # Prefer pre-merged mp4 formats to avoid ffmpeg issues
+            if quality != "best":
+                fmt = f'bestvideo[height<={quality}][ext=mp4]+bestaudio[ext=m4a]/bestvideo[height<={quality}]+bestaudio/best[height<={quality}]/best'
+            else:
+                fmt = 'bestvideo[ext=mp4]+bestaudio[ext=m4a]/bestvideo+bestaudio/best'
+            profile = ("video", quality)
+            ydl_opts = {
+                'format': fmt,
+                'outtmpl': outtmpl,
+                'ffmpeg_location': FFMPEG_PATH,
+                'merge_output_format': 'mp4',
+                # Fetch the video and audio streams side by side instead of one after the other
+                'playget_parallel_streams': True,
+                'quiet': False,
+                'no_warnings': False,
+                'verbose': True,
+            }
+            if host == "facebook.com":
+                profile = ("facebook", quality)
+            else:
+                ydl_opts['extractor_args'] = {
+                    'youtube': {
+                        'player_client': ['android', 'ios']
+                    }
+                }
+        if EXTRACTORS:
+            ydl_opts['allowed_extractors'] = EXTRACTORS
+        # Progressive files: parallel byte ranges; DASH/HLS: parallel fragments
+        segments = self.download_segments
+        ydl_opts['playget_segments'] = segments
+        ydl_opts['concurrent_fragment_downloads'] = segments
+        return profile + (segments,), ydl_opts
+        
+    def prefetch_info(self, job):
+        """asyncio engine: extracts the job's metadata into the cache while it waits for a download slot."""
+        if job.cancelled or is_collection_url(job.url) or self.find_downloaded(job):
+            return
+        profile, ydl_opts = self.build_ydl_opts(job.dtype, job.quality, job.host)
+        with self.ydl_pool.lease(profile, ydl_opts) as ydl:
+            info_cache.prefetch(ydl, job.url, self.info_cache)
+        
+    def download_job(self, job):
+        """Runs on a pool worker thread; one call per queued job."""
+        # Variants are the same video in other qualities: the extraction is
+        # cached by the first run, so only the media fetch is repeated
+        variants, job.variants = job.variants, []
+        self.download_one(job)
+        for variant in variants:
+            if job.paused or job.cancelled:
+                # Not this job's to hold back: each goes back on the queue on its own
+                self.requeue(variant)
+            else:
+                self.download_one(variant)
+        
+    def download_one(self, job):
+        url, dtype, quality = job
+        if job.cancelled or job.paused or self.shutting_down:
+            return  # cancel_job/pause_job already reported it; on shutdown it stays queued
+        wait = self.retry_policy.host_wait(job.host)
+        if wait > 0:
+            # The site asked us to back off: hold the job without spending an attempt on it
+            self.retries.schedule(job, wait)
+            self.signals.job_retrying.emit(job.id, f"{job.host} is rate limiting, starting in {wait:.0f}s")
+            return
+        self.signals.job_started.emit(job.id, url)
+        self.signals.status_update.emit("Downloading...")
+        self.signals.queue_update.emit(self.worker_pool.pending())
+        
+        os.makedirs(DOWNLOAD_FOLDER, exist_ok=True)
             
-            if not os.path.exists(DOWNLOAD_FOLDER):
-                os.makedirs(DOWNLOAD_FOLDER)
+        try:
+            self.job_store.mark(job, "running")
+            if is_collection_url(url):
+                self.expand_collection(job)
+                self.job_store.mark(job, "done")
+                self.signals.download_complete.emit(job.id, url)
+                return
+            # The same link may have finished while this job was waiting
+            if self.find_downloaded(job):
+                self.job_store.mark(job, "done")
+                self.signals.download_complete.emit(job.id, url)
+                return
+            profile, ydl_opts = self.build_ydl_opts(dtype, quality, job.host)
+            q = quality if quality != "best" else "320"
+            with self.ydl_pool.lease(profile, ydl_opts, hook=lambda d: self.progress_hook(job, d)) as ydl:
+                streamed = self.stream_audio(ydl, job, q) if dtype == "audio" and STREAM_AUDIO else None
+                if streamed is None:
+                    info = info_cache.download(ydl, url, self.info_cache)
+            self.retry_policy.succeeded(job.host)
+            if streamed is not None:
+                self.on_transcoded(job, streamed, None)
+                return
+            if dtype == "audio":
+                # Hand the file to the transcode stage and free this worker for the next download
+                self.signals.status_update.emit("Converting...")
+                self.transcoder.submit(output_path(info), AUDIO_PRESET, q,
+                                       lambda result, error: self.on_transcoded(job, result, error),
+                                       cancelled=lambda: job.cancelled)
+                return
+            self.finish_job(job, output_path(info))
                 
-            try:
-                if dtype == "audio":
-                    q = quality if quality != "best" else "320"
-                    ydl_opts = {
-                        'format': 'bestaudio/best',
-                        'outtmpl': f'{DOWNLOAD_FOLDER}/%(title)s.%(ext)s',
-                        'ffmpeg_location': FFMPEG_PATH,
-                        'postprocessors': [{
-                            'key': 'FFmpegExtractAudio',
-                            'preferredcodec': 'mp3',
-                            'preferredquality': q,
-                        }],
-                        'quiet': True,
-                        'no_warnings': True,
-                        'progress_hooks': [self.progress_hook],
-                    }
-                else:
-                    # Prefer pre-merged mp4 formats to avoid ffmpeg issues
-                    if quality != "best":
-                        fmt = f'bestvideo[height<={quality}][ext=mp4]+bestaudio[ext=m4a]/bestvideo[height<={quality}]+bestaudio/best[height<={quality}]/best'
-                    else:
-                        fmt = 'bestvideo[ext=mp4]+bestaudio[ext=m4a]/bestvideo+bestaudio/best'
-                    ydl_opts = {
-                        'format': fmt,
-                        'outtmpl': f'{DOWNLOAD_FOLDER}/%(title)s.%(ext)s',
-                        'ffmpeg_location': FFMPEG_PATH,
-                        'merge_output_format': 'mp4',
-                        'quiet': False,
-                        'no_warnings': False,
-                        'verbose': True,
-                        'progress_hooks': [self.progress_hook],
-                        'extractor_args': {
-                            'youtube': {
-                                'player_client': ['android', 'ios']
-                            }
-                        }
-                    }
-                    
-                with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                    ydl.download([url])
-                    self.signals.download_complete.emit(url)
-                    
-            except Exception as e:
-                print(f"ERROR: {str(e)}")
-                self.signals.download_error.emit(str(e))
-            finally:
-                self.url_queue.task_done()
-                self.is_downloading = False
-                self.signals.queue_update.emit(self.url_queue.qsize())
+        except JobCancelled:
+            self.job_store.mark(job, "cancelled")
+            self.signals.job_cancelled.emit(job.id)
+        except JobPaused:
+            # The .part file (and segment sidecar) stay for the resume
+            if self.shutting_down:
+                self.job_store.mark(job, "queued")
+            else:
+                self.job_store.mark(job, "paused")
+                self.signals.job_paused.emit(job.id)
+        except Exception as e:
+            self.fail_job(job, e)
+        finally:
+            self.signals.queue_update.emit(self.worker_pool.pending())
+            
+    def stream_audio(self, ydl, job, q):
+        """
+        Streams an audio job through ffmpeg as it downloads. Returns the TranscodeResult,
+        or None when the format can't be piped and the normal download path should run.
+        """
+        info = info_cache.download(ydl, job.url, self.info_cache, download=False)
+        if not can_stream(info):
+            return None
+        try:
+            return self.transcoder.stream(ydl, info, AUDIO_PRESET, q, lambda d: self.progress_hook(job, d))
+        except TranscodeError as e:
+            print(f"Streaming #{job.id} failed ({e}), downloading to disk instead")
+            return None
+            
+    def on_transcoded(self, job, result, error):
+        """Transcode stage callback; runs on a transcode thread."""
+        if isinstance(error, JobCancelled):
+            self.job_store.mark(job, "cancelled")
+            self.signals.job_cancelled.emit(job.id)
+            return
+        if error is not None:
+            self.fail_job(job, error)
+            return
+        print(f"#{job.id}: {result.summary()}")
+        self.signals.job_note.emit(job.id, result.summary())
+        self.finish_job(job, result.path)
+            
+    def finish_job(self, job, path):
+        self.record_download(job, path)
+        self.job_store.mark(job, "done")
+        self.signals.download_complete.emit(job.id, job.url)
+        
+    def fail_job(self, job, error):
+        """
+        Puts the job back after a backoff if the error may pass (a timeout, a 5xx,
+        a 429); otherwise, or once it's out of attempts, it fails for good and
+        stays in the store as a dead letter.
+        """
+        kind, delay = self.retry_policy.decide(job, error)
+        print(f"ERROR ({kind}, attempt {job.attempts}): {str(error)}")
+        if delay is not None:
+            # The variants already ran with this worker; the retry is this job alone
+            job.variants = []
+            self.job_store.mark(job, "queued", f"{kind}: {error}")
+            if not self.shutting_down:
+                self.retries.schedule(job, delay)
+                self.signals.job_retrying.emit(job.id, f"{kind} error on attempt {job.attempts}/{RETRY_ATTEMPTS}, retrying in {delay:.0f}s: {error}")
+            return
+        self.job_store.mark(job, "failed", f"{kind}: {error}")
+        self.signals.download_error.emit(job.id, str(error))
+                
+    def expand_collection(self, job):
+        """
+        Queues every video of a playlist/channel as its own job, as the listing
+        pages in, so other workers start on the first entries straight away.
+        """
+        found = 0
+        opts = dict(EXPAND_OPTS, allowed_extractors=EXTRACTORS) if EXTRACTORS else EXPAND_OPTS
+        with self.ydl_pool.lease(("expand",), opts) as ydl:
+            for entry_url in iter_entry_urls(ydl, job.url):
+                self.enqueue(Job(entry_url, job.dtype, job.quality, priority=job.priority, rate_limit=job.rate_limit))
+                found += 1
+                if found % 10 == 1:
+                    self.signals.status_update.emit(f"Found {found} videos...")
+        print(f"Expanded {job.url} into {found} jobs")
+                
+    def record_download(self, job, path):
+        video_id = canonical_id(job.url)
+        if video_id and path and os.path.exists(path):
+            self.history.record(video_id, *job.variant, path)
                 
-    def progress_hook(self, d):
+    def progress_hook(self, job, d):
+        check_stop(job)
+        # Sleeps here while the job is over its share of the bandwidth
+        self.bandwidth.account(job, d)
+        check_stop(job)
+        progress = self.progress_throttle.update(job.id, d)
+        if progress is None:
+            return  # Folded into the next update
         if d['status'] == 'downloading':
-            try:
-                p = d.get('_percent_str', '0%').strip().replace('%', '')
-                percent = int(float(p))
-                self.signals.progress_update.emit(percent)
-            except:
-                pass
-        elif d['status'] == 'finished':
-            self.signals.progress_update.emit(100)
+            # Remember the .part file so a restart can resume it
+            self.job_store.set_part_path(job, d.get('tmpfilename'))
+        self.signals.progress_update.emit(job.id, progress)
             
     def update_status_display(self, text, color):
         self.status_text.setText(text)
         self.status_icon.setStyleSheet(f"color: {color};")
             
     def update_status(self, text):
+        active = len(self.active_jobs)
+        if active > 1:
+            text = f"Downloading {active} jobs..."
         self.update_status_display(text, "#ff3b5c")
         self.progress_card.setVisible(True)
-        self.progress_bar.setValue(0)
-        self.progress_percent.setText("0%")
         self.download_btn.setEnabled(False)
         
-    def update_progress(self, value):
-        self.progress_bar.setValue(value)
-        self.progress_percent.setText(f"{value}%")
-        
-    def on_download_complete(self, url):
-        self.update_status_display("Complete!", "#4ade80")
+    def on_job_started(self, job_id, url):
+        self.active_jobs[job_id] = 0
+        self.show_overall_progress()
+        
+    def update_progress(self, job_id, progress):
+        if job_id in self.active_jobs:
+            self.active_jobs[job_id] = int(progress.percent)
+            self.show_overall_progress()
+            if len(self.active_jobs) == 1:
+                detail = " · ".join(filter(None, [progress.speed_str(),
+                                                  progress.eta_str() and f"{progress.eta_str()} left"]))
+            else:
+                detail = ""
+            if self.progress_detail.text() != detail:
+                self.progress_detail.setText(detail)
+            self.progress_card.setToolTip(f"{self.progress_throttle.coalesced} progress callbacks merged "
+                                          f"(updates are capped at {UI_REFRESH_HZ} per second per job)")
+            
+    def show_overall_progress(self):
+        # One bar for the whole pool: the mean of the running jobs
+        if not self.active_jobs:
+            return
+        value = sum(self.active_jobs.values()) // len(self.active_jobs)
+        if self.progress_percent.text() != f"{value}%":
+            self.progress_bar.setValue(value)
+            self.progress_percent.setText(f"{value}%")
+        
+    def on_download_complete(self, job_id, url):
+        self.active_jobs.pop(job_id, None)
+        self.progress_throttle.forget(job_id)
+        self.bandwidth.forget(job_id)
+        self.progress_detail.setText("")
+        note = self.job_notes.pop(job_id, None)
+        if self.active_jobs:
+            self.show_overall_progress()
+            return
+        self.update_status_display(f"Complete! ({note})" if note else "Complete!", "#4ade80")
         self.progress_bar.setValue(100)
         self.progress_percent.setText("100%")
         self.download_btn.setEnabled(True)
         QTimer.singleShot(3000, self.hide_progress_card)
         
     def hide_progress_card(self):
+        if self.active_jobs:
+            return
         self.progress_card.setVisible(False)
         self.update_status_display("Ready", "rgba(255, 255, 255, 0.3)")
         
-    def on_download_error(self, error):
+    def on_job_cancelled(self, job_id):
+        self.on_job_stopped(job_id, "Cancelled")
+        
+    def on_job_paused(self, job_id):
+        self.on_job_stopped(job_id, "Paused")
+        
+    def on_job_stopped(self, job_id, text):
+        self.active_jobs.pop(job_id, None)
+        self.progress_throttle.forget(job_id)
+        self.bandwidth.forget(job_id)
+        self.progress_detail.setText("")
+        self.job_notes.pop(job_id, None)
+        if self.active_jobs:
+            self.show_overall_progress()
+            return
+        self.update_status_display(text, "#fbbf24")
+        self.download_btn.setEnabled(True)
+        QTimer.singleShot(3000, self.hide_progress_card)
+        
+    def on_download_error(self, job_id, error):
+        self.active_jobs.pop(job_id, None)
+        self.progress_throttle.forget(job_id)
+        self.bandwidth.forget(job_id)
+        self.progress_detail.setText("")
+        self.job_notes.pop(job_id, None)
+        if self.active_jobs:
+            self.show_overall_progress()
+            return
         self.update_status_display("Error", "#ef4444")
         self.progress_percent.setText("—")
         self.download_btn.setEnabled(True)
         QTimer.singleShot(5000, self.hide_progress_card)
         
+    def closeEvent(self, event):
+        self.shutdown()
+        super().closeEvent(event)
+        
+    def shutdown(self, timeout=SHUTDOWN_TIMEOUT):
+        """
+        Stops taking jobs, pauses the running ones so they save their partial
+        downloads (they're replayed next start), then closes the stores.
+        """
+        self.shutting_down = True
+        self.clipboard_timer.stop()
+        if self.control_server is not None:
+            self.control_server.stop()
+        self.worker_pool.stop()
+        for entry in self.job_board.snapshot()["jobs"]:
+            job = self.job_board.job(entry["id"]) if entry["state"] == "running" else None
+            if job is not None:
+                job.paused = True
+        stopped = self.worker_pool.wait(timeout)
+        self.transcoder.stop(timeout)
+        # Idle YoutubeDL instances save their cookie jars on close
+        self.ydl_pool.close()
+        if not stopped:
+            # Still writing; leave the databases to them (every write is already committed)
+            print("Some downloads didn't stop in time; they'll resume from their last saved state")
+            return
+        self.info_cache.close()
+        self.history.close()
+        self.job_store.close()
+        
     def update_queue_display(self, count):
         if count > 0:
             self.queue_badge.setText(str(count))
             self.queue_badge.setVisible(True)
         else:
             self.queue_badge.setVisible(False)
+            
+    def update_transcode_display(self, count):
+        if count > 0:
+            self.transcode_badge.setText(f"♪ {count}")
+            self.transcode_badge.setVisible(True)
+        else:
+            self.transcode_badge.setVisible(False)
 
 
 def main():
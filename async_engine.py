@@ -0,0 +1,185 @@
+"""
+PlayGet - Asyncio download engine
+Alternative to WorkerPool: one event loop orchestrates every job in flight,
+with threads only for the blocking yt-dlp work itself
+"""
+
+import asyncio
+import threading
+import urllib.request
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+from urls import canonical_id
+from worker_pool import wait_idle
+
+# Share links that only redirect to the real video page. Resolving them up front
+# gives the job its canonical ID (for the history check) before it takes a slot.
+SHORT_LINK_HOSTS = ("fb.watch",)
+
+
+class AsyncEngine:
+    """
+    Drop-in for WorkerPool (start / pending / active, `handler(job)` per job, and
+    `task_done()` on the queue afterwards), built for many jobs in flight.
+
+    Each job is a coroutine that goes through three steps:
+      1. short links are resolved with an HTTP HEAD over a shared connection pool
+         (aiohttp when installed, otherwise urllib in the extract executor);
+      2. `prefetch(job)` (normally the yt-dlp extraction, into the info cache) runs
+         on an executor of `prefetch_workers` threads, so dozens of jobs extract at
+         once while downloads are busy;
+      3. `handler(job)` runs on the download executor once both a per-host
+         semaphore (`per_host`) and a global one (`workers`) are free.
+
+    Waiting jobs are coroutines, not parked threads. The loop only pulls
+    `workers + prefetch_workers` jobs off `job_queue` at a time, so everything
+    else stays in the queue where repeats are still coalesced.
+
+    The handler reports through DownloadSignals as before; Qt queues signals
+    emitted from executor threads onto the GUI thread, so no extra bridge is needed.
+    `on_change()` is called when the engine's pending count changes.
+    """
+
+    def __init__(self, job_queue, handler, workers=3, per_host=2, prefetch=None, prefetch_workers=16,
+                 on_change=None):
+        self.job_queue = job_queue
+        self.handler = handler
+        self.workers = max(1, workers)
+        self.per_host = max(1, per_host)
+        self.prefetch = prefetch
+        self.prefetch_workers = max(1, prefetch_workers)
+        self.on_change = on_change
+        self._lock = threading.Lock()
+        self._waiting = 0
+        self._running = 0
+        self._loop = None
+        self._session = None
+        self._stopping = threading.Event()
+
+    def start(self):
+        ready = threading.Event()
+        threading.Thread(target=self._run_loop, args=(ready,), name="playget-engine", daemon=True).start()
+        ready.wait()
+        threading.Thread(target=self._feed, name="playget-engine-feed", daemon=True).start()
+
+    def pending(self):
+        """Jobs not yet downloading: still queued, or resolving/extracting/waiting for a slot."""
+        with self._lock:
+            waiting = self._waiting
+        return self.job_queue.qsize() + waiting
+
+    def active(self):
+        with self._lock:
+            return self._running
+
+    def stop(self):
+        """No new jobs start after this; queued ones stay in the queue (and the job store)."""
+        self._stopping.set()
+        if self._loop is not None:
+            # A lookup still in flight fails, and its job keeps the link it came with
+            asyncio.run_coroutine_threadsafe(self._close_session(), self._loop)
+
+    def wait(self, timeout=None):
+        """Waits for running jobs to return. True if none are left."""
+        return wait_idle(self.active, timeout)
+
+    def _run_loop(self, ready):
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+        self._download_slots = asyncio.Semaphore(self.workers)
+        self._host_slots = defaultdict(lambda: asyncio.Semaphore(self.per_host))
+        self._download_executor = ThreadPoolExecutor(self.workers, thread_name_prefix="playget-download")
+        self._extract_executor = ThreadPoolExecutor(self.prefetch_workers, thread_name_prefix="playget-extract")
+        ready.set()
+        self._loop.run_forever()
+
+    def _feed(self):
+        # Bridges the blocking JobQueue into the loop, taking only as many jobs as can make progress
+        capacity = threading.Semaphore(self.workers + self.prefetch_workers)
+        while True:
+            capacity.acquire()
+            job = self.job_queue.get()
+            with self._lock:
+                self._waiting += 1
+            future = asyncio.run_coroutine_threadsafe(self._process(job), self._loop)
+            future.add_done_callback(lambda _: capacity.release())
+
+    async def _process(self, job):
+        loop = asyncio.get_running_loop()
+        waiting = True
+        try:
+            if self._stopping.is_set():
+                return
+            await self._resolve(job)
+            if self.prefetch is not None:
+                try:
+                    await loop.run_in_executor(self._extract_executor, self.prefetch, job)
+                except Exception as e:
+                    # The handler extracts again and reports the error properly
+                    print(f"Prefetch failed for {job.url}: {e}")
+            async with self._host_slots[job.host], self._download_slots:
+                if self._stopping.is_set():
+                    return
+                with self._lock:
+                    self._waiting -= 1
+                    self._running += 1
+                waiting = False
+                self._changed()
+                try:
+                    await loop.run_in_executor(self._download_executor, self.handler, job)
+                finally:
+                    with self._lock:
+                        self._running -= 1
+        except Exception as e:
+            print(f"ERROR: worker crashed on {job.url}: {e}")
+        finally:
+            if waiting:
+                with self._lock:
+                    self._waiting -= 1
+            self.job_queue.task_done()
+            self._changed()
+
+    async def _resolve(self, job):
+        if urlsplit(job.url).hostname not in SHORT_LINK_HOSTS:
+            return
+        try:
+            final = await self._final_url(job.url)
+        except Exception as e:
+            print(f"Could not resolve {job.url}: {e}")
+            return
+        if final and canonical_id(final):
+            # Host and key follow, so per-host slots and the history check see the real video
+            job.set_url(final)
+
+    async def _final_url(self, url):
+        try:
+            import aiohttp
+        except ImportError:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._extract_executor, _final_url_blocking, url)
+        if self._session is None:
+            if self._stopping.is_set():
+                return None
+            # One pool of keep-alive connections for every lookup the engine makes
+            connector = aiohttp.TCPConnector(limit=self.prefetch_workers, limit_per_host=self.per_host * 2)
+            self._session = aiohttp.ClientSession(connector=connector,
+                                                  timeout=aiohttp.ClientTimeout(total=15))
+        async with self._session.head(url, allow_redirects=True) as response:
+            return str(response.url)
+
+    async def _close_session(self):
+        session, self._session = self._session, None
+        if session is not None:
+            await session.close()
+
+    def _changed(self):
+        if self.on_change is not None:
+            self.on_change()
+
+
+def _final_url_blocking(url):
+    request = urllib.request.Request(url, method="HEAD", headers={"User-Agent": "Mozilla/5.0"})
+    with urllib.request.urlopen(request, timeout=15) as response:
+        return response.geturl()
@@ -0,0 +1,174 @@
+"""
+PlayGet - Bandwidth scheduler
+Token buckets shared by every download: a global limit that can change with
+the time of day, optional per-job limits, and priority classes
+"""
+
+import threading
+import time
+from collections import Counter
+
+from jobs import PRIORITY_NORMAL
+
+MAX_WAIT = 0.25   # Seconds a waiter sleeps before re-checking the rate, priorities and cancellation
+
+
+class TokenBucket:
+    """
+    `rate` bytes/s with bursts of up to `burst` bytes (one second's worth by
+    default); a rate of None means unlimited.
+
+    take() blocks until the bytes are paid for. While a caller of a lower
+    priority number is waiting, callers with higher numbers don't get tokens, so
+    a high-priority download takes as much of the rate as it can use and the
+    rest goes to the others.
+    """
+
+    def __init__(self, rate=None, burst=None, clock=time.monotonic):
+        self.clock = clock
+        self._cond = threading.Condition()
+        self._waiting = Counter()   # priority -> callers waiting
+        self._rate = None
+        self._burst = burst
+        self._tokens = 0.0
+        self._stamp = clock()
+        self.rate = rate
+
+    @property
+    def rate(self):
+        return self._rate
+
+    @rate.setter
+    def rate(self, rate):
+        with self._cond:
+            if rate == self._rate:
+                return
+            self._refill()
+            self._rate = rate or None
+            self._tokens = min(self._tokens, self.burst)
+            self._cond.notify_all()
+
+    @property
+    def burst(self):
+        return self._burst or self._rate or 0
+
+    def take(self, n, priority=PRIORITY_NORMAL, cancelled=None):
+        """Waits until `n` bytes may pass. Returns False if `cancelled()` turned true first."""
+        with self._cond:
+            self._waiting[priority] += 1
+            try:
+                while True:
+                    if cancelled is not None and cancelled():
+                        return False
+                    if self._rate is None:
+                        return True
+                    self._refill()
+                    # Chunks bigger than the burst start on a full bucket and wait off the debt
+                    want = min(n, self.burst)
+                    ahead = any(count for p, count in self._waiting.items() if p < priority)
+                    if not ahead and self._tokens >= want:
+                        self._tokens -= n
+                        break
+                    self._cond.wait(min(MAX_WAIT, max(want - self._tokens, 1) / self._rate))
+                while self._tokens < 0 and self._rate is not None:
+                    if cancelled is not None and cancelled():
+                        return False
+                    self._cond.wait(min(MAX_WAIT, -self._tokens / self._rate))
+                    self._refill()
+                return True
+            finally:
+                self._waiting[priority] -= 1
+                self._cond.notify_all()
+
+    def _refill(self):
+        now = self.clock()
+        if self._rate is not None:
+            self._tokens = min(self.burst, self._tokens + (now - self._stamp) * self._rate)
+        self._stamp = now
+
+
+def parse_schedule(schedule):
+    """
+    [("HH:MM", "HH:MM", rate), ...] -> [(start minute, end minute, rate), ...].
+    A window that ends before it starts runs past midnight.
+    """
+    windows = []
+    for start, end, rate in schedule:
+        windows.append((_minute(start), _minute(end), rate))
+    return windows
+
+
+def _minute(text):
+    hours, minutes = text.split(":")
+    if not (0 <= int(hours) < 24 and 0 <= int(minutes) < 60):
+        raise ValueError(f"bad time of day {text!r}")
+    return int(hours) * 60 + int(minutes)
+
+
+class BandwidthScheduler:
+    """
+    Paces downloads from their progress hooks: `account(job, d)` charges the
+    bytes that arrived since the job's previous callback to the job's own
+    bucket (if it has a `rate_limit`) and to the global one, sleeping in the
+    downloading thread until they're paid for.
+
+    The global rate is `limit`, except inside a `schedule` window, whose rate
+    applies instead (None = unlimited), e.g. limit=2 MB/s with a 22:00-07:00
+    window at None for full speed at night.
+    """
+
+    def __init__(self, limit=None, schedule=(), clock=time.monotonic, localtime=time.localtime):
+        self.limit = limit
+        self.schedule = parse_schedule(schedule)
+        self.localtime = localtime
+        self.bucket = TokenBucket(self.rate_now(), clock=clock)
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._seen = {}      # job id -> downloaded_bytes at the last callback
+        self._job_buckets = {}
+
+    def rate_now(self):
+        now = self.localtime()
+        minute = now.tm_hour * 60 + now.tm_min
+        for start, end, rate in self.schedule:
+            inside = start <= minute < end if start <= end else (minute >= start or minute < end)
+            if inside:
+                return rate
+        return self.limit
+
+    def account(self, job, d):
+        if d.get('status') not in ('downloading', 'finished'):
+            return
+        downloaded = d.get('downloaded_bytes') or 0
+        with self._lock:
+            last = self._seen.get(job.id)
+            self._seen[job.id] = downloaded
+            bucket = self._job_bucket(job)
+            if d['status'] == 'finished':
+                # The tail since the last update is still paid for below
+                self._seen.pop(job.id, None)
+                self._job_buckets.pop(job.id, None)
+        if last is None or downloaded < last:
+            # A new file: only what arrived in this session counts, not bytes resumed from disk
+            fresh = (d.get('speed') or 0) * (d.get('elapsed') or 0)
+            last = max(0, downloaded - fresh)
+        if downloaded <= last:
+            return
+        cancelled = lambda: job.cancelled or job.paused
+        if bucket is not None and not bucket.take(downloaded - last, job.priority, cancelled):
+            return
+        self.bucket.rate = self.rate_now()
+        self.bucket.take(downloaded - last, job.priority, cancelled)
+
+    def forget(self, job_id):
+        with self._lock:
+            self._seen.pop(job_id, None)
+            self._job_buckets.pop(job_id, None)
+
+    def _job_bucket(self, job):
+        if not job.rate_limit:
+            return None
+        bucket = self._job_buckets.get(job.id)
+        if bucket is None:
+            bucket = self._job_buckets[job.id] = TokenBucket(job.rate_limit, clock=self._clock)
+        return bucket
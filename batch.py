@@ -0,0 +1,108 @@
+"""
+PlayGet - Batch input
+Streams job lines from files, stdin or folders of link lists for headless runs,
+and keeps the tally for the end-of-run summary
+"""
+
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter
+
+from jobs import check_quality
+
+DTYPES = ("audio", "video")
+MAX_ERRORS = 100   # Failures listed individually in the summary; the rest are only counted
+
+
+def iter_lines(sources):
+    """
+    Yields (source, line number, line) for every line of every source, read lazily.
+    "-" is stdin; a folder contributes each of its files, in name order.
+    """
+    for source in sources:
+        if source == "-":
+            yield from _numbered("<stdin>", sys.stdin)
+        elif os.path.isdir(source):
+            for name in sorted(os.listdir(source)):
+                path = os.path.join(source, name)
+                if os.path.isfile(path) and not name.startswith("."):
+                    yield from _read(path)
+        else:
+            yield from _read(source)
+
+
+def _read(path):
+    with open(path, encoding="utf-8", errors="replace") as f:
+        yield from _numbered(path, f)
+
+
+def _numbered(source, lines):
+    for number, line in enumerate(lines, 1):
+        yield source, number, line
+
+
+def parse_line(line, dtype="audio", quality=None):
+    """
+    (url, dtype, quality) from "url [dtype [quality]]", fields separated by spaces,
+    tabs or commas. A missing type is `dtype`; a missing quality is `quality` for
+    lines of that type, else the type's default. None for blank and # lines.
+    """
+    text = line.strip()
+    if not text or text.startswith("#"):
+        return None
+    fields = re.split(r"[\s,]+", text)
+    if len(fields) > 1 and fields[1].lower() != dtype:
+        dtype, quality = fields[1].lower(), None
+    if len(fields) > 2:
+        quality = fields[2]
+    if dtype not in DTYPES:
+        raise ValueError(f"unknown type {dtype!r}")
+    return fields[0], dtype, check_quality(dtype, quality)
+
+
+class BatchRun:
+    """
+    Outcome counters for one batch, plus a cap on how many of its jobs are in
+    flight: the reader takes a slot per job and blocks when `backlog` are
+    outstanding, so a million-line input never sits in memory or the queue at once.
+    """
+
+    def __init__(self, backlog=1000):
+        self._slots = threading.BoundedSemaphore(backlog)
+        self._lock = threading.Lock()
+        self._holding = set()   # ids of jobs that took a slot
+        self.counts = Counter()
+        self.errors = []
+        self.started = time.time()
+
+    def hold(self, job):
+        """Blocks until a slot is free, then assigns it to `job`."""
+        self._slots.acquire()
+        with self._lock:
+            self._holding.add(job.id)
+
+    def count(self, key, job=None, error=None):
+        with self._lock:
+            self.counts[key] += 1
+            if error is not None:
+                if len(self.errors) < MAX_ERRORS:
+                    self.errors.append({"url": job.url if job else None, "error": str(error)})
+            release = job is not None and job.id in self._holding
+            if release:
+                self._holding.discard(job.id)
+        if release:
+            self._slots.release()
+
+    def summary(self):
+        with self._lock:
+            counts = dict(self.counts)
+            errors = list(self.errors)
+        return {
+            "elapsed_s": round(time.time() - self.started, 3),
+            "counts": counts,
+            "errors": errors,
+            "errors_truncated": counts.get("failed", 0) + counts.get("invalid", 0) > len(errors),
+        }
@@ -0,0 +1,111 @@
+"""
+Benchmark: clipboard change detection, QClipboard.dataChanged vs. 500 ms polling
+
+For each mode it measures
+  - latency: time from a clipboard change to the watcher noticing it
+  - idle cost: CPU time and wake-ups while nothing is copied
+
+Changes are made in-process, so the latency is what the watcher itself adds
+on top of the OS delivering the change.
+
+    QT_QPA_PLATFORM=offscreen python benchmarks/bench_clipboard.py [changes] [idle_seconds]
+"""
+
+import random
+import statistics
+import sys
+import time
+
+from PyQt6.QtCore import QTimer
+from PyQt6.QtWidgets import QApplication
+
+CHECK_INTERVAL = 500  # Same as app_gui.py
+
+
+class Watcher:
+    def __init__(self, app, mode):
+        self.app = app
+        self.clipboard = app.clipboard()
+        self.mode = mode
+        self.last = self.clipboard.text()
+        self.wakeups = 0
+        self.detected = {}  # text -> perf_counter when noticed
+        self.timer = QTimer()
+        self.timer.timeout.connect(self.check)
+
+    def start(self):
+        if self.mode == "events":
+            self.clipboard.dataChanged.connect(self.check)
+        else:
+            self.timer.start(CHECK_INTERVAL)
+
+    def stop(self):
+        if self.mode == "events":
+            self.clipboard.dataChanged.disconnect(self.check)
+        else:
+            self.timer.stop()
+
+    def check(self):
+        self.wakeups += 1
+        current = self.clipboard.text()
+        if current != self.last:
+            self.last = current
+            self.detected[current] = time.perf_counter()
+
+
+def run_loop(app, seconds):
+    QTimer.singleShot(int(seconds * 1000), app.quit)
+    app.exec()
+
+
+def measure(app, mode, changes, idle_seconds):
+    watcher = Watcher(app, mode)
+    watcher.start()
+
+    # Latency: copy `changes` links at random moments
+    copied = {}
+    rng = random.Random(42)
+    at = 0
+    for i in range(changes):
+        at += rng.randint(150, 900)
+        text = f"https://youtu.be/{mode[:3]}{i:08d}"
+
+        def copy(text=text):
+            copied[text] = time.perf_counter()
+            watcher.clipboard.setText(text)
+        QTimer.singleShot(at, copy)
+    run_loop(app, at / 1000 + CHECK_INTERVAL / 1000 + 0.2)
+    latencies = [(watcher.detected[t] - copied[t]) * 1000 for t in copied if t in watcher.detected]
+
+    # Idle: nothing changes
+    watcher.wakeups = 0
+    cpu_start = time.process_time()
+    run_loop(app, idle_seconds)
+    idle_cpu = time.process_time() - cpu_start
+    idle_wakeups = watcher.wakeups
+    watcher.stop()
+
+    return {
+        'detected': len(latencies),
+        'missed': changes - len(latencies),
+        'latency_mean_ms': statistics.mean(latencies) if latencies else float('nan'),
+        'latency_max_ms': max(latencies) if latencies else float('nan'),
+        'idle_cpu_ms': idle_cpu * 1000,
+        'idle_wakeups_per_s': idle_wakeups / idle_seconds,
+    }
+
+
+def main():
+    changes = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    idle_seconds = float(sys.argv[2]) if len(sys.argv) > 2 else 5
+    app = QApplication(sys.argv)
+
+    print(f"{'mode':<8} {'seen':>5} {'missed':>6} {'mean ms':>9} {'max ms':>9} {'idle CPU ms':>12} {'wakeups/s':>10}")
+    for mode in ("polling", "events"):
+        r = measure(app, mode, changes, idle_seconds)
+        print(f"{mode:<8} {r['detected']:>5} {r['missed']:>6} {r['latency_mean_ms']:>9.2f} "
+              f"{r['latency_max_ms']:>9.2f} {r['idle_cpu_ms']:>12.2f} {r['idle_wakeups_per_s']:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+Micro-benchmark: URL -> extractor resolution, yt-dlp's scan vs. the platform registry
+
+For a corpus of generated YouTube and Facebook links in every form PlayGet
+accepts, it times
+  - full scan       suitable() over every enabled extractor, in YoutubeDL's order
+  - restricted scan the same over the extractors left by EXTRACTORS (app_gui.py)
+  - registry        extractors.ExtractorRegistry, the platform's extractors only
+and checks that the registry picks the extractor the full scan would.
+Nothing is extracted and nothing touches the network.
+
+    python benchmarks/bench_extractors.py [urls]
+"""
+
+import os
+import random
+import string
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import yt_dlp
+
+from extractors import ExtractorRegistry
+
+RESTRICTED = ["youtube(:.*)?", "facebook(:.*)?", "generic"]  # Same as app_gui.EXTRACTORS
+
+FORMS = [
+    "https://www.youtube.com/watch?v={yt}",
+    "https://youtube.com/watch?v={yt}&t=42s",
+    "https://m.youtube.com/watch?v={yt}",
+    "https://music.youtube.com/watch?v={yt}",
+    "https://youtu.be/{yt}",
+    "https://youtu.be/{yt}?si={word}",
+    "https://www.youtube.com/shorts/{yt}",
+    "https://www.youtube.com/embed/{yt}",
+    "https://www.youtube.com/live/{yt}",
+    "https://www.youtube.com/watch?v={yt}&list=PL{list}",
+    "https://www.youtube.com/playlist?list=PL{list}",
+    "https://www.youtube.com/@{word}",
+    "https://www.youtube.com/channel/UC{yt}{yt}",
+    "https://www.facebook.com/{word}/videos/{num}/",
+    "https://www.facebook.com/watch/?v={num}",
+    "https://www.facebook.com/reel/{num}",
+    "https://m.facebook.com/video.php?v={num}",
+    "https://fb.watch/{word}/",
+]
+
+
+def corpus(n, seed=1):
+    rng = random.Random(seed)
+    chars = string.ascii_letters + string.digits + "_-"
+    urls = []
+    for _ in range(n):
+        urls.append(rng.choice(FORMS).format(
+            yt="".join(rng.choice(chars) for _ in range(11)),
+            list="".join(rng.choice(chars) for _ in range(32)),
+            word="".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(5, 12))),
+            num=rng.randint(10 ** 14, 10 ** 16)))
+    return urls
+
+
+def scan(ies):
+    def resolve(url):
+        for key, ie in ies.items():
+            if ie.suitable(url):
+                return key
+        return None
+    return resolve
+
+
+def timed(resolve, urls):
+    start = time.perf_counter()
+    keys = [resolve(url) for url in urls]
+    return time.perf_counter() - start, keys
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    urls = corpus(n)
+    params = {'quiet': True, 'no_warnings': True}
+    full = scan(yt_dlp.YoutubeDL(params)._ies)
+    restricted = scan(yt_dlp.YoutubeDL(dict(params, allowed_extractors=RESTRICTED))._ies)
+    registry = ExtractorRegistry().ie_key
+
+    # Compile every extractor's URL pattern before timing
+    for resolve in (full, restricted, registry):
+        timed(resolve, urls[:200])
+
+    full_s, expected = timed(full, urls)
+    restricted_s, _ = timed(restricted, urls)
+    registry_s, keys = timed(registry, urls)
+
+    # None from the registry means "let yt-dlp scan", which then lands on Generic
+    mismatches = [(u, e, k) for u, e, k in zip(urls, expected, keys) if k is not None and k != e]
+    preselected = sum(k is not None for k in keys)
+
+    print(f"urls: {n} ({preselected} preselected, {n - preselected} left to yt-dlp)")
+    print(f"full scan ({len(yt_dlp.YoutubeDL(params)._ies)} extractors): {full_s * 1e6 / n:8.1f} us/url")
+    print(f"restricted scan      : {restricted_s * 1e6 / n:8.1f} us/url")
+    print(f"registry             : {registry_s * 1e6 / n:8.1f} us/url  ({full_s / registry_s:.0f}x vs full scan)")
+    print(f"disagreements with the full scan: {len(mismatches)}")
+    for url, want, got in mismatches[:10]:
+        print(f"  {url}: scan {want}, registry {got}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Benchmark and check: segmented downloads against a local range-serving HTTP server
+
+The server caps every connection at --per-conn-rate bytes/s (like a CDN that
+throttles per connection) and can drop a share of responses mid-stream to
+exercise per-segment retry. Each run downloads the same file through
+SegmentedYoutubeDL and verifies the result's SHA-256.
+
+    python benchmarks/bench_segmented.py --size-mb 32 --per-conn-rate 4 --segments 1 4 8
+"""
+
+import argparse
+import hashlib
+import os
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from http.server import ThreadingHTTPServer
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'tests'))
+
+from range_server import make_handler
+from segmented import SegmentedYoutubeDL
+
+
+def run(url, workdir, segments):
+    opts = {
+        'outtmpl': os.path.join(workdir, f'seg{segments}.%(ext)s'),
+        'quiet': True,
+        'no_warnings': True,
+        'noprogress': True,
+        'retries': 10,
+        'playget_segments': segments,
+    }
+    info = {'id': 'bench', 'title': 'bench', 'url': url, 'ext': 'mp4', 'protocol': 'http',
+            'vcodec': 'avc1', 'acodec': 'mp4a'}
+    with SegmentedYoutubeDL(opts) as ydl:
+        start = time.perf_counter()
+        ydl.process_ie_result(info, download=True)
+        elapsed = time.perf_counter() - start
+    path = os.path.join(workdir, f'seg{segments}.mp4')
+    with open(path, 'rb') as f:
+        digest = hashlib.sha256(f.read()).hexdigest()
+    return elapsed, digest
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--size-mb', type=float, default=32)
+    parser.add_argument('--per-conn-rate', type=float, default=4, help='MB/s per connection')
+    parser.add_argument('--drop-rate', type=float, default=0.0, help='share of responses cut mid-stream')
+    parser.add_argument('--segments', type=int, nargs='+', default=[1, 4, 8])
+    args = parser.parse_args()
+
+    payload = random.Random(0).randbytes(int(args.size_mb * (1 << 20)))
+    expected = hashlib.sha256(payload).hexdigest()
+    handler = make_handler(payload, args.per_conn_rate * (1 << 20), args.drop_rate)
+    server = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f'http://127.0.0.1:{server.server_port}/video.mp4'
+
+    workdir = tempfile.mkdtemp(prefix='playget-seg-')
+    try:
+        print(f"{args.size_mb:g} MB file, {args.per_conn_rate:g} MB/s per connection, drop rate {args.drop_rate:g}")
+        print(f"{'segments':>8} {'seconds':>8} {'MB/s':>8}  sha256")
+        for segments in args.segments:
+            elapsed, digest = run(url, workdir, segments)
+            status = 'ok' if digest == expected else 'MISMATCH'
+            print(f"{segments:>8} {elapsed:>8.2f} {args.size_mb / elapsed:>8.2f}  {status}")
+    finally:
+        server.shutdown()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
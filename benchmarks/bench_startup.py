@@ -0,0 +1,101 @@
+"""
+Benchmark: GUI cold start, phase by phase
+
+Each run starts a fresh interpreter and records, from process start:
+  - interpreter  the Python runtime itself (measured from the parent)
+  - qt           PyQt6 widgets imported
+  - app_gui      the app module and its imports
+  - window       QApplication and the main window constructed
+  - shown        window shown and its first events processed
+  - ytdlp_ready  yt-dlp imported and a YoutubeDL set up for the default profile
+
+"eager" reproduces the old startup: yt-dlp imported with the app module and
+every extractor set up; "lazy" is the current one, where yt-dlp loads on a
+background thread after the window is shown, restricted to EXTRACTORS.
+Use `python -X importtime` on the child to dig into a single phase.
+
+    python benchmarks/bench_startup.py [runs]
+"""
+
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PHASES = ("interpreter", "qt", "app_gui", "window", "shown", "ytdlp_ready")
+
+CHILD = r"""
+import json, sys, time
+started = time.time()
+t0 = time.perf_counter()
+marks = {}
+def mark(name):
+    marks[name] = time.perf_counter() - t0
+
+mode = sys.argv[1]
+sys.path.insert(0, sys.argv[2])
+from PyQt6.QtWidgets import QApplication
+mark("qt")
+if mode == "eager":
+    import streams  # Was imported at the top of app_gui.py
+import app_gui
+mark("app_gui")
+app_gui.CONTROL_API_PORT = 0
+if mode == "eager":
+    app_gui.EXTRACTORS = None
+app = QApplication(sys.argv)
+window = app_gui.PlayGetApp()
+mark("window")
+window.show()
+app.processEvents()
+mark("shown")
+if mode == "eager":
+    window.ydl_pool.warm_up(*window.build_ydl_opts("video", "best", "youtube.com"))
+else:
+    window.preload_ytdlp()
+    window.preload_thread.join()
+mark("ytdlp_ready")
+window.shutdown(1)
+print(json.dumps({"started": started, "marks": marks}))
+"""
+
+
+def run(mode):
+    env = dict(os.environ)
+    env["XDG_DATA_HOME"] = tempfile.mkdtemp(prefix="playget-bench-")  # Empty queue and caches
+    if sys.platform.startswith("linux") and not env.get("DISPLAY") and not env.get("WAYLAND_DISPLAY"):
+        env.setdefault("QT_QPA_PLATFORM", "offscreen")
+    spawned = time.time()
+    out = subprocess.run([sys.executable, "-c", CHILD, mode, ROOT], env=env, capture_output=True,
+                         text=True, check=True).stdout
+    result = json.loads(out.strip().splitlines()[-1])
+    interpreter = result["started"] - spawned
+    phases = {"interpreter": interpreter}
+    for name, at in result["marks"].items():
+        phases[name] = interpreter + at
+    return phases
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    results = {}
+    for mode in ("eager", "lazy"):
+        run(mode)  # Warm the OS file cache so both modes read .pyc files from memory
+        samples = [run(mode) for _ in range(runs)]
+        results[mode] = {p: statistics.median(s[p] for s in samples) for p in PHASES}
+
+    print(f"runs: {runs} per mode (median ms since process start)")
+    print(f"{'phase':<13}{'eager':>10}{'lazy':>10}")
+    for phase in PHASES:
+        print(f"{phase:<13}{results['eager'][phase] * 1000:>10.0f}{results['lazy'][phase] * 1000:>10.0f}")
+    eager, lazy = results["eager"]["shown"], results["lazy"]["shown"]
+    print(f"time to window: {eager * 1000:.0f} ms -> {lazy * 1000:.0f} ms ({eager / lazy:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
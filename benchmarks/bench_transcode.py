@@ -0,0 +1,101 @@
+"""
+Benchmark: encoder presets on a fixed set of generated clips
+
+Clips are synthesised with ffmpeg's lavfi sources (fixed seed), so every box
+encodes exactly the same input. Each preset in transcode.PRESETS encodes each
+clip through TranscodePool, one at a time, and the run reports wall time, CPU
+time (ffmpeg -benchmark) and output size.
+
+    python benchmarks/bench_transcode.py --duration 120 --quality 192
+    python benchmarks/bench_transcode.py --presets mp3 mp3-fast opus --threads 1 2
+"""
+
+import argparse
+import copy
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from transcode import PRESETS, TranscodePool, find_tool, run_tool
+
+# lavfi source per clip: a pure tone (easy), a chord (tonal) and pink noise (hard to compress)
+CLIPS = {
+    "tone": "sine=frequency=440:sample_rate=48000:duration={d}",
+    "chord": "aevalsrc=0.25*sin(2*PI*220*t)+0.25*sin(2*PI*277.18*t)+0.25*sin(2*PI*329.63*t)"
+             ":sample_rate=48000:duration={d}",
+    "noise": "anoisesrc=color=pink:seed=42:amplitude=0.3:sample_rate=48000:duration={d}",
+}
+
+
+def make_clips(ffmpeg, workdir, duration):
+    paths = {}
+    for name, source in CLIPS.items():
+        path = os.path.join(workdir, f"{name}.flac")
+        result = run_tool([ffmpeg, "-y", "-v", "error", "-f", "lavfi", "-i", source.format(d=duration),
+                           "-ac", "2", path])
+        if result.returncode != 0:
+            sys.exit(f"could not generate {name}: {result.stderr.decode(errors='replace').strip()}")
+        paths[name] = path
+    return paths
+
+
+def run(pool, clip, workdir, preset, quality):
+    # process() consumes its input, so each run encodes a fresh copy
+    source = os.path.join(workdir, f"in-{preset.name}-{os.path.basename(clip)}")
+    shutil.copyfile(clip, source)
+    start = time.perf_counter()
+    result = pool.process(source, preset, quality)
+    elapsed = time.perf_counter() - start
+    size = os.path.getsize(result.path)
+    os.remove(result.path)
+    return elapsed, result.cpu_used, size
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--duration', type=float, default=60, help='seconds per clip')
+    parser.add_argument('--quality', default='192', help='bitrate in kbps')
+    parser.add_argument('--presets', nargs='+', default=list(PRESETS), choices=list(PRESETS))
+    parser.add_argument('--threads', type=int, nargs='+', default=None,
+                        help="override each preset's thread count (0 = ffmpeg's choice)")
+    parser.add_argument('--repeat', type=int, default=3, help='runs per cell; the fastest is reported')
+    parser.add_argument('--ffmpeg-location', default=None, help='folder with ffmpeg, else PATH')
+    args = parser.parse_args()
+
+    ffmpeg = find_tool("ffmpeg", args.ffmpeg_location)
+    if ffmpeg is None:
+        sys.exit("ffmpeg not found")
+    version = subprocess.run([ffmpeg, "-version"], capture_output=True, text=True).stdout.splitlines()
+    pool = TranscodePool(args.ffmpeg_location, workers=1)
+
+    workdir = tempfile.mkdtemp(prefix='playget-transcode-')
+    try:
+        clips = make_clips(ffmpeg, workdir, args.duration)
+        print(version[0] if version else ffmpeg)
+        print(f"{len(clips)} clips x {args.duration:g}s, {args.quality} kbps, best of {args.repeat}")
+        print(f"{'preset':<10} {'threads':>7} {'clip':<6} {'wall s':>7} {'cpu s':>7} {'x realtime':>10} {'KB':>8}")
+        for name in args.presets:
+            for threads in args.threads or [PRESETS[name].threads]:
+                preset = copy.copy(PRESETS[name])
+                preset.threads = threads
+                totals = [0.0, 0.0, 0]
+                for clip_name, clip in clips.items():
+                    runs = [run(pool, clip, workdir, preset, args.quality) for _ in range(args.repeat)]
+                    elapsed, cpu, size = min(runs)
+                    totals = [totals[0] + elapsed, totals[1] + cpu, totals[2] + size]
+                    print(f"{name:<10} {threads:>7} {clip_name:<6} {elapsed:>7.2f} {cpu:>7.2f} "
+                          f"{args.duration / elapsed:>10.1f} {size / 1024:>8.0f}")
+                audio = args.duration * len(clips)
+                print(f"{name:<10} {threads:>7} {'all':<6} {totals[0]:>7.2f} {totals[1]:>7.2f} "
+                      f"{audio / totals[0]:>10.1f} {totals[2] / 1024:>8.0f}")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+Benchmark: finding links in clipboard text with urls.find_urls
+
+Three kinds of input:
+  - list        a pasted list of links in every accepted form, one per line
+  - chat        megabytes of prose with a link every few kilobytes
+  - adversarial text built to make a naive scan quadratic: one huge token,
+                platform domains back to back with no delimiters, ...
+For each it prints throughput, and for chat/adversarial, how the time grows
+as the input doubles (about 2x each step means linear).
+
+    python benchmarks/bench_urls.py [links] [megabytes]
+"""
+
+import os
+import random
+import string
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from urls import find_urls
+
+FORMS = [
+    "https://www.youtube.com/watch?v={yt}",
+    "https://youtube.com/watch?v={yt}&t=42s",
+    "https://m.youtube.com/watch?feature=share&v={yt}",
+    "https://youtu.be/{yt}?si={word}",
+    "youtu.be/{yt}",
+    "https://www.youtube.com/shorts/{yt}",
+    "https://www.youtube.com/embed/{yt}",
+    "https://www.youtube.com/playlist?list=PL{yt}{yt}",
+    "https://www.facebook.com/{word}/videos/{num}/",
+    "https://www.facebook.com/reel/{num}",
+    "https://fb.watch/{word}/",
+]
+
+
+def make_link(rng):
+    chars = string.ascii_letters + string.digits + "_-"
+    return rng.choice(FORMS).format(
+        yt="".join(rng.choice(chars) for _ in range(11)),
+        word="".join(rng.choice(string.ascii_lowercase) for _ in range(8)),
+        num=rng.randint(10 ** 14, 10 ** 16))
+
+
+def link_list(n, rng):
+    return "\n".join(make_link(rng) for _ in range(n))
+
+
+def chat(size, rng):
+    words = ["the", "video", "youtube.com", "is", "great", "watch", "this", "later", "facebook", "link",
+             "lol", "https://example.com/page", "(see", "below)", "ok,", "thanks!"]
+    parts, length = [], 0
+    while length < size:
+        piece = make_link(rng) if rng.random() < 0.002 else rng.choice(words)
+        parts.append(piece)
+        length += len(piece) + 1
+    return " ".join(parts)
+
+
+ADVERSARIAL = {
+    "one token": lambda size: "a" * size,
+    "domains, no gaps": lambda size: "youtube.com/" * (size // 12),
+    "token + domain": lambda size: "x" * (size - 20) + "youtu.be/dQw4w9WgXcQ",
+    "watch?v=, no gaps": lambda size: "youtube.com/watch?" * (size // 18),
+}
+
+
+def timed(text):
+    start = time.perf_counter()
+    found = sum(1 for _ in find_urls(text))
+    return time.perf_counter() - start, found
+
+
+def scaling(name, make, megabytes):
+    sizes = [megabytes * (1 << 20) // 4 * 2 ** i for i in range(3)]
+    times = [timed(make(size))[0] for size in sizes]
+    steps = " ".join(f"{later / earlier:.1f}x" for earlier, later in zip(times, times[1:]))
+    mb = sizes[-1] / (1 << 20)
+    print(f"{name:<20}: {mb / times[-1]:8.1f} MB/s at {mb:.0f} MB, time per doubling: {steps}")
+
+
+def main():
+    links = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    megabytes = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    rng = random.Random(1)
+
+    pasted = link_list(links, rng)
+    timed(pasted)
+    elapsed, found = timed(pasted)
+    print(f"{'list':<20}: {links} links, {found} unique found in {elapsed * 1000:.2f} ms "
+          f"({found / elapsed:,.0f} links/s)")
+
+    scaling("chat", lambda size: chat(size, rng), megabytes)
+    for name, make in ADVERSARIAL.items():
+        scaling(name, make, megabytes)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Micro-benchmark: per-job YoutubeDL setup cost, fresh instance vs. YDLPool
+
+Runs entirely offline against a fake extractor, so it measures PlayGet's
+overhead (instance construction, extractor lookup, format selection) and
+not network time.
+
+    python benchmarks/bench_ydl_pool.py [jobs]
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import yt_dlp
+from yt_dlp.extractor.common import InfoExtractor
+
+from ydl_pool import YDLPool
+
+
+class FakeIE(InfoExtractor):
+    IE_NAME = 'fake'
+    _VALID_URL = r'fake://(?P<id>\w+)'
+
+    def _real_extract(self, url):
+        video_id = self._match_id(url)
+        return {
+            'id': video_id,
+            'title': f'Fake {video_id}',
+            'formats': [
+                {'format_id': 'a', 'url': f'http://127.0.0.1/{video_id}.m4a', 'ext': 'm4a',
+                 'acodec': 'mp4a.40.2', 'vcodec': 'none', 'abr': 128},
+                {'format_id': 'v', 'url': f'http://127.0.0.1/{video_id}.mp4', 'ext': 'mp4',
+                 'acodec': 'none', 'vcodec': 'avc1', 'height': 720},
+            ],
+        }
+
+
+OPTS = {
+    'format': 'bestaudio/best',
+    'outtmpl': 'bench/%(title)s.%(ext)s',
+    'quiet': True,
+    'no_warnings': True,
+    'simulate': True,
+}
+
+
+def make_ydl(params):
+    ydl = yt_dlp.YoutubeDL(params)
+    ydl.add_info_extractor(FakeIE())
+    return ydl
+
+
+def run_fresh(jobs):
+    start = time.perf_counter()
+    for i in range(jobs):
+        with make_ydl(dict(OPTS)) as ydl:
+            ydl.extract_info(f'fake://v{i}', ie_key=FakeIE.ie_key())
+    return time.perf_counter() - start
+
+
+def run_pooled(jobs):
+    pool = YDLPool(factory=make_ydl)
+    start = time.perf_counter()
+    for i in range(jobs):
+        with pool.lease(('audio', 'mp3', '192'), OPTS) as ydl:
+            ydl.extract_info(f'fake://v{i}', ie_key=FakeIE.ie_key())
+    elapsed = time.perf_counter() - start
+    pool.close()
+    return elapsed, pool.created
+
+
+def main():
+    jobs = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    # Warm up imports so neither side pays the one-off module load
+    run_fresh(2)
+
+    fresh = run_fresh(jobs)
+    pooled, created = run_pooled(jobs)
+
+    print(f"jobs: {jobs}")
+    print(f"fresh YoutubeDL per job : {fresh * 1000 / jobs:8.3f} ms/job  ({fresh:.3f}s total)")
+    print(f"{f'pooled ({created} instances)':<24}: {pooled * 1000 / jobs:8.3f} ms/job  ({pooled:.3f}s total)")
+    print(f"speed-up                : {fresh / pooled:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
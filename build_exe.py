@@ -2,7 +2,7 @@ import PyInstaller.__main__
 import os
 import sys
 
-def build():
+def build(onedir=False):
     print("Building PlayGet...")
     
     # Check for required files
@@ -17,7 +17,9 @@ def build():
     args = [
         'app_gui.py',
         '--name=PlayGet',
-        '--onefile',
+        # --onefile unpacks the whole bundle (Qt, yt-dlp, ffmpeg) to a temp folder on
+        # every launch; a one-folder build is unpacked once, at install, and starts faster
+        '--onedir' if onedir else '--onefile',
         '--windowed',
         '--clean',
         '--noconfirm',
@@ -33,7 +35,10 @@ def build():
 
     print(f"Running PyInstaller with args: {args}")
     PyInstaller.__main__.run(args)
-    print("Build complete! executable is in 'dist' folder.")
+    if onedir:
+        print("Build complete! Run PlayGet.exe from the 'dist/PlayGet' folder (ship the whole folder).")
+    else:
+        print("Build complete! executable is in 'dist' folder.")
 
 if __name__ == "__main__":
-    build()
+    build(onedir="--onedir" in sys.argv[1:])
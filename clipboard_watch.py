@@ -0,0 +1,199 @@
+"""
+PlayGet - Clipboard watchers for the headless script
+Waits for clipboard change notifications where the platform has them and
+falls back to polling where it doesn't. The GUI uses Qt's own dataChanged.
+"""
+
+import abc
+import os
+import shutil
+import subprocess
+import sys
+import threading
+
+
+class _Watcher(abc.ABC):
+    """Calls `callback(text)` whenever the clipboard text changes."""
+
+    mode = "none"
+
+    def __init__(self, read_text, callback):
+        self.read_text = read_text
+        self.callback = callback
+        self.last_text = read_text()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name=f"clipboard-{self.mode}", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def _changed(self):
+        # Notifications also fire for images, re-copies of the same text, etc.
+        try:
+            text = self.read_text()
+            if text != self.last_text:
+                self.last_text = text
+                self.callback(text)
+        except Exception as e:
+            # One bad read or link mustn't end the watcher thread
+            print(f"[!] Clipboard change not handled: {e}")
+
+    @abc.abstractmethod
+    def _run(self):
+        """Body of the watcher thread; returns once stop() has been called."""
+
+    def _poll(self, interval):
+        while not self._stop.wait(interval):
+            self._changed()
+
+
+class PollingWatcher(_Watcher):
+    """Fallback: reads the clipboard every `interval` seconds."""
+
+    mode = "polling"
+
+    def __init__(self, read_text, callback, interval=0.5):
+        super().__init__(read_text, callback)
+        self.interval = interval
+
+    def _run(self):
+        self._poll(self.interval)
+
+
+class CommandWatcher(_Watcher):
+    """
+    Uses a helper that blocks until the clipboard changes:
+    `wl-paste --watch` on Wayland (one line per change), `clipnotify` on X11
+    (exits on each change of the selection owner).
+    """
+
+    def __init__(self, read_text, callback, argv, mode, repeat):
+        super().__init__(read_text, callback)
+        self.argv = argv
+        self.mode = mode
+        self.repeat = repeat
+        self._proc = None
+        self._proc_lock = threading.Lock()  # stop() vs. _run() starting the next helper
+
+    def stop(self):
+        with self._proc_lock:
+            super().stop()
+            if self._proc is not None:
+                self._proc.terminate()
+
+    def _run(self):
+        while True:
+            with self._proc_lock:
+                if self._stop.is_set():
+                    break
+                proc = self._proc = subprocess.Popen(self.argv, stdout=subprocess.PIPE,
+                                                     stderr=subprocess.DEVNULL)
+            if self.repeat:
+                for _ in proc.stdout:
+                    self._changed()
+            proc.wait()
+            proc.stdout.close()
+            with self._proc_lock:
+                self._proc = None
+            if self._stop.is_set():
+                break
+            if self.repeat or proc.returncode != 0:
+                # The helper died (e.g. display went away); don't spin
+                self._stop.wait(1)
+            self._changed()
+
+
+class WindowsWatcher(_Watcher):
+    """AddClipboardFormatListener on a message-only window; WM_CLIPBOARDUPDATE per change."""
+
+    mode = "win32"
+
+    def _run(self):
+        import ctypes
+        from ctypes import wintypes
+
+        WM_CLIPBOARDUPDATE = 0x031D
+        WM_CLOSE = 0x0010
+        HWND_MESSAGE = wintypes.HWND(-3)
+        LRESULT = ctypes.c_ssize_t
+        WNDPROC = ctypes.WINFUNCTYPE(LRESULT, wintypes.HWND, wintypes.UINT, wintypes.WPARAM, wintypes.LPARAM)
+
+        class WNDCLASSW(ctypes.Structure):
+            _fields_ = [
+                ('style', wintypes.UINT), ('lpfnWndProc', WNDPROC),
+                ('cbClsExtra', ctypes.c_int), ('cbWndExtra', ctypes.c_int),
+                ('hInstance', wintypes.HINSTANCE), ('hIcon', wintypes.HICON),
+                ('hCursor', wintypes.HANDLE), ('hbrBackground', wintypes.HBRUSH),
+                ('lpszMenuName', wintypes.LPCWSTR), ('lpszClassName', wintypes.LPCWSTR),
+            ]
+
+        user32 = ctypes.WinDLL('user32', use_last_error=True)
+        kernel32 = ctypes.WinDLL('kernel32', use_last_error=True)
+        user32.DefWindowProcW.argtypes = [wintypes.HWND, wintypes.UINT, wintypes.WPARAM, wintypes.LPARAM]
+        user32.DefWindowProcW.restype = LRESULT
+        user32.CreateWindowExW.restype = wintypes.HWND
+        user32.CreateWindowExW.argtypes = [
+            wintypes.DWORD, wintypes.LPCWSTR, wintypes.LPCWSTR, wintypes.DWORD,
+            ctypes.c_int, ctypes.c_int, ctypes.c_int, ctypes.c_int,
+            wintypes.HWND, wintypes.HMENU, wintypes.HINSTANCE, wintypes.LPVOID,
+        ]
+        user32.AddClipboardFormatListener.argtypes = [wintypes.HWND]
+        user32.RemoveClipboardFormatListener.argtypes = [wintypes.HWND]
+        user32.PostMessageW.argtypes = [wintypes.HWND, wintypes.UINT, wintypes.WPARAM, wintypes.LPARAM]
+        user32.GetMessageW.argtypes = [ctypes.POINTER(wintypes.MSG), wintypes.HWND, wintypes.UINT, wintypes.UINT]
+        user32.DispatchMessageW.argtypes = [ctypes.POINTER(wintypes.MSG)]
+        kernel32.GetModuleHandleW.restype = wintypes.HMODULE
+
+        def wndproc(hwnd, msg, wparam, lparam):
+            if msg == WM_CLIPBOARDUPDATE:
+                self._changed()
+                return 0
+            return user32.DefWindowProcW(hwnd, msg, wparam, lparam)
+
+        self._wndproc = WNDPROC(wndproc)  # keep a reference for the window's lifetime
+        hinstance = kernel32.GetModuleHandleW(None)
+        wc = WNDCLASSW(lpfnWndProc=self._wndproc, hInstance=hinstance, lpszClassName="PlayGetClipboard")
+        user32.RegisterClassW(ctypes.byref(wc))
+        hwnd = user32.CreateWindowExW(0, wc.lpszClassName, "PlayGet", 0, 0, 0, 0, 0,
+                                      HWND_MESSAGE, None, hinstance, None)
+        if not hwnd or not user32.AddClipboardFormatListener(hwnd):
+            print(f"[!] Clipboard listener unavailable ({ctypes.WinError(ctypes.get_last_error())}), polling instead")
+            self.mode = "polling"
+            self._poll(0.5)
+            return
+        self._hwnd = hwnd
+        self._post_close = lambda: user32.PostMessageW(hwnd, WM_CLOSE, 0, 0)
+
+        msg = wintypes.MSG()
+        while not self._stop.is_set() and user32.GetMessageW(ctypes.byref(msg), None, 0, 0) > 0:
+            if msg.message == WM_CLOSE:
+                break
+            user32.DispatchMessageW(ctypes.byref(msg))
+        user32.RemoveClipboardFormatListener(hwnd)
+        user32.DestroyWindow(hwnd)
+
+    def stop(self):
+        super().stop()
+        post_close = getattr(self, '_post_close', None)
+        if post_close:
+            post_close()
+
+
+def create_watcher(read_text, callback, interval=0.5, prefer_events=True):
+    """Returns the best available watcher (not yet started); check `.mode` to see which."""
+    if prefer_events:
+        if sys.platform == 'win32':
+            return WindowsWatcher(read_text, callback)
+        if os.environ.get('WAYLAND_DISPLAY') and shutil.which('wl-paste'):
+            # wl-paste runs `echo` on every change, which gives us one line per event
+            return CommandWatcher(read_text, callback, ['wl-paste', '--watch', 'echo'],
+                                  mode="wayland", repeat=True)
+        if os.environ.get('DISPLAY') and shutil.which('clipnotify'):
+            return CommandWatcher(read_text, callback, ['clipnotify'],
+                                  mode="x11", repeat=False)
+    return PollingWatcher(read_text, callback, interval)
@@ -0,0 +1,311 @@
+"""
+PlayGet - Local control API
+A small HTTP/JSON server on localhost for submitting jobs and watching them,
+so scripts can drive the app without touching the UI
+"""
+
+import json
+import re
+import threading
+import time
+from collections import OrderedDict, deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+FINISHED_STATES = ("done", "failed", "cancelled")
+LOCAL_HOSTS = ("127.0.0.1", "localhost", "::1")
+
+
+class JobBoard:
+    """
+    Thread-safe state of every job the app has seen, plus a numbered event log.
+
+    Fed from DownloadSignals (connected directly, so updates land on whichever
+    thread emits) and from enqueue(). Finished jobs are kept up to
+    `keep_finished`, events up to `keep_events`; clients that fall further
+    behind than that get a `"gap": true` and should re-read /jobs.
+    """
+
+    def __init__(self, keep_finished=500, keep_events=5000):
+        self._cond = threading.Condition()
+        self._jobs = OrderedDict()   # job id -> entry dict, in queue order
+        self._objects = {}           # job id -> Job, while it can still be cancelled
+        self._finished = deque()
+        self.keep_finished = keep_finished
+        self._events = deque(maxlen=keep_events)
+        self._seq = 0
+
+    def add(self, job, state="queued"):
+        entry = {"id": job.id, "url": job.url, "type": job.dtype, "quality": job.quality,
+                 "state": state, "percent": 0, "error": None}
+        with self._cond:
+            self._jobs[job.id] = entry
+            self._objects[job.id] = job
+            self._publish(state, entry)
+
+    def update(self, job_id, state=None, **fields):
+        with self._cond:
+            entry = self._jobs.get(job_id)
+            if entry is None:
+                return
+            if state is not None:
+                entry["state"] = state
+            entry.update(fields)
+            self._publish(state or "progress", entry)
+            if entry["state"] in FINISHED_STATES:
+                self._objects.pop(job_id, None)
+                self._finished.append(job_id)
+                while len(self._finished) > self.keep_finished:
+                    self._jobs.pop(self._finished.popleft(), None)
+
+    def job(self, job_id):
+        """The Job object, if it hasn't finished yet."""
+        with self._cond:
+            return self._objects.get(job_id)
+
+    def entry(self, job_id):
+        with self._cond:
+            entry = self._jobs.get(job_id)
+            return dict(entry) if entry else None
+
+    def snapshot(self):
+        with self._cond:
+            jobs = [dict(e) for e in self._jobs.values()]
+            seq = self._seq
+        counts = {}
+        for e in jobs:
+            counts[e["state"]] = counts.get(e["state"], 0) + 1
+        return {"counts": counts, "jobs": jobs, "next": seq + 1}
+
+    def next_seq(self):
+        """Number the next event will get."""
+        with self._cond:
+            return self._seq + 1
+
+    def events_since(self, seq, timeout=0.0):
+        """
+        Events numbered `seq` and later, waiting up to `timeout` seconds for the
+        first one. Returns (events, next seq, gap).
+        """
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while self._seq < seq:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            gap = bool(self._events) and self._events[0]["seq"] > seq
+            events = [e for e in self._events if e["seq"] >= seq]
+            return events, self._seq + 1, gap
+
+    def _publish(self, kind, entry):
+        self._seq += 1
+        self._events.append({"seq": self._seq, "event": kind, "time": time.time(),
+                             "job": {k: entry[k] for k in ("id", "state", "percent", "error")}})
+        self._cond.notify_all()
+
+
+class ControlServer(ThreadingHTTPServer):
+    """
+    Routes:
+        GET    /jobs                     all known jobs and per-state counts
+        GET    /jobs/<id>                one job
+        POST   /jobs                     {"url", "type"?, "quality"?, "priority"?, "rate_limit"?},
+                                         a list of those, or {"jobs": [...]}
+        DELETE /jobs/<id>                cancel a queued, running or paused job
+        POST   /jobs/<id>/pause          pause it, keeping the partial download
+        POST   /jobs/<id>/resume         put a paused job back on the queue
+        GET    /events?since=N&wait=S    events from N on, long-polling up to S seconds
+        GET    /events/stream?since=N    the same as a text/event-stream
+        GET    /dead-letters             jobs that failed for good, with error and attempts
+
+    `enqueue(url, dtype, quality, priority, rate_limit)` returns a JSON-able dict (or raises ValueError for
+    bad input); `cancel(job_id)`, `pause(job_id)` and `resume(job_id)` return True if
+    the job was in a state that allows it. `dead_letters()` returns a JSON-able list.
+    Only binds to localhost, and refuses requests that carry an Origin header or a
+    Host other than localhost so web pages open in a browser can't reach it.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, board, enqueue, cancel, port=0, host="127.0.0.1", pause=None, resume=None,
+                 dead_letters=None):
+        self.board = board
+        self.enqueue = enqueue
+        self.cancel = cancel
+        self.pause = pause
+        self.resume = resume
+        self.dead_letters = dead_letters
+        super().__init__((host, port), _Handler)
+
+    def start(self):
+        threading.Thread(target=self.serve_forever, name="control-api", daemon=True).start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    MAX_BODY = 16 << 20
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        if not self._allowed():
+            return
+        url = urlsplit(self.path)
+        query = parse_qs(url.query)
+        board = self.server.board
+        if url.path == "/jobs":
+            return self._json(200, board.snapshot())
+        m = re.fullmatch(r"/jobs/(\d+)", url.path)
+        if m:
+            entry = board.entry(int(m.group(1)))
+            return self._json(200, entry) if entry else self._json(404, {"error": "no such job"})
+        if url.path == "/events":
+            since = _int(query, "since", 1)
+            wait = min(_float(query, "wait", 0.0), 60.0)
+            events, nxt, gap = board.events_since(since, wait)
+            return self._json(200, {"events": events, "next": nxt, "gap": gap})
+        if url.path == "/events/stream":
+            return self._stream(_int(query, "since", board.next_seq()))
+        if url.path == "/dead-letters" and self.server.dead_letters is not None:
+            return self._json(200, {"jobs": self.server.dead_letters()})
+        self._json(404, {"error": "not found"})
+
+    def do_POST(self):
+        if not self._allowed():
+            return
+        m = re.fullmatch(r"/jobs/(\d+)/(pause|resume)", urlsplit(self.path).path)
+        if m:
+            return self._control(int(m.group(1)), m.group(2))
+        if urlsplit(self.path).path != "/jobs":
+            return self._json(404, {"error": "not found"})
+        if not (self.headers.get("Content-Type") or "").startswith("application/json"):
+            return self._reject(415, "send application/json")
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+        except ValueError:
+            length = -1
+        if length < 0:
+            return self._reject(400, "bad Content-Length")
+        if length > self.MAX_BODY:
+            return self._reject(413, "body too large")
+        try:
+            body = json.loads(self.rfile.read(length) or b"null")
+        except ValueError:
+            return self._json(400, {"error": "invalid JSON"})
+        specs = body.get("jobs") if isinstance(body, dict) and "jobs" in body else body
+        single = isinstance(specs, dict)
+        specs = [specs] if single else specs
+        if not isinstance(specs, list):
+            return self._json(400, {"error": "expected a job object or a list of them"})
+
+        results = []
+        for spec in specs:
+            try:
+                if not isinstance(spec, dict) or not isinstance(spec.get("url"), str):
+                    raise ValueError("each job needs a url")
+                results.append(self.server.enqueue(spec["url"].strip(), spec.get("type", "video"),
+                                                   str(spec.get("quality", "best")),
+                                                   spec.get("priority", "normal"), spec.get("rate_limit")))
+            except ValueError as e:
+                results.append({"error": str(e), "url": spec.get("url") if isinstance(spec, dict) else None})
+        if single:
+            return self._json(400 if "error" in results[0] else 201, results[0])
+        self._json(200, {"results": results})
+
+    def do_DELETE(self):
+        if not self._allowed():
+            return
+        m = re.fullmatch(r"/jobs/(\d+)", urlsplit(self.path).path)
+        if not m:
+            return self._json(404, {"error": "not found"})
+        job_id = int(m.group(1))
+        if self.server.cancel(job_id):
+            return self._json(200, {"id": job_id, "cancelled": True})
+        entry = self.server.board.entry(job_id)
+        if entry is None:
+            return self._json(404, {"error": "no such job"})
+        self._json(409, {"id": job_id, "cancelled": False, "state": entry["state"]})
+
+    def _control(self, job_id, action):
+        handler = getattr(self.server, action)
+        if handler is None:
+            return self._json(404, {"error": "not found"})
+        if handler(job_id):
+            return self._json(200, {"id": job_id, action + "d": True})
+        entry = self.server.board.entry(job_id)
+        if entry is None:
+            return self._json(404, {"error": "no such job"})
+        self._json(409, {"id": job_id, action + "d": False, "state": entry["state"]})
+
+    def _allowed(self):
+        if self.headers.get("Origin"):
+            self._json(403, {"error": "browser requests are not allowed"})
+            return False
+        # A page on another name that resolves to 127.0.0.1 (DNS rebinding) still sends that name
+        host = self.headers.get("Host")
+        if host is not None and _host_name(host) not in LOCAL_HOSTS:
+            self._json(403, {"error": "requests must be addressed to localhost"})
+            return False
+        return True
+
+    def _stream(self, since):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+        try:
+            while True:
+                events, since, _ = self.server.board.events_since(since, timeout=15)
+                if not events:
+                    self.wfile.write(b": keep-alive\n\n")
+                for e in events:
+                    self.wfile.write(f"id: {e['seq']}\nevent: {e['event']}\ndata: {json.dumps(e)}\n\n".encode())
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def _reject(self, status, error):
+        # The body is left unread, so the connection can't carry another request
+        self.close_connection = True
+        self._json(status, {"error": error})
+
+    def _json(self, status, payload):
+        data = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        if self.close_connection:
+            self.send_header("Connection", "close")
+        self.end_headers()
+        self.wfile.write(data)
+
+
+def _host_name(value):
+    """The Host header without its port: "localhost:8765" -> "localhost", "[::1]:8765" -> "::1"."""
+    value = value.strip().lower()
+    if value.startswith("["):
+        return value[1:value.find("]")]
+    return value.rsplit(":", 1)[0]
+
+
+def _int(query, key, default):
+    try:
+        return int(query[key][0])
+    except (KeyError, ValueError):
+        return default
+
+
+def _float(query, key, default):
+    try:
+        return float(query[key][0])
+    except (KeyError, ValueError):
+        return default
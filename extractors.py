@@ -0,0 +1,61 @@
+"""
+PlayGet - Extractor registry
+Picks the yt-dlp extractor for a link from its platform, so extraction
+doesn't start with a suitable() scan over every extractor yt-dlp has
+"""
+
+import re
+import threading
+
+from jobs import host_key
+
+# Platform (as jobs.host_key names it) -> yt-dlp extractor names that handle its links
+PLATFORM_EXTRACTORS = {
+    "youtube.com": r"youtube(:.*)?",
+    "facebook.com": r"facebook(:.*)?",
+}
+
+
+class ExtractorRegistry:
+    """
+    For each platform, the extractor classes whose names match its pattern,
+    kept in yt-dlp's own priority order, so the first one whose suitable()
+    accepts a URL is the one yt-dlp's scan would have picked. Built on first
+    use; safe to share between threads.
+    """
+
+    def __init__(self, platforms=PLATFORM_EXTRACTORS):
+        self.platforms = platforms
+        self._lock = threading.Lock()
+        self._table = None   # platform -> [extractor class]
+
+    def ie_key(self, url, host=None):
+        """The ie_key for `url`, or None when it isn't a known platform's link (let yt-dlp scan)."""
+        candidates = self._classes().get(host or host_key(url))
+        for ie in candidates or ():
+            if ie.suitable(url):
+                return ie.ie_key()
+        return None
+
+    def _classes(self):
+        with self._lock:
+            if self._table is None:
+                from yt_dlp.extractor import gen_extractor_classes
+                classes = [ie for ie in gen_extractor_classes() if ie._ENABLED]
+                self._table = {}
+                for platform, pattern in self.platforms.items():
+                    names = re.compile(pattern)
+                    self._table[platform] = [ie for ie in classes if names.fullmatch(ie.IE_NAME.lower())]
+            return self._table
+
+
+registry = ExtractorRegistry()
+
+
+def extract_info(ydl, url, **kwargs):
+    """ydl.extract_info() with the extractor preselected from the link's platform when possible."""
+    key = registry.ie_key(url)
+    # yt-dlp only accepts an ie_key the instance has loaded (see allowed_extractors)
+    if key is not None and key in ydl._ies:
+        kwargs['ie_key'] = key
+    return ydl.extract_info(url, **kwargs)
@@ -0,0 +1,118 @@
+"""
+PlayGet - Download history
+Index of finished downloads so a link that was already fetched isn't fetched again
+"""
+
+import os
+import shutil
+import sqlite3
+import threading
+import time
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS downloads (
+    video_id TEXT NOT NULL,
+    dtype    TEXT NOT NULL,
+    quality  TEXT NOT NULL,
+    path     TEXT NOT NULL,
+    size     INTEGER NOT NULL,
+    finished REAL NOT NULL,
+    PRIMARY KEY (video_id, dtype, quality)
+);
+"""
+
+
+def output_path(info):
+    """Final file of a processed yt-dlp info dict, after merging and post-processing."""
+    downloads = (info or {}).get('requested_downloads') or []
+    for d in reversed(downloads):
+        if d.get('filepath'):
+            return d['filepath']
+    return None
+
+
+class HistoryEntry:
+    def __init__(self, path, size):
+        self.path = path
+        self.size = size
+
+
+class DownloadHistory:
+    """
+    Completed downloads keyed by (video ID, type, quality).
+
+    The whole index is held in a dict, so the check done before every enqueue
+    is a single lookup; SQLite only persists it between sessions.
+    """
+
+    def __init__(self, path):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(SCHEMA)
+        columns = [row[1] for row in self._db.execute("PRAGMA table_info(downloads)")]
+        if "sha256" in columns:
+            # Indexes written when every finished file was hashed; nothing read the digest
+            self._db.execute("ALTER TABLE downloads DROP COLUMN sha256")
+        self._index = {
+            (video_id, dtype, quality): HistoryEntry(path, size)
+            for video_id, dtype, quality, path, size
+            in self._db.execute("SELECT video_id, dtype, quality, path, size FROM downloads")
+        }
+
+    def __len__(self):
+        return len(self._index)
+
+    def lookup(self, video_id, dtype, quality):
+        """Returns the entry if the file is still on disk at its recorded size, else None."""
+        key = (video_id, dtype, quality)
+        with self._lock:
+            entry = self._index.get(key)
+        if entry is None:
+            return None
+        try:
+            if os.path.getsize(entry.path) == entry.size:
+                return entry
+        except OSError:
+            pass
+        # Moved or deleted since; forget it so the next request downloads again
+        self.forget(video_id, dtype, quality)
+        return None
+
+    def record(self, video_id, dtype, quality, path):
+        entry = HistoryEntry(path, os.path.getsize(path))
+        with self._lock:
+            self._index[(video_id, dtype, quality)] = entry
+            self._db.execute("INSERT OR REPLACE INTO downloads VALUES (?, ?, ?, ?, ?, ?)",
+                             (video_id, dtype, quality, path, entry.size, time.time()))
+        return entry
+
+    def forget(self, video_id, dtype, quality):
+        with self._lock:
+            self._index.pop((video_id, dtype, quality), None)
+            self._db.execute("DELETE FROM downloads WHERE video_id = ? AND dtype = ? AND quality = ?",
+                             (video_id, dtype, quality))
+
+    def materialize(self, entry, folder):
+        """
+        Makes the recorded file available in `folder`. A no-op when it's already
+        there; otherwise a hard link, or a copy across filesystems.
+        """
+        if os.path.normcase(os.path.abspath(os.path.dirname(entry.path))) == \
+                os.path.normcase(os.path.abspath(folder)):
+            return entry.path
+        target = os.path.join(folder, os.path.basename(entry.path))
+        if os.path.exists(target):
+            return target
+        os.makedirs(folder, exist_ok=True)
+        try:
+            os.link(entry.path, target)
+        except OSError:
+            shutil.copy2(entry.path, target)
+        return target
+
+    def close(self):
+        with self._lock:
+            self._db.close()
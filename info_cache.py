@@ -0,0 +1,138 @@
+"""
+PlayGet - Extraction cache
+On-disk cache of yt-dlp info dicts keyed by canonical video ID (and the
+extractor options), so a repeat request skips extract_info and goes straight
+to the media fetch
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+
+from extractors import extract_info
+from retry import http_status
+from urls import canonical_id
+
+EXPIRED_STATUSES = (403, 410)   # What a signed media URL past its lifetime answers
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS info (
+    key      TEXT PRIMARY KEY,
+    data     BLOB NOT NULL,
+    fetched  REAL NOT NULL,
+    accessed REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS info_accessed ON info (accessed);
+"""
+
+
+class InfoCache:
+    """
+    Extracted info dicts (titles, format lists) with a TTL and an LRU size cap.
+
+    The TTL should stay well under the lifetime of the signed media URLs in the
+    format list (a few hours on YouTube); anything older is re-extracted.
+    """
+
+    def __init__(self, path, ttl=30 * 60, max_entries=500):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(SCHEMA)
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            row = self._db.execute("SELECT data, fetched FROM info WHERE key = ?", (key,)).fetchone()
+            if row is None or now - row[1] > self.ttl:
+                if row is not None:
+                    self._db.execute("DELETE FROM info WHERE key = ?", (key,))
+                self.misses += 1
+                return None
+            self._db.execute("UPDATE info SET accessed = ? WHERE key = ?", (now, key))
+            self.hits += 1
+        return json.loads(zlib.decompress(row[0]))
+
+    def put(self, key, info):
+        now = time.time()
+        data = zlib.compress(json.dumps(info).encode('utf-8'))
+        with self._lock:
+            self._db.execute("INSERT OR REPLACE INTO info (key, data, fetched, accessed) VALUES (?, ?, ?, ?)",
+                             (key, data, now, now))
+            # Evict least recently used entries beyond the cap
+            self._db.execute("DELETE FROM info WHERE key IN "
+                             "(SELECT key FROM info ORDER BY accessed DESC LIMIT -1 OFFSET ?)",
+                             (self.max_entries,))
+
+    def discard(self, key):
+        with self._lock:
+            self._db.execute("DELETE FROM info WHERE key = ?", (key,))
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+def download(ydl, url, cache, download=True):
+    """
+    ydl.download([url]) with the extraction step served from `cache` when possible.
+    Playlists and other non-video results are never cached.
+    Returns the processed info dict; with download=False, formats are selected but not fetched.
+    """
+    from yt_dlp.utils import DownloadError
+
+    key = cache_key(ydl, url)
+    info = cache.get(key) if key else None
+    if info is not None:
+        try:
+            return ydl.process_ie_result(info, download=download)
+        except DownloadError as e:
+            # The cached media URLs expired early: extract again. Anything else
+            # is a real failure for the caller (and its retry policy) to handle.
+            if http_status(e) not in EXPIRED_STATUSES:
+                raise
+            cache.discard(key)
+
+    info = _extract(ydl, url, key, cache)
+    return ydl.process_ie_result(info, download=download)
+
+
+def prefetch(ydl, url, cache):
+    """
+    Runs only the extraction step for `url` and stores it, so a later download()
+    starts from the cache. Returns False if there was nothing to do.
+    """
+    key = cache_key(ydl, url)
+    if not key or cache.get(key) is not None:
+        return False
+    _extract(ydl, url, key, cache)
+    return True
+
+
+def cache_key(ydl, url):
+    """
+    Cache key for `url` as extracted by `ydl`, or None if it isn't a known video
+    link. Extractor options such as YouTube's player_client change the format
+    list, so instances with different ones don't share entries.
+    """
+    video_id = canonical_id(url)
+    if not video_id:
+        return None
+    args = ydl.params.get('extractor_args')
+    return f"{video_id} {json.dumps(args, sort_keys=True)}" if args else video_id
+
+
+def _extract(ydl, url, key, cache):
+    info = extract_info(ydl, url, download=False, process=False)
+    if key and info.get('_type', 'video') == 'video':
+        cache.put(key, ydl.sanitize_info(info, remove_private_keys=True))
+    return info
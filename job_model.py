@@ -0,0 +1,219 @@
+"""
+PlayGet - Job list model
+Qt model/delegate pair behind the queue view: one row per job with its state,
+bytes, speed and ETA, painted by a delegate so thousands of rows stay cheap
+"""
+
+from PyQt6.QtCore import QAbstractListModel, QModelIndex, QRectF, QSize, Qt, QTimer
+from PyQt6.QtGui import QColor, QFont, QPainter
+from PyQt6.QtWidgets import QStyle, QStyledItemDelegate
+
+from progress import Progress, format_bytes
+
+JobRole = Qt.ItemDataRole.UserRole + 1   # the JobRow itself, for the delegate
+
+FINISHED_STATES = ("done", "failed", "cancelled")
+STATE_COLORS = {
+    "queued": "rgba(255, 255, 255, 0.4)",
+    "running": "#ff3b5c",
+    "done": "#4ade80",
+    "failed": "#ef4444",
+    "cancelled": "#fbbf24",
+    "paused": "#60a5fa",
+    "retrying": "#fb923c",
+}
+
+
+class JobRow:
+    """What the view shows for one Job."""
+
+    __slots__ = ("job", "state", "progress", "error", "note")
+
+    def __init__(self, job, state="queued"):
+        self.job = job
+        self.state = state
+        self.progress = Progress()
+        self.error = None
+        self.note = None
+
+    def detail(self):
+        p = self.progress
+        if self.state in ("failed", "retrying"):
+            return self.error or self.state.capitalize()
+        if self.state == "done":
+            return self.note or (format_bytes(p.downloaded) if p.downloaded else "")
+        parts = []
+        if p.downloaded:
+            parts.append(f"{format_bytes(p.downloaded)} / {format_bytes(p.total)}" if p.total
+                         else format_bytes(p.downloaded))
+        if self.state == "running":
+            parts += [p.speed_str(), p.eta_str() and f"{p.eta_str()} left"]
+        return " · ".join(filter(None, parts))
+
+
+class JobListModel(QAbstractListModel):
+    """
+    Every job of the session in queue order. GUI thread only: feed it from
+    DownloadSignals. Jobs added in a burst (a playlist expanding, a resumed queue)
+    are inserted as one block on the next event loop pass, and finished rows
+    beyond `keep_finished` are dropped oldest first.
+    """
+
+    PRUNE_BATCH = 100
+
+    def __init__(self, keep_finished=1000, parent=None):
+        super().__init__(parent)
+        self.keep_finished = keep_finished
+        self._rows = []
+        self._index = {}      # job id -> row number
+        self._incoming = []
+        self._finished = 0
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._rows)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        row = self._rows[index.row()]
+        if role == JobRole:
+            return row
+        if role == Qt.ItemDataRole.DisplayRole:
+            return row.job.url
+        if role == Qt.ItemDataRole.ToolTipRole:
+            return f"#{row.job.id} {row.job.url}\n{row.job.dtype} {row.job.quality} · {row.state}" + (
+                f"\n{row.error}" if row.error else "")
+        return None
+
+    def add_job(self, job):
+        if not self._incoming:
+            QTimer.singleShot(0, self._flush)
+        self._incoming.append(JobRow(job))
+
+    def set_state(self, job_id, state, error=None):
+        row = self._row(job_id)
+        if row is None:
+            return
+        if state in FINISHED_STATES and row.state not in FINISHED_STATES:
+            self._finished += 1
+        row.state = state
+        if error is not None:
+            row.error = error
+        if state == "done":
+            row.progress.percent = 100.0
+        self._changed(job_id)
+        if self._finished > self.keep_finished + self.PRUNE_BATCH:
+            self._prune()
+
+    def set_progress(self, job_id, progress):
+        row = self._row(job_id)
+        if row is None:
+            return
+        row.progress = progress
+        self._changed(job_id)
+
+    def set_note(self, job_id, note):
+        row = self._row(job_id)
+        if row is not None:
+            row.note = note
+            self._changed(job_id)
+
+    def counts(self):
+        self._flush()
+        counts = {}
+        for row in self._rows:
+            counts[row.state] = counts.get(row.state, 0) + 1
+        return counts
+
+    def _row(self, job_id):
+        if job_id not in self._index:
+            self._flush()
+        number = self._index.get(job_id)
+        return None if number is None else self._rows[number]
+
+    def _changed(self, job_id):
+        index = self.index(self._index[job_id])
+        self.dataChanged.emit(index, index, [JobRole])
+
+    def _flush(self):
+        if not self._incoming:
+            return
+        first = len(self._rows)
+        self.beginInsertRows(QModelIndex(), first, first + len(self._incoming) - 1)
+        for number, row in enumerate(self._incoming, first):
+            self._rows.append(row)
+            self._index[row.job.id] = number
+        self._incoming = []
+        self.endInsertRows()
+
+    def _prune(self):
+        drop = self._finished - self.keep_finished
+        doomed = []
+        for number, row in enumerate(self._rows):
+            if len(doomed) == drop:
+                break
+            if row.state in FINISHED_STATES:
+                doomed.append(number)
+        # Remove contiguous runs, last first, so earlier row numbers stay valid
+        while doomed:
+            last = doomed.pop()
+            first = last
+            while doomed and doomed[-1] == first - 1:
+                first = doomed.pop()
+            self.beginRemoveRows(QModelIndex(), first, last)
+            del self._rows[first:last + 1]
+            self.endRemoveRows()
+        self._finished = self.keep_finished
+        self._index = {row.job.id: number for number, row in enumerate(self._rows)}
+
+
+class JobDelegate(QStyledItemDelegate):
+    """Paints a row: URL and state on top, a thin progress bar and bytes/speed/ETA below."""
+
+    ROW_HEIGHT = 46
+
+    def sizeHint(self, option, index):
+        return QSize(option.rect.width(), self.ROW_HEIGHT)
+
+    def paint(self, painter, option, index):
+        row = index.data(JobRole)
+        if row is None:
+            return
+        rect = option.rect.adjusted(10, 6, -10, -6)
+        painter.save()
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        if option.state & QStyle.StateFlag.State_Selected:
+            painter.fillRect(option.rect, QColor(255, 255, 255, 18))
+
+        font = QFont(option.font)
+        font.setPointSizeF(max(7.0, font.pointSizeF() - 1))
+        painter.setFont(font)
+        metrics = painter.fontMetrics()
+        state = row.state if row.state != "running" else f"{row.progress.percent:.0f}%"
+        state_width = metrics.horizontalAdvance(state)
+
+        painter.setPen(QColor(255, 255, 255, 220))
+        url = metrics.elidedText(row.job.url, Qt.TextElideMode.ElideMiddle, rect.width() - state_width - 12)
+        painter.drawText(rect.x(), rect.y() + metrics.ascent(), url)
+        painter.setPen(_qcolor(STATE_COLORS.get(row.state, "white")))
+        painter.drawText(rect.right() - state_width, rect.y() + metrics.ascent(), state)
+
+        bar = QRectF(rect.x(), rect.y() + metrics.height() + 3, rect.width(), 4)
+        painter.setPen(Qt.PenStyle.NoPen)
+        painter.setBrush(QColor(255, 255, 255, 20))
+        painter.drawRoundedRect(bar, 2, 2)
+        if row.progress.percent > 0:
+            painter.setBrush(_qcolor(STATE_COLORS.get(row.state, "#ff3b5c")))
+            painter.drawRoundedRect(QRectF(bar.x(), bar.y(), bar.width() * row.progress.percent / 100, 4), 2, 2)
+
+        painter.setPen(QColor(255, 255, 255, 110))
+        detail = metrics.elidedText(row.detail(), Qt.TextElideMode.ElideRight, rect.width())
+        painter.drawText(rect.x(), int(bar.bottom()) + 3 + metrics.ascent(), detail)
+        painter.restore()
+
+
+def _qcolor(css):
+    if css.startswith("rgba("):
+        r, g, b, a = (float(v) for v in css[5:-1].split(","))
+        return QColor(int(r), int(g), int(b), int(a * 255))
+    return QColor(css)
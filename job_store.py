@@ -0,0 +1,120 @@
+"""
+PlayGet - Durable job store
+SQLite journal behind the download queue so pending jobs survive a crash or restart
+"""
+
+import os
+import sqlite3
+import threading
+import time
+
+from jobs import Job
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id        INTEGER PRIMARY KEY,
+    url       TEXT NOT NULL,
+    dtype     TEXT NOT NULL,
+    quality   TEXT NOT NULL,
+    state     TEXT NOT NULL DEFAULT 'queued',
+    part_path TEXT,
+    error     TEXT,
+    attempts  INTEGER NOT NULL DEFAULT 0,
+    created   REAL NOT NULL,
+    updated   REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS jobs_state ON jobs (state);
+"""
+
+
+class JobStore:
+    """
+    One row per job, written incrementally: an INSERT on enqueue, an UPDATE on
+    each state change, a DELETE once the file is complete. WAL mode keeps each
+    write to an append to the log instead of a rewrite of the database.
+
+    Jobs left 'queued' or 'running' are replayed on the next start; 'paused' ones
+    wait for the user. Jobs that failed for good stay as 'failed' rows, with their
+    error and attempt count, as the dead-letter list. yt-dlp keeps the `.part` file of an interrupted download
+    and continues it when the same job runs again, so replayed and resumed jobs
+    pick up where they stopped instead of starting over.
+    """
+
+    def __init__(self, path):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(SCHEMA)
+        columns = [row[1] for row in self._db.execute("PRAGMA table_info(jobs)")]
+        if "attempts" not in columns:
+            # Journals written before retries were counted
+            self._db.execute("ALTER TABLE jobs ADD COLUMN attempts INTEGER NOT NULL DEFAULT 0")
+
+    def _execute(self, sql, params=()):
+        with self._lock:
+            return self._db.execute(sql, params).fetchall()
+
+    def add(self, job):
+        now = time.time()
+        self._execute(
+            "INSERT OR REPLACE INTO jobs (id, url, dtype, quality, state, created, updated) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (job.id, job.url, job.dtype, job.quality, job.state, now, now))
+
+    def mark(self, job, state, error=None):
+        job.state = state
+        if state == "done":
+            self._execute("DELETE FROM jobs WHERE id = ?", (job.id,))
+            return
+        self._execute("UPDATE jobs SET state = ?, error = ?, attempts = ?, updated = ? WHERE id = ?",
+                      (state, error, job.attempts, time.time(), job.id))
+
+    def set_part_path(self, job, path):
+        """Records where the job's partial download lives, once per new path."""
+        if path == job.part_path:
+            return
+        job.part_path = path
+        self._execute("UPDATE jobs SET part_path = ?, updated = ? WHERE id = ?",
+                      (path, time.time(), job.id))
+
+    def last_id(self):
+        row = self._execute("SELECT MAX(id) FROM jobs")
+        return row[0][0] or 0
+
+    def pending(self):
+        """Jobs that never finished, oldest first, ready to be put back on the queue."""
+        return self._jobs("queued", "running")
+
+    def paused(self):
+        """Jobs the user paused; they wait for a resume instead of going back on the queue."""
+        jobs = self._jobs("paused")
+        for job in jobs:
+            job.paused = True
+        return jobs
+
+    def _jobs(self, *states):
+        rows = self._execute(
+            "SELECT id, url, dtype, quality, part_path, attempts FROM jobs "
+            f"WHERE state IN ({', '.join('?' * len(states))}) ORDER BY id", states)
+        jobs = []
+        for job_id, url, dtype, quality, part_path, attempts in rows:
+            job = Job(url, dtype, quality, job_id=job_id)
+            job.part_path = part_path
+            job.attempts = attempts
+            jobs.append(job)
+        return jobs
+
+    def dead_letters(self, limit=100):
+        """Jobs that failed for good, newest first, as dicts for the control API."""
+        rows = self._execute(
+            "SELECT id, url, dtype, quality, error, attempts, updated FROM jobs "
+            "WHERE state = 'failed' ORDER BY updated DESC LIMIT ?", (limit,))
+        keys = ("id", "url", "dtype", "quality", "error", "attempts", "updated")
+        return [dict(zip(keys, row)) for row in rows]
+
+    def close(self):
+        with self._lock:
+            self._db.close()
@@ -0,0 +1,221 @@
+"""
+PlayGet - Download jobs
+Shared job primitives for the GUI (app_gui.py) and the clipboard script (app.py)
+"""
+
+import heapq
+import itertools
+import queue
+from urllib.parse import urlsplit
+
+from urls import canonical_id
+
+_job_ids = itertools.count(1)
+
+# Queue order and bandwidth share: lower runs first. A pasted link beats the
+# API and resumed jobs, which beat links picked up by Auto Mode.
+PRIORITY_HIGH, PRIORITY_NORMAL, PRIORITY_BULK = 0, 1, 2
+
+# Qualities a job can ask for, per type: audio kbps, video height
+QUALITIES = {
+    "audio": ("best", "320", "256", "192", "128"),
+    "video": ("best", "1080", "720", "480", "360"),
+}
+DEFAULT_QUALITY = {"audio": "192", "video": "best"}
+
+# Aliases that should share a per-host download slot
+HOST_ALIASES = {
+    "youtu.be": "youtube.com",
+    "youtube-nocookie.com": "youtube.com",
+    "fb.watch": "facebook.com",
+    "fb.com": "facebook.com",
+}
+
+
+class JobCancelled(Exception):
+    """Raised from a progress hook to abort the download of a cancelled job."""
+
+
+class JobPaused(Exception):
+    """Raised from a progress hook to stop a paused job; its partial download is kept for resuming."""
+
+
+def check_stop(job):
+    """Called from progress hooks: raises if the job was cancelled or paused since it started."""
+    if job.cancelled:
+        raise JobCancelled()
+    if job.paused:
+        raise JobPaused()
+
+
+def reserve_ids(last_id):
+    """Continues job numbering after `last_id`, e.g. after replaying a saved queue."""
+    global _job_ids
+    _job_ids = itertools.count(last_id + 1)
+
+
+def host_key(url):
+    """Returns the platform host a URL belongs to, used for per-host limits."""
+    text = url.strip()
+    if "://" not in text:
+        text = "https://" + text
+    host = (urlsplit(text).hostname or "").lower()
+    for prefix in ("www.", "m.", "music.", "web."):
+        if host.startswith(prefix):
+            host = host[len(prefix):]
+            break
+    return HOST_ALIASES.get(host, host)
+
+
+def check_quality(dtype, quality):
+    """
+    The quality as jobs use it ("192k" and "720p" are accepted too), or the
+    type's default for None. ValueError if the type doesn't offer it.
+    """
+    if quality is None:
+        return DEFAULT_QUALITY[dtype]
+    value = str(quality).lower()
+    unit = "p" if dtype == "video" else "k"
+    if value.endswith(unit):
+        value = value[:-1]
+    if value not in QUALITIES[dtype]:
+        raise ValueError(f"unknown {dtype} quality {quality!r} (one of {', '.join(QUALITIES[dtype])})")
+    return normalized_quality(dtype, value)
+
+
+def file_label(dtype, quality):
+    """
+    Suffix for a job's file name, so other qualities of the same video get files
+    of their own: "" for the top quality (video "best", audio 320), else " [720p]"/" [192k]".
+    """
+    quality = normalized_quality(dtype, quality)
+    if quality == ("best" if dtype == "video" else "320"):
+        return ""
+    return f" [{quality}{'p' if dtype == 'video' else 'k'}]"
+
+
+def normalized_quality(dtype, quality):
+    """Audio "best" and "320" produce the same file; treat them as one quality."""
+    if dtype == "audio" and quality == "best":
+        return "320"
+    return quality
+
+
+class Job:
+    """
+    A single queued download.
+    Unpacks like the old (url, dtype, quality) tuple so existing call sites keep working.
+    """
+
+    def __init__(self, url, dtype="video", quality="best", job_id=None, priority=PRIORITY_NORMAL, rate_limit=None):
+        self.id = job_id if job_id is not None else next(_job_ids)
+        self.set_url(url)
+        self.dtype = dtype
+        self.quality = quality
+        self.variant = (dtype, normalized_quality(dtype, quality))
+        self.state = "queued"
+        self.priority = priority
+        self.rate_limit = rate_limit  # bytes/s for this job alone, on top of the global limit
+        self.part_path = None
+        self.attempts = 0   # failed runs so far, counted by the retry policy
+        # Same video in other qualities, run by the same worker right after this one
+        self.variants = []
+        # Set from any thread; a waiting job is skipped, a running one aborts at its next progress update
+        self.cancelled = False
+        self.paused = False
+
+    def set_url(self, url):
+        """Points the job at `url`, with the host and coalescing key that go with it."""
+        self.url = url
+        self.host = host_key(url)
+        self.key = canonical_id(url) or url.strip()
+
+    def __iter__(self):
+        return iter((self.url, self.dtype, self.quality))
+
+    def __repr__(self):
+        return f"Job({self.id}, {self.url!r}, {self.dtype!r}, {self.quality!r})"
+
+
+class JobQueue(queue.Queue):
+    """
+    Unbounded queue of Jobs, by priority and then FIFO, that coalesces pending
+    work for the same video.
+
+    A job whose canonical ID is already waiting is either dropped (same type and
+    quality) or attached to the waiting job as a variant, so the worker extracts
+    the video once and the queue size counts unique videos.
+
+    Jobs are kept in one heap per host, so get_claimed() finds the next job for
+    a host with a free slot by looking only at each host's first job.
+    """
+
+    QUEUED, MERGED, DUPLICATE = "queued", "merged", "duplicate"
+
+    def _init(self, maxsize):
+        self._hosts = {}    # host -> heap of (priority, sequence, job)
+        self._size = 0
+        self._sequence = itertools.count()
+        self._pending = {}  # canonical key -> job waiting in the queue
+
+    def put(self, job, block=True, timeout=None):
+        """Returns QUEUED, MERGED or DUPLICATE."""
+        with self.not_full:
+            primary = self._pending.get(job.key)
+            if primary is not None:
+                if job.variant == primary.variant or any(v.variant == job.variant for v in primary.variants):
+                    return self.DUPLICATE
+                primary.variants.append(job)
+                return self.MERGED
+            self._pending[job.key] = job
+            self._put(job)
+            self.unfinished_tasks += 1
+            self.not_empty.notify()
+            return self.QUEUED
+
+    def _qsize(self):
+        return self._size
+
+    def _put(self, job):
+        heapq.heappush(self._hosts.setdefault(job.host, []), (job.priority, next(self._sequence), job))
+        self._size += 1
+
+    def _get(self):
+        return self._pop(min(self._hosts, key=lambda host: self._hosts[host][0]))
+
+    def _pop(self, host):
+        heap = self._hosts[host]
+        job = heapq.heappop(heap)[2]
+        if not heap:
+            del self._hosts[host]
+        self._size -= 1
+        if self._pending.get(job.key) is job:
+            del self._pending[job.key]
+        return job
+
+    def get_claimed(self, claim):
+        """
+        Like get(), but for the first job `claim(job)` accepts. `claim` is offered
+        the next job of each host in queue order, under the queue's lock, and
+        should decide by host: a host it turns down is skipped as a whole.
+        Blocks until a job is accepted; call wake() when `claim` may accept more.
+        """
+        with self.not_empty:
+            while True:
+                heads = sorted(heap[0] for heap in self._hosts.values())
+                job = next((entry[2] for entry in heads if claim(entry[2])), None)
+                if job is not None:
+                    break
+                self.not_empty.wait()
+            self.not_full.notify()
+            return self._pop(job.host)
+
+    def waiting(self, job):
+        """True if `job` itself is waiting in the queue (not merged into another)."""
+        with self.mutex:
+            return self._pending.get(job.key) is job
+
+    def wake(self):
+        """Wakes get_claimed() callers to offer the waiting jobs again."""
+        with self.not_empty:
+            self.not_empty.notify_all()
@@ -0,0 +1,47 @@
+"""
+PlayGet - Playlist and channel expansion
+Streams the entries of a playlist/channel as the extractor pages through it,
+so each video can be queued as its own job straight away
+"""
+
+from extractors import extract_info
+from urls import is_collection_url
+
+# Flat listing: entry URLs only, no per-video extraction; entries as they arrive
+EXPAND_OPTS = {
+    'extract_flat': 'in_playlist',
+    'lazy_playlist': True,
+    'noplaylist': False,
+    'quiet': True,
+    'no_warnings': True,
+}
+
+
+def _entry_url(entry):
+    return entry.get('webpage_url') or entry.get('url')
+
+
+def iter_entry_urls(ydl, url, max_depth=2):
+    """
+    Yields the video URLs of a playlist or channel, one page at a time.
+    Channel pages that list tabs (Videos, Shorts, ...) are walked up to `max_depth` deep.
+    """
+    info = extract_info(ydl, url, download=False, process=False)
+    if info is None:
+        return
+    if info.get('_type') not in ('playlist', 'multi_video'):
+        yield _entry_url(info) or url
+        return
+    for entry in info.get('entries') or []:
+        if not entry:
+            continue
+        entry_url = _entry_url(entry)
+        if not entry_url:
+            continue
+        nested = entry.get('_type') == 'playlist' or (
+            entry.get('ie_key') == 'YoutubeTab' and is_collection_url(entry_url))
+        if nested:
+            if max_depth > 0:
+                yield from iter_entry_urls(ydl, entry_url, max_depth - 1)
+            continue
+        yield entry_url
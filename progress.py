@@ -0,0 +1,123 @@
+"""
+PlayGet - Progress throttling
+Turns yt-dlp's progress callbacks into at most a few numeric updates per second
+per job, with speed and ETA, so worker threads don't flood the UI
+"""
+
+import threading
+import time
+
+UI_REFRESH_HZ = 10
+SPEED_SMOOTHING = 0.3   # Weight of the newest sample in the speed average
+
+
+class Progress:
+    """One job's progress as the UI sees it."""
+
+    __slots__ = ("downloaded", "total", "percent", "speed", "eta", "coalesced")
+
+    def __init__(self, downloaded=0, total=None, percent=0.0, speed=None, eta=None, coalesced=0):
+        self.downloaded = downloaded
+        self.total = total          # bytes, None while unknown
+        self.percent = percent      # 0.0 - 100.0
+        self.speed = speed          # bytes/s, None until there are two samples
+        self.eta = eta              # seconds
+        self.coalesced = coalesced  # callbacks merged into earlier or later updates, this job so far
+
+    def speed_str(self):
+        return f"{format_bytes(self.speed)}/s" if self.speed else ""
+
+    def eta_str(self):
+        if self.eta is None:
+            return ""
+        minutes, seconds = divmod(int(self.eta), 60)
+        hours, minutes = divmod(minutes, 60)
+        return f"{hours}:{minutes:02}:{seconds:02}" if hours else f"{minutes}:{seconds:02}"
+
+
+class _JobState:
+    __slots__ = ("emitted_at", "sample_at", "sample_bytes", "speed", "coalesced", "last")
+
+    def __init__(self):
+        self.emitted_at = 0.0
+        self.sample_at = None
+        self.sample_bytes = 0
+        self.speed = None
+        self.coalesced = 0
+        self.last = None
+
+
+class ProgressThrottle:
+    """
+    Feed it every progress dict with `update(job_id, d)`; it returns a Progress
+    when one is due and None when the callback was folded into the next update.
+
+    Updates go out at most `hz` times a second per job. A status change ('finished')
+    and the first callback of a job always go out. Percent comes from the byte
+    counts (total_bytes, else total_bytes_estimate, else the fragment count), and
+    speed is a moving average over the emitted samples. Safe to call from any thread.
+    """
+
+    def __init__(self, hz=UI_REFRESH_HZ, clock=time.monotonic):
+        self.interval = 1.0 / hz
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._jobs = {}
+        self.coalesced = 0   # Across all jobs, for the session
+
+    def update(self, job_id, d):
+        now = self.clock()
+        status = d.get('status')
+        with self._lock:
+            state = self._jobs.get(job_id)
+            if state is None:
+                state = self._jobs[job_id] = _JobState()
+            elif status == 'downloading' and now - state.emitted_at < self.interval:
+                state.coalesced += 1
+                self.coalesced += 1
+                return None
+            state.emitted_at = now
+            progress = self._measure(state, d, now)
+            state.last = progress
+            return progress
+
+    def last(self, job_id):
+        with self._lock:
+            state = self._jobs.get(job_id)
+            return state.last if state else None
+
+    def forget(self, job_id):
+        with self._lock:
+            self._jobs.pop(job_id, None)
+
+    def _measure(self, state, d, now):
+        downloaded = d.get('downloaded_bytes') or 0
+        total = d.get('total_bytes') or d.get('total_bytes_estimate')
+        if d.get('status') == 'finished':
+            total = total or downloaded
+            return Progress(downloaded, total, 100.0, state.speed, 0, state.coalesced)
+
+        if total:
+            percent = min(100.0, downloaded * 100.0 / total)
+        elif d.get('fragment_count'):
+            percent = min(100.0, (d.get('fragment_index') or 0) * 100.0 / d['fragment_count'])
+        else:
+            percent = 0.0
+
+        if state.sample_at is not None and now > state.sample_at and downloaded >= state.sample_bytes:
+            sample = (downloaded - state.sample_bytes) / (now - state.sample_at)
+            state.speed = sample if state.speed is None else (
+                SPEED_SMOOTHING * sample + (1 - SPEED_SMOOTHING) * state.speed)
+        state.sample_at, state.sample_bytes = now, downloaded
+
+        eta = None
+        if total and state.speed:
+            eta = max(0, total - downloaded) / state.speed
+        return Progress(downloaded, total, percent, state.speed, eta, state.coalesced)
+
+
+def format_bytes(n):
+    for unit in ("B", "KB", "MB", "GB"):
+        if n < 1024 or unit == "GB":
+            return f"{n:.0f} {unit}" if unit == "B" else f"{n:.1f} {unit}"
+        n /= 1024
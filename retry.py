@@ -0,0 +1,206 @@
+"""
+PlayGet - Retry policy
+Sorts download failures into transient, throttled and permanent, and brings
+retryable jobs back after an exponential, jittered, per-host backoff
+"""
+
+import heapq
+import itertools
+import random
+import re
+import threading
+import time
+from collections import defaultdict
+from email.utils import parsedate_to_datetime
+
+TRANSIENT, THROTTLED, PERMANENT = "transient", "throttled", "permanent"
+
+MAX_RETRY_AFTER = 3600   # Longest Retry-After we wait out; anything longer is treated as this
+
+# Wording yt-dlp and the sites use, for errors that arrive as plain messages
+PERMANENT_HINTS = re.compile(
+    r"unsupported url|no suitable extractor|private video|video unavailable|not available|has been removed|"
+    r"members-only|sign in to confirm your age|copyright|does not exist|no video formats|"
+    r"requested format is not available|http error 40[14]|http error 410", re.I)
+THROTTLED_HINTS = re.compile(r"http error 429|too many requests|rate.?limit", re.I)
+
+
+def _chain(error):
+    """The error and everything it wraps: yt-dlp's exc_info and cause, and __cause__/__context__."""
+    seen = set()
+    stack = [error]
+    while stack:
+        e = stack.pop()
+        if e is None or id(e) in seen or not isinstance(e, BaseException):
+            continue
+        seen.add(id(e))
+        yield e
+        exc_info = getattr(e, "exc_info", None)
+        if isinstance(exc_info, tuple) and len(exc_info) > 1:
+            stack.append(exc_info[1])
+        stack += [getattr(e, "cause", None), e.__cause__, e.__context__]
+
+
+def _status(e):
+    status = getattr(e, "status", None) or getattr(e, "code", None)
+    return status if isinstance(status, int) and 100 <= status < 600 else None
+
+
+def _headers(e):
+    response = getattr(e, "response", None)
+    return getattr(response, "headers", None) or getattr(e, "headers", None)
+
+
+def http_status(error):
+    """The first HTTP status code found in the error's chain, or None."""
+    return next((s for s in map(_status, _chain(error)) if s is not None), None)
+
+
+def retry_after(value, now=None):
+    """Seconds from a Retry-After header (delta seconds or an HTTP date), or None."""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return min(int(value), MAX_RETRY_AFTER)
+    try:
+        when = parsedate_to_datetime(value).timestamp()
+    except (TypeError, ValueError):
+        return None
+    return min(max(0.0, when - (time.time() if now is None else now)), MAX_RETRY_AFTER)
+
+
+def classify(error):
+    """
+    (kind, retry-after seconds or None) for an exception from a download.
+    HTTP status codes found anywhere in the chain decide first, then
+    yt-dlp's "expected" extractor errors, then network error types, then the
+    message text. Anything unrecognised is treated as transient.
+    """
+    from transcode import TranscodeError
+
+    chain = list(_chain(error))
+    for e in chain:
+        status = _status(e)
+        if status is None:
+            continue
+        headers = _headers(e)
+        wait = retry_after(headers.get("Retry-After")) if headers is not None else None
+        if status == 429 or (status == 503 and wait is not None):
+            return THROTTLED, wait
+        if status in (400, 401, 404, 410, 451):
+            return PERMANENT, None
+        return TRANSIENT, wait
+    for e in chain:
+        # ExtractorError.expected marks errors a retry can't fix (IncompleteRead's is a byte count)
+        if isinstance(e, TranscodeError) or getattr(e, "expected", None) is True:
+            return PERMANENT, None
+        if isinstance(e, (ConnectionError, TimeoutError)) or type(e).__name__ in (
+                "TransportError", "IncompleteRead", "ProxyError", "SSLError"):
+            return TRANSIENT, None
+    message = " ".join(str(e) for e in chain)
+    if THROTTLED_HINTS.search(message):
+        return THROTTLED, None
+    if PERMANENT_HINTS.search(message):
+        return PERMANENT, None
+    return TRANSIENT, None
+
+
+class RetryPolicy:
+    """
+    Decides whether a failed job runs again, and when.
+
+    The delay doubles with the job's attempts or with the host's run of failures,
+    whichever is longer, from `base_delay` (`throttle_delay` when the site is
+    rate limiting), up to `max_delay`, and is then jittered down by up to
+    `jitter` so retries from many jobs spread out. A Retry-After from the
+    server is a floor. Throttling also holds every other job for that host
+    until the delay is over (see host_wait).
+    """
+
+    def __init__(self, max_attempts=5, base_delay=5.0, throttle_delay=60.0, max_delay=900.0, jitter=0.5,
+                 clock=time.monotonic, rng=random.random):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.throttle_delay = throttle_delay
+        self.max_delay = max_delay
+        self.jitter = jitter
+        self.clock = clock
+        self.rng = rng
+        self._lock = threading.Lock()
+        self._streak = defaultdict(int)        # host -> failures since its last success
+        self._not_before = defaultdict(float)  # host -> clock time it's throttled until
+
+    def decide(self, job, error):
+        """Counts the attempt; returns (kind, seconds to wait) or (kind, None) to give up."""
+        kind, wait = classify(error)
+        job.attempts += 1
+        with self._lock:
+            self._streak[job.host] += 1
+            if kind == PERMANENT or job.attempts >= self.max_attempts:
+                return kind, None
+            exponent = max(job.attempts, self._streak[job.host]) - 1
+            base = self.throttle_delay if kind == THROTTLED else self.base_delay
+            delay = min(self.max_delay, base * 2 ** exponent)
+            delay *= 1 - self.jitter * self.rng()
+            if wait is not None:
+                delay = max(delay, wait)
+            if kind == THROTTLED:
+                until = self.clock() + delay
+                self._not_before[job.host] = max(self._not_before[job.host], until)
+            return kind, delay
+
+    def host_wait(self, host):
+        """Seconds before jobs for `host` should start, while it's throttling us."""
+        with self._lock:
+            return max(0.0, self._not_before.get(host, 0.0) - self.clock())
+
+    def succeeded(self, host):
+        with self._lock:
+            self._streak.pop(host, None)
+
+
+class RetryScheduler:
+    """
+    Holds jobs until their retry time, then hands them to `put` (the queue's
+    put) from its own thread.
+    """
+
+    def __init__(self, put):
+        self.put = put
+        self._cond = threading.Condition()
+        self._heap = []
+        self._sequence = itertools.count()
+        self._thread = None
+
+    def schedule(self, job, delay):
+        with self._cond:
+            heapq.heappush(self._heap, (time.monotonic() + delay, next(self._sequence), job))
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="playget-retry", daemon=True)
+                self._thread.start()
+            self._cond.notify_all()
+
+    def pending(self):
+        with self._cond:
+            return len(self._heap)
+
+    def join(self):
+        """Blocks until every scheduled job has been handed back to the queue."""
+        with self._cond:
+            while self._heap:
+                self._cond.wait()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._heap or self._heap[0][0] > time.monotonic():
+                    self._cond.wait(self._heap[0][0] - time.monotonic() if self._heap else None)
+                entry = self._heap[0]
+            # Put before removing, so join() doesn't return while the job is in neither place
+            self.put(entry[2])
+            with self._cond:
+                # An earlier retry may have been scheduled meanwhile, so it's not necessarily the top
+                self._heap.remove(entry)
+                heapq.heapify(self._heap)
+                self._cond.notify_all()
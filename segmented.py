@@ -0,0 +1,292 @@
+"""
+PlayGet - Segmented downloads
+Fetches a single progressive file over several parallel byte-range requests
+into a preallocated .part file, with per-segment retry and resume
+"""
+
+import json
+import os
+import queue
+import threading
+import time
+
+import yt_dlp
+from yt_dlp.downloader.common import FileDownloader
+from yt_dlp.downloader.http import HttpFD
+from yt_dlp.networking import Request
+from yt_dlp.utils import parse_http_range
+from yt_dlp.utils.networking import HTTPHeaderDict
+
+MIN_SEGMENT = 1 << 20       # Below this, extra connections cost more than they gain
+MAX_SEGMENT = 10 << 20      # YouTube throttles ranges much larger than ~10 MB
+BLOCK_SIZE = 64 << 10
+STATE_SAVE_INTERVAL = 2.0   # Seconds between writes of the resume sidecar
+
+
+def discard_segments(tmpfilename):
+    """
+    Cuts a segmented .part back to the bytes it has from the start, and drops
+    its sidecar, so a single-connection download can continue it. The .part is
+    preallocated to the full size: left as it is, yt-dlp's HttpFD would take
+    it for complete and ask for the range past its end.
+    """
+    state_path = tmpfilename + '.segments'
+    if not os.path.exists(state_path):
+        return
+    try:
+        with open(state_path) as f:
+            ranges = sorted((_Segment(*r) for r in json.load(f)['ranges']), key=lambda r: r.start)
+        prefix = 0
+        for r in ranges:
+            if r.start != prefix:
+                break
+            prefix += min(r.done, r.size)
+            if not r.complete:
+                break
+        with open(tmpfilename, 'r+b') as f:
+            f.truncate(prefix)
+    except FileNotFoundError:
+        pass
+    except (OSError, ValueError, KeyError, TypeError):
+        # No usable state: nothing in the .part can be trusted
+        if os.path.exists(tmpfilename):
+            os.remove(tmpfilename)
+    os.remove(state_path)
+
+
+class _Segment:
+    def __init__(self, start, end, done=0):
+        self.start = start
+        self.end = end      # inclusive
+        self.done = done
+
+    @property
+    def size(self):
+        return self.end - self.start + 1
+
+    @property
+    def complete(self):
+        return self.done >= self.size
+
+
+class SegmentedHttpFD(FileDownloader):
+    """
+    Splits the file into ranges of MIN_SEGMENT..MAX_SEGMENT bytes and has
+    `segments` connections pull ranges until all are done. Progress per range
+    is kept in `<file>.part.segments`, so an interrupted download continues
+    each range where it stopped. Servers without range support fall back to
+    yt-dlp's normal HTTP downloader, which continues from the part of the
+    file that is complete from the start.
+    """
+
+    FD_NAME = 'segmented'
+
+    def __init__(self, ydl, params, segments):
+        super().__init__(ydl, params)
+        self.segments = segments
+
+    def real_download(self, filename, info_dict):
+        url = info_dict['url']
+        headers = HTTPHeaderDict({'Accept-Encoding': 'identity'}, info_dict.get('http_headers'))
+        tmpfilename = self.temp_name(filename)
+        state_path = tmpfilename + '.segments'
+
+        total = self._probe_size(url, headers)
+        if not total or total < 2 * MIN_SEGMENT:
+            return self._fallback(filename, info_dict)
+
+        ranges = self._load_state(state_path, tmpfilename, total)
+        if ranges is None:
+            ranges = self._plan(total)
+            # Sidecar first: a full-size .part without one would pass for finished (see discard_segments)
+            self._save_state(state_path, total, ranges)
+            with open(tmpfilename, 'wb') as f:
+                f.truncate(total)  # preallocate; each segment writes at its own offset
+        elif any(r.done for r in ranges):
+            self.report_resuming_byte(sum(r.done for r in ranges))
+
+        self.report_destination(filename)
+        pending = queue.Queue()
+        for r in ranges:
+            if not r.complete:
+                pending.put(r)
+
+        errors = []
+        stop = threading.Event()
+        # Cleared while the progress hooks run, so a hook that sleeps (bandwidth
+        # limits) holds the connections too instead of only the reporting loop
+        flowing = threading.Event()
+        flowing.set()
+        workers = [
+            threading.Thread(target=self._worker,
+                             args=(url, headers, tmpfilename, pending, errors, stop, flowing),
+                             daemon=True)
+            for _ in range(min(self.segments, pending.qsize()))
+        ]
+        for w in workers:
+            w.start()
+
+        start_time = time.time()
+        resumed = sum(r.done for r in ranges)
+        last_save = start_time
+        try:
+            while any(w.is_alive() for w in workers):
+                time.sleep(0.25)
+                now = time.time()
+                downloaded = sum(r.done for r in ranges)
+                speed = self.calc_speed(start_time, now, downloaded - resumed)
+                flowing.clear()
+                try:
+                    self._hook_progress({
+                        'status': 'downloading',
+                        'downloaded_bytes': downloaded,
+                        'total_bytes': total,
+                        'tmpfilename': tmpfilename,
+                        'filename': filename,
+                        'eta': self.calc_eta(speed, total - downloaded),
+                        'speed': speed,
+                        'elapsed': now - start_time,
+                        'ctx_id': info_dict.get('ctx_id'),
+                    }, info_dict)
+                finally:
+                    flowing.set()
+                if now - last_save > STATE_SAVE_INTERVAL:
+                    self._save_state(state_path, total, ranges)
+                    last_save = now
+        except BaseException:
+            # A hook aborted the download (e.g. the job was cancelled): stop the
+            # connections and keep what they fetched for a later resume
+            stop.set()
+            for w in workers:
+                w.join()
+            self._save_state(state_path, total, ranges)
+            raise
+
+        if errors:
+            self._save_state(state_path, total, ranges)
+            self.report_error(f'segmented download failed: {errors[0]}')
+            return False
+
+        if os.path.exists(state_path):
+            os.remove(state_path)
+        self.try_rename(tmpfilename, filename)
+        self._hook_progress({
+            'downloaded_bytes': total,
+            'total_bytes': total,
+            'filename': filename,
+            'status': 'finished',
+            'elapsed': time.time() - start_time,
+            'ctx_id': info_dict.get('ctx_id'),
+        }, info_dict)
+        return True
+
+    def _fallback(self, filename, info_dict):
+        discard_segments(self.temp_name(filename))
+        fd = HttpFD(self.ydl, self.params)
+        for ph in self._progress_hooks:
+            fd.add_progress_hook(ph)
+        return fd.real_download(filename, info_dict)
+
+    def _probe_size(self, url, headers):
+        """Total size if the server honours byte ranges, else None."""
+        request = Request(url, headers=HTTPHeaderDict(headers, {'Range': 'bytes=0-0'}))
+        try:
+            response = self.ydl.urlopen(request)
+        except Exception as e:
+            self.write_debug(f'range probe failed: {e}')
+            return None
+        try:
+            if response.status != 206:
+                return None
+            _, _, total = parse_http_range(response.headers.get('Content-Range'))
+            return total
+        finally:
+            response.close()
+
+    def _plan(self, total):
+        size = min(MAX_SEGMENT, max(MIN_SEGMENT, -(-total // self.segments)))
+        return [_Segment(start, min(start + size, total) - 1) for start in range(0, total, size)]
+
+    def _load_state(self, state_path, tmpfilename, total):
+        if not self.params.get('continuedl', True):
+            return None
+        try:
+            with open(state_path) as f:
+                state = json.load(f)
+            if state['total'] != total or os.path.getsize(tmpfilename) != total:
+                return None
+            return [_Segment(*r) for r in state['ranges']]
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+
+    def _save_state(self, state_path, total, ranges):
+        tmp = state_path + '.tmp'
+        with open(tmp, 'w') as f:
+            json.dump({'total': total, 'ranges': [[r.start, r.end, r.done] for r in ranges]}, f)
+        os.replace(tmp, state_path)
+
+    def _worker(self, url, headers, tmpfilename, pending, errors, stop, flowing):
+        retries = self.params.get('retries', 10)
+        # Unbuffered, so bytes counted in the sidecar are already with the OS
+        with open(tmpfilename, 'r+b', buffering=0) as out:
+            while not stop.is_set():
+                try:
+                    segment = pending.get_nowait()
+                except queue.Empty:
+                    return
+                for attempt in range(retries + 1):
+                    try:
+                        self._fetch(url, headers, out, segment, stop, flowing)
+                        break
+                    except Exception as e:
+                        if stop.is_set():
+                            return
+                        if attempt == retries:
+                            errors.append(e)
+                            stop.set()
+                            return
+                        self.report_retry(e, attempt + 1, retries)
+                        time.sleep(min(2 ** attempt, 30))
+
+    def _fetch(self, url, headers, out, segment, stop, flowing):
+        start = segment.start + segment.done
+        request = Request(url, headers=HTTPHeaderDict(headers, {'Range': f'bytes={start}-{segment.end}'}))
+        response = self.ydl.urlopen(request)
+        try:
+            if response.status != 206:
+                raise OSError(f'server ignored range request (HTTP {response.status})')
+            out.seek(start)
+            while not segment.complete and not stop.is_set():
+                flowing.wait()
+                block = response.read(min(BLOCK_SIZE, segment.size - segment.done))
+                if not block:
+                    raise OSError(f'connection closed at byte {segment.start + segment.done}')
+                out.write(block)
+                segment.done += len(block)
+        finally:
+            response.close()
+
+
+class SegmentedYoutubeDL(yt_dlp.YoutubeDL):
+    """
+    YoutubeDL that downloads plain HTTP(S) formats with SegmentedHttpFD when the
+    'playget_segments' option is above 1. DASH/HLS formats use yt-dlp's own
+    concurrent fragment downloads (set 'concurrent_fragment_downloads' alongside).
+    """
+
+    def dl(self, name, info, subtitle=False, test=False):
+        segments = self.params.get('playget_segments') or 1
+        if (segments > 1 and not test and not subtitle and name != '-'
+                and info.get('url') and info.get('protocol') in ('http', 'https')
+                and not info.get('request_data') and not info.get('is_live')):
+            fd = SegmentedHttpFD(self, self.params, segments)
+            for ph in self._progress_hooks:
+                fd.add_progress_hook(ph)
+            new_info = self._copy_infodict(info)
+            if new_info.get('http_headers') is None:
+                new_info['http_headers'] = self._calc_headers(new_info)
+            return fd.download(name, new_info, subtitle)
+        if not test and name != '-':
+            # Left behind by an earlier run with more connections
+            discard_segments(HttpFD(self, self.params).temp_name(name))
+        return super().dl(name, info, subtitle, test)
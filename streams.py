@@ -0,0 +1,161 @@
+"""
+PlayGet - Parallel stream fetching
+Downloads the video and audio components of a merged format at the same time,
+and reports their progress as one byte-weighted total
+"""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from yt_dlp.utils import DownloadCancelled
+
+from segmented import SegmentedYoutubeDL
+
+
+class MergeProgress:
+    """
+    Progress hook that folds the per-stream callbacks of a merged download into
+    one stream of events: bytes and totals are summed over all components, and
+    'finished' is only passed on once every component has finished.
+    Once `stopped` is set, the next update of every component aborts its download.
+    """
+
+    def __init__(self, formats, hooks):
+        self.hooks = list(hooks)
+        self.stopped = threading.Event()
+        self._lock = threading.Lock()
+        # Start from the extractor's size hints so the first stream doesn't read as 100% of the total
+        self.totals = {f.get('format_id'): f.get('filesize') or f.get('filesize_approx') or 0 for f in formats}
+        self.done = dict.fromkeys(self.totals, 0)
+        self.finished = set()
+
+    def __call__(self, d):
+        format_id = (d.get('info_dict') or {}).get('format_id')
+        if self.stopped.is_set() and format_id in self.totals and d['status'] == 'downloading':
+            raise DownloadCancelled('another stream of this format failed')
+        if format_id not in self.totals:
+            for hook in self.hooks:
+                hook(d)
+            return
+
+        with self._lock:
+            if d['status'] == 'finished':
+                size = d.get('total_bytes') or d.get('downloaded_bytes') or self.done[format_id]
+                self.done[format_id] = self.totals[format_id] = size
+                self.finished.add(format_id)
+            elif d['status'] == 'downloading':
+                self.done[format_id] = d.get('downloaded_bytes') or 0
+                total = d.get('total_bytes') or d.get('total_bytes_estimate')
+                if total:
+                    self.totals[format_id] = total
+            downloaded = sum(self.done.values())
+            total = max(sum(self.totals.values()), downloaded)
+            all_finished = len(self.finished) == len(self.totals)
+
+        combined = dict(d)
+        if d['status'] in ('downloading', 'finished'):
+            percent = 100 * downloaded / total if total else 0
+            combined.update({
+                'status': 'finished' if all_finished else 'downloading',
+                'downloaded_bytes': downloaded,
+                'total_bytes': total,
+                '_percent': percent,
+                '_percent_str': f'{percent:5.1f}%',
+            })
+            combined.pop('total_bytes_estimate', None)
+        for hook in self.hooks:
+            hook(combined)
+
+
+class ParallelStreamsYoutubeDL(SegmentedYoutubeDL):
+    """
+    For formats like 'bestvideo+bestaudio', yt-dlp downloads each component in
+    turn and then merges. Here the first component's download starts all of
+    them in parallel; the following calls just collect their results, so the
+    merge starts as soon as the slowest stream is done.
+
+    Set 'playget_parallel_streams': False to keep yt-dlp's sequential order;
+    the combined progress reporting applies either way.
+    """
+
+    def process_info(self, info_dict):
+        formats = info_dict.get('requested_formats') or []
+        if len(formats) < 2:
+            return super().process_info(info_dict)
+
+        self._merge_parent = info_dict
+        self._merge_results = None
+        self._merge_executor = None
+        self._merge_error = None
+        self._merge_progress = MergeProgress(formats, self._progress_hooks)
+        saved_hooks = self._progress_hooks
+        self._progress_hooks = [self._merge_progress]
+        try:
+            return super().process_info(info_dict)
+        finally:
+            self._progress_hooks = saved_hooks
+            if self._merge_executor is not None:
+                self._merge_executor.shutdown(wait=False)
+            self._merge_parent = None
+            self._merge_results = None
+            self._merge_executor = None
+            self._merge_error = None
+            self._merge_progress = None
+
+    def dl(self, name, info, subtitle=False, test=False):
+        parent = getattr(self, '_merge_parent', None)
+        if (parent is None or subtitle or test or name == '-'
+                or not self.params.get('playget_parallel_streams', True)):
+            return super().dl(name, info, subtitle, test)
+
+        if self._merge_results is None:
+            jobs = self._component_jobs(parent, name, info)
+            if jobs is None:
+                return super().dl(name, info, subtitle, test)
+            self._merge_executor = ThreadPoolExecutor(max_workers=len(jobs), thread_name_prefix='playget-stream')
+            self._merge_results = {
+                fname: self._merge_executor.submit(self._component, fname, new_info)
+                for fname, new_info in jobs
+            }
+
+        future = self._merge_results.get(name)
+        if future is None:
+            return super().dl(name, info, subtitle, test)
+        try:
+            return future.result()
+        except BaseException as e:
+            # yt-dlp won't ask for the other streams now: stop them and let them
+            # close their files before the error goes up
+            self._merge_progress.stopped.set()
+            self._merge_executor.shutdown(wait=True)
+            error = self._merge_error or e
+            if error is e:
+                raise
+            raise error
+
+    def _component(self, name, info):
+        try:
+            return SegmentedYoutubeDL.dl(self, name, info)
+        except BaseException as e:
+            # The first failure is the one reported; the siblings it stops fail after it
+            if not self._merge_progress.stopped.is_set():
+                self._merge_error = e
+                self._merge_progress.stopped.set()
+            raise
+
+    def _component_jobs(self, parent, name, info):
+        """
+        (filename, info) for every component, named the way yt-dlp's merge loop
+        names them: '<stem>.f<format_id>.<ext>'. None if `name` doesn't fit that pattern.
+        """
+        suffix = f".f{info.get('format_id')}.{info.get('ext')}"
+        if not name.endswith(suffix):
+            return None
+        stem = name[:-len(suffix)]
+        jobs = []
+        for f in parent['requested_formats']:
+            new_info = dict(parent)
+            del new_info['requested_formats']
+            new_info.update(f)
+            jobs.append((f"{stem}.f{f['format_id']}.{new_info['ext']}", new_info))
+        return jobs
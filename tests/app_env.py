@@ -0,0 +1,47 @@
+"""
+app.py pointed at a scratch folder and a local range-serving server, for tests
+that drive its worker path end to end
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+
+import app
+from range_server import make_handler, serve, stop
+
+STORES = ("DOWNLOAD_FOLDER", "JOB_DB", "INFO_DB", "HISTORY_DB", "EXTRACTORS")
+
+
+class AppTestCase(unittest.TestCase):
+    """Serves `self.payload` at `self.url`; downloads land in app.DOWNLOAD_FOLDER under a temp dir."""
+
+    def setUp(self):
+        self.workdir = tempfile.mkdtemp(prefix='playget-test-')
+        self.payload = os.urandom(256 << 10)
+        self.server, base = serve(make_handler(self.payload, 64 << 20, 0))
+        self.url = f'{base}/clip.mp4'
+        self.saved = {name: getattr(app, name) for name in STORES}
+        app.DOWNLOAD_FOLDER = os.path.join(self.workdir, "Downloads")
+        app.JOB_DB = os.path.join(self.workdir, "queue.db")
+        app.INFO_DB = os.path.join(self.workdir, "info_cache.db")
+        app.HISTORY_DB = os.path.join(self.workdir, "history.db")
+        app.EXTRACTORS = None  # The local server is only known to the generic extractor
+        app.open_stores()
+
+    def tearDown(self):
+        app.job_store.close()
+        app.extract_cache.close()
+        app.history.close()
+        app.ydl_pool.close()
+        for name, value in self.saved.items():
+            setattr(app, name, value)
+        stop(self.server)
+        shutil.rmtree(self.workdir, ignore_errors=True)
+
+    def assertDownloaded(self, name):
+        path = os.path.join(app.DOWNLOAD_FOLDER, name)
+        self.assertTrue(os.path.exists(path), name)
+        with open(path, 'rb') as f:
+            self.assertEqual(f.read(), self.payload)
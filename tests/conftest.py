@@ -0,0 +1,6 @@
+import os
+import sys
+
+# Tests import the app's flat modules and the helpers next to them
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [ROOT, os.path.dirname(os.path.abspath(__file__))]
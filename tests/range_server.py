@@ -0,0 +1,70 @@
+"""
+Local HTTP server for tests and benchmarks: serves one payload with byte-range
+support, optionally throttled per connection and dropping responses mid-stream
+"""
+
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def make_handler(payload, per_conn_rate, drop_rate):
+    class RangeHandler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def log_message(self, *args):
+            pass
+
+        def do_GET(self):
+            start, end = 0, len(payload) - 1
+            m = re.match(r'bytes=(\d+)-(\d*)', self.headers.get('Range', ''))
+            if m:
+                start = int(m.group(1))
+                end = min(int(m.group(2)), end) if m.group(2) else end
+                self.send_response(206)
+                self.send_header('Content-Range', f'bytes {start}-{end}/{len(payload)}')
+            else:
+                self.send_response(200)
+            self.send_header('Accept-Ranges', 'bytes')
+            self.send_header('Content-Type', 'video/mp4')
+            self.send_header('Content-Length', str(end - start + 1))
+            self.end_headers()
+
+            drop_at = None
+            if end - start > 1 and random.random() < drop_rate:
+                drop_at = random.randint(start, end)
+            chunk = 64 << 10
+            began = time.perf_counter()
+            sent = 0
+            pos = start
+            while pos <= end:
+                if drop_at is not None and pos >= drop_at:
+                    self.close_connection = True
+                    return
+                block = payload[pos:min(pos + chunk, end + 1)]
+                try:
+                    self.wfile.write(block)
+                except (BrokenPipeError, ConnectionResetError):
+                    return
+                pos += len(block)
+                sent += len(block)
+                # Per-connection throttle
+                ahead = sent / per_conn_rate - (time.perf_counter() - began)
+                if ahead > 0:
+                    time.sleep(ahead)
+
+    return RangeHandler
+
+
+def serve(handler):
+    """Starts a ThreadingHTTPServer for `handler` on a free localhost port; returns (server, base URL)."""
+    server = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f'http://127.0.0.1:{server.server_address[1]}'
+
+
+def stop(server):
+    server.shutdown()
+    server.server_close()
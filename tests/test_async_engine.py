@@ -0,0 +1,45 @@
+"""
+AsyncEngine: short links resolved before a job takes a slot, and shutdown
+"""
+
+import threading
+import unittest
+
+from async_engine import AsyncEngine
+from jobs import Job, JobQueue
+
+VIDEO_PAGE = "https://www.facebook.com/somepage/videos/1234567890/"
+
+
+class FakeSession:
+    def __init__(self):
+        self.closed = threading.Event()
+
+    async def close(self):
+        self.closed.set()
+
+
+class EngineTest(unittest.TestCase):
+    def setUp(self):
+        self.queue = JobQueue()
+        self.seen = []
+        self.engine = AsyncEngine(self.queue, self.handler, workers=2, per_host=1, prefetch_workers=2)
+
+    def handler(self, job):
+        self.seen.append((job.url, job.host, job.key))
+
+    def test_resolved_links_get_their_host_and_key(self):
+        async def final_url(url):
+            return VIDEO_PAGE
+        self.engine._final_url = final_url
+        self.engine.start()
+        self.queue.put(Job("https://fb.watch/aBc_12-x/", "video", "best"))
+        self.queue.join()
+        self.assertEqual(self.seen, [(VIDEO_PAGE, "facebook.com", "facebook:1234567890")])
+
+    def test_stop_closes_the_session(self):
+        self.engine.start()
+        session = self.engine._session = FakeSession()
+        self.engine.stop()
+        self.assertTrue(session.closed.wait(5))
+        self.assertIsNone(self.engine._session)
@@ -0,0 +1,106 @@
+"""
+Bandwidth scheduler: token bucket pacing and priorities, time-of-day limits,
+and waits cut short by cancel or pause
+"""
+
+import threading
+import time
+import unittest
+
+from bandwidth import BandwidthScheduler, TokenBucket, parse_schedule
+from jobs import PRIORITY_BULK, PRIORITY_HIGH, Job, JobCancelled, JobPaused, check_stop
+
+
+class TokenBucketTest(unittest.TestCase):
+    def test_unlimited_never_waits(self):
+        bucket = TokenBucket(None)
+        start = time.monotonic()
+        self.assertTrue(bucket.take(1 << 30))
+        self.assertLess(time.monotonic() - start, 0.05)
+
+    def test_takes_are_paced_to_the_rate(self):
+        bucket = TokenBucket(10000, burst=1000)
+        start = time.monotonic()
+        # Bigger than the burst: waits for a full bucket, then pays off the rest
+        self.assertTrue(bucket.take(3000))
+        self.assertGreaterEqual(time.monotonic() - start, 0.28)
+        self.assertLess(time.monotonic() - start, 1.0)
+
+    def test_lower_priority_numbers_go_first(self):
+        bucket = TokenBucket(10000)
+        finished = []
+
+        def take(priority):
+            bucket.take(5000, priority)
+            finished.append(priority)
+
+        bulk = threading.Thread(target=take, args=(PRIORITY_BULK,))
+        bulk.start()
+        time.sleep(0.05)
+        high = threading.Thread(target=take, args=(PRIORITY_HIGH,))
+        high.start()
+        bulk.join(5)
+        high.join(5)
+        self.assertEqual(finished, [PRIORITY_HIGH, PRIORITY_BULK])
+
+    def test_rate_changes_apply_to_waiters(self):
+        bucket = TokenBucket(10)
+        done = threading.Event()
+        threading.Thread(target=lambda: (bucket.take(1000), done.set()), daemon=True).start()
+        time.sleep(0.05)
+        self.assertFalse(done.is_set())
+        bucket.rate = None
+        self.assertTrue(done.wait(1))
+
+
+class ScheduleTest(unittest.TestCase):
+    def scheduler(self, hour, minute=0):
+        now = time.struct_time((2026, 1, 1, hour, minute, 0, 0, 1, 0))
+        return BandwidthScheduler(limit=2000, schedule=[("22:00", "07:00", None), ("12:00", "13:30", 500)],
+                                  localtime=lambda: now)
+
+    def test_windows(self):
+        self.assertEqual(self.scheduler(23).rate_now(), None)
+        self.assertEqual(self.scheduler(3).rate_now(), None)
+        self.assertEqual(self.scheduler(7).rate_now(), 2000)
+        self.assertEqual(self.scheduler(13, 29).rate_now(), 500)
+        self.assertEqual(self.scheduler(13, 30).rate_now(), 2000)
+
+    def test_bad_times(self):
+        with self.assertRaises(ValueError):
+            parse_schedule([("24:00", "01:00", None)])
+
+
+class StopTest(unittest.TestCase):
+    def test_cancelled_take_returns_early(self):
+        bucket = TokenBucket(10)
+        stop = threading.Event()
+        threading.Timer(0.1, stop.set).start()
+        start = time.monotonic()
+        self.assertFalse(bucket.take(1000, cancelled=stop.is_set))
+        self.assertLess(time.monotonic() - start, 1.0)
+
+    def test_cancelled_while_paying_off_a_large_take(self):
+        bucket = TokenBucket(1000, burst=10)
+        stop = threading.Event()
+        threading.Timer(0.1, stop.set).start()
+        start = time.monotonic()
+        self.assertFalse(bucket.take(100000, cancelled=stop.is_set))
+        self.assertLess(time.monotonic() - start, 1.0)
+
+    def test_paused_job_stops_waiting_for_bandwidth(self):
+        scheduler = BandwidthScheduler(limit=10)
+        job = Job("https://youtu.be/dQw4w9WgXcQ", "video", "best", rate_limit=10)
+        scheduler.account(job, {'status': 'downloading', 'downloaded_bytes': 0})
+        threading.Timer(0.1, lambda: setattr(job, 'paused', True)).start()
+        start = time.monotonic()
+        scheduler.account(job, {'status': 'downloading', 'downloaded_bytes': 100000})
+        self.assertLess(time.monotonic() - start, 1.0)
+
+    def test_check_stop(self):
+        job = Job("https://youtu.be/dQw4w9WgXcQ", "video", "best")
+        check_stop(job)
+        job.paused = True
+        self.assertRaises(JobPaused, check_stop, job)
+        job.cancelled = True
+        self.assertRaises(JobCancelled, check_stop, job)
@@ -0,0 +1,23 @@
+"""
+Batch mode picks up the jobs an interrupted run left in the job store
+"""
+
+import os
+
+import app
+from app_env import AppTestCase
+from jobs import Job
+
+
+class ResumeTest(AppTestCase):
+    def test_jobs_left_queued_finish_in_the_next_batch(self):
+        app.job_store.add(Job(self.url, "video", "best"))
+        links = os.path.join(self.workdir, "links.txt")
+        open(links, "w").close()
+
+        summary = app.run_batch([links], "video", "best")
+
+        self.assertEqual(summary["counts"].get("resumed"), 1)
+        self.assertEqual(summary["counts"].get("done"), 1)
+        self.assertDownloaded("clip.mp4")
+        self.assertEqual(app.job_store.pending(), [])
@@ -0,0 +1,36 @@
+"""
+Clipboard watchers, driven by a stand-in helper command instead of a display
+"""
+
+import sys
+import threading
+import unittest
+
+from clipboard_watch import CommandWatcher, _Watcher
+
+# Like `wl-paste --watch echo`: one line per clipboard change
+HELPER = [sys.executable, '-c', 'import time\nwhile True:\n    print(flush=True)\n    time.sleep(0.02)']
+
+
+class WatcherTest(unittest.TestCase):
+    def test_watchers_must_say_how_they_watch(self):
+        with self.assertRaises(TypeError):
+            _Watcher(lambda: "", print)
+
+    def test_command_watcher_reports_changes_and_stops(self):
+        copies = iter(range(1000))
+        seen = []
+        changed = threading.Event()
+
+        def callback(text):
+            seen.append(text)
+            if len(seen) == 3:
+                changed.set()
+
+        watcher = CommandWatcher(lambda: str(next(copies)), callback, HELPER, mode="test", repeat=True).start()
+        self.assertTrue(changed.wait(10))
+        watcher.stop()
+        watcher._thread.join(10)
+        self.assertFalse(watcher._thread.is_alive())
+        self.assertEqual(seen[:3], ["1", "2", "3"])
+        self.assertIsNone(watcher._proc)
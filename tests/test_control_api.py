@@ -0,0 +1,98 @@
+"""
+Control API: the job board's event log, and how the HTTP server answers
+malformed requests
+"""
+
+import http.client
+import json
+import unittest
+
+from control_api import ControlServer, JobBoard
+from jobs import Job
+
+
+class JobBoardTest(unittest.TestCase):
+    def test_events_are_numbered_from_next_seq(self):
+        board = JobBoard()
+        self.assertEqual(board.next_seq(), 1)
+        job = Job("https://youtu.be/dQw4w9WgXcQ", "video", "best")
+        board.add(job)
+        board.update(job.id, "running")
+        board.update(job.id, percent=50)
+        self.assertEqual(board.next_seq(), 4)
+
+        events, nxt, gap = board.events_since(2)
+        self.assertEqual([e["event"] for e in events], ["running", "progress"])
+        self.assertEqual((nxt, gap), (4, False))
+        self.assertEqual(board.events_since(nxt), ([], 4, False))
+        self.assertEqual(board.snapshot()["next"], board.next_seq())
+
+    def test_clients_that_fall_behind_see_a_gap(self):
+        board = JobBoard(keep_events=2)
+        for _ in range(3):
+            board.add(Job("https://youtu.be/dQw4w9WgXcQ", "video", "best"))
+        events, nxt, gap = board.events_since(1)
+        self.assertEqual(([e["seq"] for e in events], nxt, gap), ([2, 3], 4, True))
+
+    def test_finished_jobs_are_dropped_past_the_limit(self):
+        board = JobBoard(keep_finished=1)
+        first, second = (Job(f"https://youtu.be/{c * 11}", "video", "best") for c in "ab")
+        for job in (first, second):
+            board.add(job)
+            board.update(job.id, "done")
+        self.assertIsNone(board.entry(first.id))
+        self.assertEqual(board.entry(second.id)["state"], "done")
+        self.assertIsNone(board.job(second.id))
+
+
+class ServerTest(unittest.TestCase):
+    def setUp(self):
+        self.board = JobBoard()
+        self.submitted = []
+        self.server = ControlServer(self.board, self.enqueue, lambda job_id: False).start()
+        self.conn = http.client.HTTPConnection("127.0.0.1", self.server.server_port, timeout=10)
+
+    def tearDown(self):
+        self.conn.close()
+        self.server.stop()
+
+    def enqueue(self, url, dtype, quality, priority, rate_limit):
+        self.submitted.append(url)
+        return {"url": url}
+
+    def post(self, body, headers):
+        self.conn.putrequest("POST", "/jobs")
+        for name, value in headers.items():
+            self.conn.putheader(name, value)
+        self.conn.endheaders(body)
+        response = self.conn.getresponse()
+        return response, json.loads(response.read())
+
+    def test_submit(self):
+        body = json.dumps({"url": " https://youtu.be/dQw4w9WgXcQ "}).encode()
+        response, payload = self.post(body, {"Content-Type": "application/json",
+                                             "Content-Length": str(len(body))})
+        self.assertEqual(response.status, 201)
+        self.assertEqual(self.submitted, ["https://youtu.be/dQw4w9WgXcQ"])
+        self.assertFalse(response.will_close)
+
+    def test_bad_lengths_are_rejected(self):
+        for length in ("-5", "lots"):
+            response, payload = self.post(b"{}", {"Content-Type": "application/json", "Content-Length": length})
+            self.assertEqual(response.status, 400, length)
+            self.assertTrue(response.will_close)
+            self.conn.close()
+        self.assertEqual(self.submitted, [])
+
+    def test_refused_bodies_close_the_connection(self):
+        response, _ = self.post(b"url=x", {"Content-Type": "text/plain", "Content-Length": "5"})
+        self.assertEqual(response.status, 415)
+        self.assertTrue(response.will_close)
+        self.conn.close()
+        response, _ = self.post(b"", {"Content-Type": "application/json", "Content-Length": str(64 << 20)})
+        self.assertEqual(response.status, 413)
+        self.assertTrue(response.will_close)
+
+    def test_browser_requests_are_refused(self):
+        self.conn.request("GET", "/jobs", headers={"Origin": "https://example.com"})
+        self.assertEqual(self.conn.getresponse().status, 403)
@@ -0,0 +1,65 @@
+"""
+Download history: lookups against the files on disk, and indexes written by
+older versions
+"""
+
+import os
+import shutil
+import sqlite3
+import tempfile
+import unittest
+
+from history import DownloadHistory
+
+OLD_SCHEMA = """
+CREATE TABLE downloads (
+    video_id TEXT NOT NULL,
+    dtype    TEXT NOT NULL,
+    quality  TEXT NOT NULL,
+    path     TEXT NOT NULL,
+    size     INTEGER NOT NULL,
+    sha256   TEXT NOT NULL,
+    finished REAL NOT NULL,
+    PRIMARY KEY (video_id, dtype, quality)
+);
+"""
+
+
+class HistoryTest(unittest.TestCase):
+    def setUp(self):
+        self.workdir = tempfile.mkdtemp(prefix='playget-test-')
+        self.db = os.path.join(self.workdir, "history.db")
+        self.path = os.path.join(self.workdir, "clip.mp3")
+        with open(self.path, "wb") as f:
+            f.write(b"x" * 100)
+
+    def tearDown(self):
+        shutil.rmtree(self.workdir, ignore_errors=True)
+
+    def test_lookup_checks_the_file_is_still_there(self):
+        history = DownloadHistory(self.db)
+        history.record("youtube:a", "audio", "192", self.path)
+        self.assertEqual(history.lookup("youtube:a", "audio", "192").size, 100)
+        self.assertIsNone(history.lookup("youtube:a", "audio", "128"))
+
+        with open(self.path, "ab") as f:
+            f.write(b"y")
+        self.assertIsNone(history.lookup("youtube:a", "audio", "192"))
+        self.assertEqual(len(history), 0)
+        history.close()
+
+    def test_old_index_keeps_its_entries(self):
+        db = sqlite3.connect(self.db)
+        db.executescript(OLD_SCHEMA)
+        db.execute("INSERT INTO downloads VALUES (?, ?, ?, ?, ?, ?, ?)",
+                   ("youtube:a", "audio", "192", self.path, 100, "0" * 64, 0.0))
+        db.commit()
+        db.close()
+
+        history = DownloadHistory(self.db)
+        self.assertIsNotNone(history.lookup("youtube:a", "audio", "192"))
+        history.record("youtube:b", "audio", "192", self.path)
+        history.close()
+        history = DownloadHistory(self.db)
+        self.assertEqual(len(history), 2)
+        history.close()
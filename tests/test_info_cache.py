@@ -0,0 +1,90 @@
+"""
+Extraction cache: what a failed download from cached info leads to, and how
+entries are keyed
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+from http.server import BaseHTTPRequestHandler
+
+import yt_dlp
+from yt_dlp.utils import DownloadError
+
+import info_cache
+from info_cache import InfoCache, cache_key
+from range_server import serve, stop
+from urls import canonical_id
+
+URL = "https://www.youtube.com/watch?v=aaaaaaaaaaa"
+PAYLOAD = b"x" * 4096
+
+
+class StatusHandler(BaseHTTPRequestHandler):
+    """/ok serves PAYLOAD; /<status> answers with that status."""
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        status = 200 if self.path == "/ok" else int(self.path.strip("/"))
+        body = PAYLOAD if status == 200 else b""
+        self.send_response(status)
+        self.send_header("Content-Type", "video/mp4")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class DownloadTest(unittest.TestCase):
+    def setUp(self):
+        self.workdir = tempfile.mkdtemp(prefix='playget-test-')
+        self.server, self.base = serve(StatusHandler)
+        self.cache = InfoCache(os.path.join(self.workdir, "info.db"))
+        self.ydl = yt_dlp.YoutubeDL({'outtmpl': os.path.join(self.workdir, '%(title)s.%(ext)s'),
+                                     'quiet': True, 'no_warnings': True, 'noprogress': True, 'retries': 0})
+        self.extracted = []
+        self.saved_extract = info_cache._extract
+        info_cache._extract = self.fake_extract
+
+    def tearDown(self):
+        info_cache._extract = self.saved_extract
+        self.ydl.close()
+        self.cache.close()
+        stop(self.server)
+        shutil.rmtree(self.workdir, ignore_errors=True)
+
+    def info(self, path):
+        return {'id': 'aaaaaaaaaaa', 'title': 'clip', 'url': self.base + path, 'ext': 'mp4',
+                'extractor': 'youtube', 'extractor_key': 'Youtube', 'webpage_url': URL}
+
+    def fake_extract(self, ydl, url, key, cache):
+        self.extracted.append(url)
+        return self.info("/ok")
+
+    def test_expired_urls_are_extracted_again(self):
+        self.cache.put(cache_key(self.ydl, URL), self.info("/403"))
+        info_cache.download(self.ydl, URL, self.cache)
+        self.assertEqual(self.extracted, [URL])
+        with open(os.path.join(self.workdir, "clip.mp4"), "rb") as f:
+            self.assertEqual(f.read(), PAYLOAD)
+
+    def test_other_failures_propagate(self):
+        key = cache_key(self.ydl, URL)
+        self.cache.put(key, self.info("/500"))
+        with self.assertRaises(DownloadError):
+            info_cache.download(self.ydl, URL, self.cache)
+        self.assertEqual(self.extracted, [])
+        self.assertIsNotNone(self.cache.get(key))
+
+
+class KeyTest(unittest.TestCase):
+    def test_extractor_args_are_part_of_the_key(self):
+        plain = yt_dlp.YoutubeDL({'quiet': True})
+        mobile = yt_dlp.YoutubeDL({'quiet': True,
+                                   'extractor_args': {'youtube': {'player_client': ['android', 'ios']}}})
+        self.assertEqual(cache_key(plain, URL), canonical_id(URL))
+        self.assertNotEqual(cache_key(mobile, URL), cache_key(plain, URL))
+        self.assertEqual(cache_key(mobile, "https://youtu.be/aaaaaaaaaaa"), cache_key(mobile, URL))
+        self.assertIsNone(cache_key(plain, "https://example.com/clip.mp4"))
@@ -0,0 +1,67 @@
+"""
+Queue view model: burst inserts, row updates and pruning of finished rows
+"""
+
+import unittest
+
+from PyQt6.QtCore import QCoreApplication
+
+from job_model import JobListModel, JobRole
+from jobs import Job
+from progress import Progress
+
+app = QCoreApplication.instance() or QCoreApplication([])
+
+
+def jobs(n):
+    return [Job(f"https://www.youtube.com/watch?v=a{i:010d}", "video", "best") for i in range(n)]
+
+
+class JobListModelTest(unittest.TestCase):
+    def setUp(self):
+        self.model = JobListModel(keep_finished=5)
+        self.inserts = []
+        self.model.rowsInserted.connect(lambda parent, first, last: self.inserts.append((first, last)))
+
+    def test_a_burst_is_inserted_as_one_block(self):
+        for job in jobs(50):
+            self.model.add_job(job)
+        self.assertEqual(self.model.rowCount(), 0)
+        app.processEvents()
+        self.assertEqual(self.inserts, [(0, 49)])
+        self.assertEqual(self.model.rowCount(), 50)
+
+    def test_updates_reach_the_row(self):
+        first, second = jobs(2)
+        self.model.add_job(first)
+        self.model.add_job(second)
+        changed = []
+        self.model.dataChanged.connect(lambda top, bottom, roles: changed.append(top.row()))
+
+        # Updates for rows not inserted yet flush the pending block first
+        self.model.set_state(second.id, "running")
+        self.model.set_progress(second.id, Progress(512 << 10, 1 << 20, 50.0, 256 << 10, 2))
+        self.assertEqual(changed, [1, 1])
+        row = self.model.index(1).data(JobRole)
+        self.assertEqual(row.state, "running")
+        self.assertEqual(row.detail(), "512.0 KB / 1.0 MB · 256.0 KB/s · 0:02 left")
+
+        self.model.set_state(second.id, "failed", "HTTP Error 404")
+        self.assertEqual(row.detail(), "HTTP Error 404")
+        self.assertEqual(self.model.counts(), {"queued": 1, "failed": 1})
+        self.model.set_state(12345, "done")  # unknown ids are ignored
+
+    def test_oldest_finished_rows_are_pruned(self):
+        batch = jobs(120)
+        for job in batch:
+            self.model.add_job(job)
+        for job in batch[:105]:
+            self.model.set_state(job.id, "done")
+        self.assertEqual(self.model.rowCount(), 120)
+        # The 106th is past keep_finished + PRUNE_BATCH: back down to the newest 5 finished
+        self.model.set_state(batch[105].id, "done")
+        self.assertEqual(self.model.rowCount(), 19)
+        remaining = [self.model.index(i).data(JobRole).job for i in range(self.model.rowCount())]
+        self.assertEqual(remaining, batch[101:])
+        self.model.set_progress(batch[119].id, Progress(100))
+        self.assertEqual(self.model.index(18).data(JobRole).progress.downloaded, 100)
@@ -0,0 +1,43 @@
+"""
+Job store: what a restart puts back on the queue, and what waits for a resume
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from job_store import JobStore
+from jobs import Job
+
+
+class JobStoreTest(unittest.TestCase):
+    def setUp(self):
+        self.workdir = tempfile.mkdtemp(prefix='playget-test-')
+        self.path = os.path.join(self.workdir, "queue.db")
+        self.store = JobStore(self.path)
+
+    def tearDown(self):
+        self.store.close()
+        shutil.rmtree(self.workdir, ignore_errors=True)
+
+    def reopen(self):
+        self.store.close()
+        self.store = JobStore(self.path)
+
+    def test_paused_jobs_wait_for_a_resume(self):
+        queued, running, paused, done = (Job(f"https://youtu.be/{c * 11}", "audio", "192") for c in "abcd")
+        for job in (queued, running, paused, done):
+            self.store.add(job)
+        self.store.mark(running, "running")
+        self.store.mark(paused, "paused")
+        self.store.set_part_path(paused, os.path.join(self.workdir, "clip.webm.part"))
+        self.store.mark(done, "done")
+        self.reopen()
+
+        self.assertEqual([job.id for job in self.store.pending()], [queued.id, running.id])
+        restored = self.store.paused()
+        self.assertEqual([job.id for job in restored], [paused.id])
+        self.assertTrue(restored[0].paused)
+        self.assertEqual(restored[0].part_path, os.path.join(self.workdir, "clip.webm.part"))
+        self.assertEqual(self.store.last_id(), paused.id)
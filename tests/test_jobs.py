@@ -0,0 +1,120 @@
+"""
+JobQueue: coalescing, priority and FIFO order, and claiming jobs by host
+"""
+
+import threading
+import time
+import unittest
+
+from jobs import PRIORITY_BULK, PRIORITY_HIGH, Job, JobQueue
+
+
+def yt(video_id):
+    return f"https://www.youtube.com/watch?v={video_id}"
+
+
+FB = "https://www.facebook.com/reel/{}"
+
+
+class CoalescingTest(unittest.TestCase):
+    def setUp(self):
+        self.queue = JobQueue()
+
+    def test_same_video_and_variant_is_a_duplicate(self):
+        self.assertEqual(self.queue.put(Job(yt("aaaaaaaaaaa"), "audio", "192")), JobQueue.QUEUED)
+        self.assertEqual(self.queue.put(Job("https://youtu.be/aaaaaaaaaaa", "audio", "192")), JobQueue.DUPLICATE)
+        self.assertEqual(self.queue.qsize(), 1)
+
+    def test_audio_best_and_320_are_one_variant(self):
+        self.queue.put(Job(yt("aaaaaaaaaaa"), "audio", "best"))
+        self.assertEqual(self.queue.put(Job(yt("aaaaaaaaaaa"), "audio", "320")), JobQueue.DUPLICATE)
+
+    def test_other_quality_is_merged_as_a_variant(self):
+        primary = Job(yt("aaaaaaaaaaa"), "video", "best")
+        variant = Job(yt("aaaaaaaaaaa"), "video", "720")
+        self.queue.put(primary)
+        self.assertEqual(self.queue.put(variant), JobQueue.MERGED)
+        self.assertEqual(primary.variants, [variant])
+        self.assertEqual(self.queue.put(Job(yt("aaaaaaaaaaa"), "video", "720")), JobQueue.DUPLICATE)
+        self.assertEqual(self.queue.qsize(), 1)
+
+    def test_taken_job_no_longer_coalesces(self):
+        job = Job(yt("aaaaaaaaaaa"))
+        self.queue.put(job)
+        self.assertTrue(self.queue.waiting(job))
+        self.assertIs(self.queue.get(), job)
+        self.assertFalse(self.queue.waiting(job))
+        self.assertEqual(self.queue.put(Job(yt("aaaaaaaaaaa"))), JobQueue.QUEUED)
+
+    def test_waiting_is_false_for_a_merged_variant(self):
+        self.queue.put(Job(yt("aaaaaaaaaaa"), "video", "best"))
+        variant = Job(yt("aaaaaaaaaaa"), "video", "720")
+        self.queue.put(variant)
+        self.assertFalse(self.queue.waiting(variant))
+
+
+class OrderTest(unittest.TestCase):
+    def test_priority_then_fifo_across_hosts(self):
+        queue = JobQueue()
+        jobs = [
+            Job(yt("aaaaaaaaaa1")),
+            Job(FB.format(1), priority=PRIORITY_BULK),
+            Job(FB.format(2)),
+            Job(yt("aaaaaaaaaa2"), priority=PRIORITY_HIGH),
+            Job(yt("aaaaaaaaaa3")),
+        ]
+        for job in jobs:
+            queue.put(job)
+        order = [queue.get() for _ in jobs]
+        self.assertEqual(order, [jobs[3], jobs[0], jobs[2], jobs[4], jobs[1]])
+        self.assertTrue(queue.empty())
+
+
+class ClaimTest(unittest.TestCase):
+    def setUp(self):
+        self.queue = JobQueue()
+        self.busy = set()
+
+    def claim(self, job):
+        return job.host not in self.busy
+
+    def test_skips_refused_hosts_and_keeps_their_jobs(self):
+        first, second = Job(yt("aaaaaaaaaa1"), priority=PRIORITY_HIGH), Job(yt("aaaaaaaaaa2"))
+        other = Job(FB.format(1), priority=PRIORITY_BULK)
+        for job in (first, second, other):
+            self.queue.put(job)
+        self.busy.add("youtube.com")
+        self.assertIs(self.queue.get_claimed(self.claim), other)
+        # Still waiting, so still coalescing and in priority order
+        self.assertEqual(self.queue.qsize(), 2)
+        self.assertEqual(self.queue.put(Job(yt("aaaaaaaaaa2"), "audio")), JobQueue.MERGED)
+        self.busy.clear()
+        self.assertIs(self.queue.get_claimed(self.claim), first)
+        self.assertIs(self.queue.get_claimed(self.claim), second)
+
+    def test_blocks_until_woken(self):
+        job = Job(yt("aaaaaaaaaa1"))
+        self.queue.put(job)
+        self.busy.add("youtube.com")
+        taken = []
+        worker = threading.Thread(target=lambda: taken.append(self.queue.get_claimed(self.claim)))
+        worker.start()
+        time.sleep(0.1)
+        self.assertEqual(taken, [])
+        self.busy.clear()
+        self.queue.wake()
+        worker.join(2)
+        self.assertEqual(taken, [job])
+
+    def test_offers_each_host_once(self):
+        for i in range(1000):
+            self.queue.put(Job(yt(f"a{i:010d}")))
+        self.queue.put(Job(FB.format(1)))
+        offered = []
+
+        def claim(job):
+            offered.append(job.host)
+            return job.host == "facebook.com"
+
+        self.queue.get_claimed(claim)
+        self.assertEqual(sorted(offered), ["facebook.com", "youtube.com"])
@@ -0,0 +1,80 @@
+"""
+Progress throttling: how often updates go out, and the numbers they carry
+"""
+
+import unittest
+
+from progress import Progress, ProgressThrottle, format_bytes
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+def downloading(done, total=1000, **fields):
+    return dict(status='downloading', downloaded_bytes=done, total_bytes=total, **fields)
+
+
+class ThrottleTest(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.throttle = ProgressThrottle(hz=10, clock=self.clock)
+
+    def test_updates_are_limited_per_job(self):
+        self.assertIsNotNone(self.throttle.update(1, downloading(0)))
+        self.clock.now += 0.05
+        self.assertIsNone(self.throttle.update(1, downloading(10)))
+        self.assertIsNone(self.throttle.update(1, downloading(20)))
+        # Another job has its own budget
+        self.assertIsNotNone(self.throttle.update(2, downloading(0)))
+        self.clock.now += 0.06
+        progress = self.throttle.update(1, downloading(30))
+        self.assertEqual((progress.downloaded, progress.coalesced), (30, 2))
+        self.assertEqual(self.throttle.coalesced, 2)
+
+    def test_finished_always_goes_out(self):
+        self.throttle.update(1, downloading(0))
+        progress = self.throttle.update(1, {'status': 'finished', 'downloaded_bytes': 1000})
+        self.assertEqual((progress.percent, progress.total, progress.eta), (100.0, 1000, 0))
+        self.assertIs(self.throttle.last(1), progress)
+
+    def test_speed_and_eta(self):
+        self.throttle.update(1, downloading(0))
+        self.clock.now += 1
+        progress = self.throttle.update(1, downloading(100))
+        self.assertEqual((progress.speed, progress.eta, progress.percent), (100, 9, 10.0))
+        self.clock.now += 1
+        progress = self.throttle.update(1, downloading(300))
+        # Moving average: 0.3 * 200 + 0.7 * 100
+        self.assertAlmostEqual(progress.speed, 130)
+        self.assertAlmostEqual(progress.eta, 700 / 130)
+
+    def test_percent_sources(self):
+        estimate = self.throttle.update(1, dict(status='downloading', downloaded_bytes=250, total_bytes_estimate=500))
+        self.assertEqual(estimate.percent, 50.0)
+        fragments = self.throttle.update(2, dict(status='downloading', downloaded_bytes=250,
+                                                 fragment_index=3, fragment_count=12))
+        self.assertEqual((fragments.percent, fragments.total), (25.0, None))
+        unknown = self.throttle.update(3, dict(status='downloading', downloaded_bytes=250))
+        self.assertEqual(unknown.percent, 0.0)
+
+    def test_forget(self):
+        self.throttle.update(1, downloading(0))
+        self.throttle.forget(1)
+        self.assertIsNone(self.throttle.last(1))
+        self.assertIsNotNone(self.throttle.update(1, downloading(10)))
+
+
+class FormatTest(unittest.TestCase):
+    def test_strings(self):
+        self.assertEqual(format_bytes(512), "512 B")
+        self.assertEqual(format_bytes(1536), "1.5 KB")
+        self.assertEqual(format_bytes(5 << 30), "5.0 GB")
+        self.assertEqual(Progress(speed=2 << 20).speed_str(), "2.0 MB/s")
+        self.assertEqual(Progress(eta=75).eta_str(), "1:15")
+        self.assertEqual(Progress(eta=3725).eta_str(), "1:02:05")
+        self.assertEqual(Progress().eta_str(), "")
@@ -0,0 +1,134 @@
+"""
+Retry policy: how failures are classified, and the backoff that follows
+"""
+
+import email.message
+import socket
+import unittest
+import urllib.error
+
+from yt_dlp.utils import DownloadError, ExtractorError
+
+from jobs import Job
+from retry import (PERMANENT, THROTTLED, TRANSIENT, RetryPolicy, RetryScheduler, classify, http_status,
+                   retry_after)
+
+
+def http_error(status, retry_after=None):
+    headers = email.message.Message()
+    if retry_after is not None:
+        headers["Retry-After"] = retry_after
+    return urllib.error.HTTPError("https://example.com/v.mp4", status, "error", headers, None)
+
+
+def wrapped(error):
+    """How yt-dlp reports it: a DownloadError carrying the original in exc_info."""
+    return DownloadError(f"ERROR: {error}", exc_info=(type(error), error, None))
+
+
+class ClassifyTest(unittest.TestCase):
+    def test_status_codes(self):
+        self.assertEqual(classify(wrapped(http_error(429, "30"))), (THROTTLED, 30))
+        self.assertEqual(classify(wrapped(http_error(429))), (THROTTLED, None))
+        self.assertEqual(classify(wrapped(http_error(503, "5"))), (THROTTLED, 5))
+        self.assertEqual(classify(wrapped(http_error(503))), (TRANSIENT, None))
+        self.assertEqual(classify(wrapped(http_error(500))), (TRANSIENT, None))
+        for status in (400, 401, 404, 410, 451):
+            self.assertEqual(classify(wrapped(http_error(status))), (PERMANENT, None), status)
+        self.assertEqual(http_status(wrapped(http_error(403))), 403)
+        self.assertIsNone(http_status(DownloadError("ERROR: nope")))
+
+    def test_errors_without_a_status(self):
+        self.assertEqual(classify(wrapped(ExtractorError("Private video", expected=True))), (PERMANENT, None))
+        self.assertEqual(classify(wrapped(socket.timeout("timed out"))), (TRANSIENT, None))
+        self.assertEqual(classify(wrapped(ConnectionResetError())), (TRANSIENT, None))
+        try:
+            try:
+                raise ConnectionError("reset")
+            except ConnectionError:
+                raise RuntimeError("download failed")
+        except RuntimeError as e:
+            self.assertEqual(classify(e), (TRANSIENT, None))
+
+    def test_messages(self):
+        self.assertEqual(classify(DownloadError("ERROR: HTTP Error 429: Too Many Requests")), (THROTTLED, None))
+        self.assertEqual(classify(DownloadError("ERROR: Video unavailable")), (PERMANENT, None))
+        self.assertEqual(classify(DownloadError("ERROR: something odd")), (TRANSIENT, None))
+
+    def test_retry_after(self):
+        self.assertEqual(retry_after("120"), 120)
+        self.assertEqual(retry_after("999999"), 3600)
+        self.assertEqual(retry_after("Thu, 01 Jan 1970 00:01:40 GMT", now=40), 60)
+        self.assertEqual(retry_after("Thu, 01 Jan 1970 00:01:40 GMT", now=500), 0)
+        self.assertIsNone(retry_after("soon"))
+        self.assertIsNone(retry_after(None))
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class PolicyTest(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.policy = RetryPolicy(max_attempts=4, base_delay=5, throttle_delay=60, max_delay=100, jitter=0.5,
+                                  clock=self.clock, rng=lambda: 0.0)
+
+    def job(self, url="https://www.youtube.com/watch?v=dQw4w9WgXcQ"):
+        return Job(url, "video", "best")
+
+    def test_backoff_doubles_up_to_the_cap_then_gives_up(self):
+        job = self.job()
+        delays = [self.policy.decide(job, wrapped(http_error(500))) for _ in range(4)]
+        self.assertEqual(delays, [(TRANSIENT, 5), (TRANSIENT, 10), (TRANSIENT, 20), (TRANSIENT, None)])
+        self.assertEqual(job.attempts, 4)
+
+    def test_permanent_errors_are_not_retried(self):
+        job = self.job()
+        self.assertEqual(self.policy.decide(job, wrapped(http_error(404))), (PERMANENT, None))
+        self.assertEqual(job.attempts, 1)
+
+    def test_jitter_only_shortens_the_delay(self):
+        self.policy.rng = lambda: 1.0
+        self.assertEqual(self.policy.decide(self.job(), wrapped(http_error(500))), (TRANSIENT, 2.5))
+        self.policy.rng = lambda: 1.0
+        # Retry-After is a floor, jitter or not
+        self.assertEqual(self.policy.decide(self.job("https://youtu.be/aaaaaaaaaaa"),
+                                            wrapped(http_error(500, "50"))), (TRANSIENT, 50))
+
+    def test_host_failures_lengthen_other_jobs_backoff(self):
+        for _ in range(3):
+            self.policy.decide(self.job(), wrapped(http_error(500)))
+        # First failure for this job, but the host's fourth in a row
+        self.assertEqual(self.policy.decide(self.job(), wrapped(http_error(500))), (TRANSIENT, 40))
+        self.policy.succeeded("youtube.com")
+        self.assertEqual(self.policy.decide(self.job(), wrapped(http_error(500))), (TRANSIENT, 5))
+
+    def test_throttling_holds_the_host(self):
+        self.assertEqual(self.policy.decide(self.job(), wrapped(http_error(429))), (THROTTLED, 60))
+        self.assertEqual(self.policy.host_wait("youtube.com"), 60)
+        self.assertEqual(self.policy.host_wait("facebook.com"), 0)
+        self.clock.now += 45
+        self.assertEqual(self.policy.host_wait("youtube.com"), 15)
+        self.clock.now += 30
+        self.assertEqual(self.policy.host_wait("youtube.com"), 0)
+
+
+class SchedulerTest(unittest.TestCase):
+    def test_jobs_come_back_in_due_order(self):
+        returned = []
+        scheduler = RetryScheduler(returned.append)
+        late, early = self.job("late"), self.job("early")
+        scheduler.schedule(late, 0.2)
+        scheduler.schedule(early, 0.05)
+        self.assertEqual(scheduler.pending(), 2)
+        scheduler.join()
+        self.assertEqual(returned, [early, late])
+        self.assertEqual(scheduler.pending(), 0)
+
+    def job(self, name):
+        return Job(f"https://example.com/{name}.mp4", "video", "best")
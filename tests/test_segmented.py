@@ -0,0 +1,78 @@
+"""
+Segmented downloads: an interrupted multi-connection download continued
+over a single connection, against a local range-serving server
+"""
+
+import hashlib
+import os
+import shutil
+import tempfile
+import unittest
+
+from range_server import make_handler, serve, stop
+from segmented import MIN_SEGMENT, SegmentedYoutubeDL, discard_segments
+
+
+class Pause(Exception):
+    pass
+
+
+class SegmentedResumeTest(unittest.TestCase):
+    def setUp(self):
+        self.payload = os.urandom(6 * MIN_SEGMENT)
+        self.server, base = serve(make_handler(self.payload, 2 << 20, 0))
+        self.url = f'{base}/clip.mp4'
+        self.workdir = tempfile.mkdtemp(prefix='playget-test-')
+        self.target = os.path.join(self.workdir, 'clip.mp4')
+
+    def tearDown(self):
+        stop(self.server)
+        shutil.rmtree(self.workdir, ignore_errors=True)
+
+    def download(self, segments, hook=None):
+        opts = {
+            'outtmpl': os.path.join(self.workdir, 'clip.%(ext)s'),
+            'quiet': True,
+            'no_warnings': True,
+            'playget_segments': segments,
+            'progress_hooks': [hook] if hook else [],
+        }
+        with SegmentedYoutubeDL(opts) as ydl:
+            ydl.download([self.url])
+
+    def pause_segmented(self):
+        def pause_midway(d):
+            if d['status'] == 'downloading' and d['downloaded_bytes'] >= len(self.payload) // 3:
+                raise Pause()
+
+        with self.assertRaises(Exception):
+            self.download(4, pause_midway)
+        part = self.target + '.part'
+        self.assertEqual(os.path.getsize(part), len(self.payload))  # preallocated
+        self.assertTrue(os.path.exists(part + '.segments'))
+        return part
+
+    def assert_complete(self):
+        with open(self.target, 'rb') as f:
+            self.assertEqual(hashlib.sha256(f.read()).digest(), hashlib.sha256(self.payload).digest())
+        self.assertFalse(os.path.exists(self.target + '.part'))
+        self.assertFalse(os.path.exists(self.target + '.part.segments'))
+
+    def test_resume_with_one_connection(self):
+        self.pause_segmented()
+        self.download(1)
+        self.assert_complete()
+
+    def test_resume_with_more_connections(self):
+        self.pause_segmented()
+        self.download(4)
+        self.assert_complete()
+
+    def test_discard_keeps_contiguous_prefix(self):
+        part = self.pause_segmented()
+        discard_segments(part)
+        size = os.path.getsize(part)
+        self.assertLess(size, len(self.payload))
+        with open(part, 'rb') as f:
+            self.assertEqual(f.read(), self.payload[:size])
+        self.assertFalse(os.path.exists(part + '.segments'))
@@ -0,0 +1,67 @@
+"""
+Transcode stage bookkeeping, with a stand-in ffmpeg that copies its input
+after a short delay (the real encoders aren't needed for this)
+"""
+
+import os
+import shutil
+import stat
+import sys
+import tempfile
+import threading
+import unittest
+
+from transcode import TranscodePool, copy_target
+
+FAKE_FFMPEG = f"""#!{sys.executable}
+import shutil, sys, time
+args = sys.argv[1:]
+time.sleep(0.3)
+shutil.copyfile(args[args.index("-i") + 1], args[-1])
+sys.stderr.write("bench: utime=0.010s stime=0.000s rtime=0.300s\\n")
+"""
+
+
+@unittest.skipIf(sys.platform == "win32", "the stand-in ffmpeg is a script")
+class SharedSourceTest(unittest.TestCase):
+    def setUp(self):
+        self.workdir = tempfile.mkdtemp(prefix='playget-test-')
+        ffmpeg = os.path.join(self.workdir, "ffmpeg")
+        with open(ffmpeg, "w") as f:
+            f.write(FAKE_FFMPEG)
+        os.chmod(ffmpeg, os.stat(ffmpeg).st_mode | stat.S_IEXEC)
+        self.source = os.path.join(self.workdir, "clip.webm")
+        with open(self.source, "wb") as f:
+            f.write(os.urandom(4096))
+        self.pool = TranscodePool(self.workdir, workers=2)
+        self.pool.start()
+
+    def tearDown(self):
+        self.pool.close()
+        shutil.rmtree(self.workdir, ignore_errors=True)
+
+    def test_same_source_submitted_twice(self):
+        results, lock = [], threading.Lock()
+
+        def done(result, error):
+            with lock:
+                results.append((result, error))
+
+        self.pool.submit(self.source, "mp3", "192", done)
+        self.pool.submit(self.source, "mp3", "192", done)
+        self.pool.join()
+
+        self.assertEqual([error for _, error in results], [None, None])
+        self.assertTrue(os.path.exists(os.path.join(self.workdir, "clip.mp3")))
+        # Deleted by the second run, not from under it by the first
+        self.assertFalse(os.path.exists(self.source))
+        self.assertEqual(sorted(os.listdir(self.workdir)), ["clip.mp3", "ffmpeg"])
+
+
+class CopyTargetTest(unittest.TestCase):
+    def test_copies_when_source_is_not_above_the_bitrate(self):
+        self.assertEqual(copy_target({"codec": "opus", "kbps": 130}, "128"), "opus")
+        self.assertIsNone(copy_target({"codec": "opus", "kbps": 160}, "128"))
+
+    def test_non_numeric_quality_encodes(self):
+        self.assertIsNone(copy_target({"codec": "opus", "kbps": 130}, "best"))
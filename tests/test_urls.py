@@ -0,0 +1,77 @@
+"""
+Link recognition: the forms each platform's links come in, and what counts as
+a collection
+"""
+
+import unittest
+
+from urls import canonical_id, canonical_url, find_urls, is_collection_url
+
+VIDEO = "youtube:dQw4w9WgXcQ"
+
+
+class CanonicalIdTest(unittest.TestCase):
+    def test_youtube_forms_share_one_id(self):
+        for url in ("https://www.youtube.com/watch?v=dQw4w9WgXcQ",
+                    "https://www.youtube.com/watch?feature=share&v=dQw4w9WgXcQ&t=42",
+                    "https://youtu.be/dQw4w9WgXcQ?si=abc",
+                    "youtu.be/dQw4w9WgXcQ",
+                    "https://www.youtube.com/shorts/dQw4w9WgXcQ",
+                    "https://m.youtube.com/embed/dQw4w9WgXcQ",
+                    "https://www.youtube-nocookie.com/embed/dQw4w9WgXcQ",
+                    "https://www.youtube.com/live/dQw4w9WgXcQ"):
+            self.assertEqual(canonical_id(url), VIDEO, url)
+
+    def test_scheme_and_host_are_case_insensitive(self):
+        for url in ("https://WWW.YOUTUBE.COM/watch?v=dQw4w9WgXcQ",
+                    "HTTPS://YouTu.Be/dQw4w9WgXcQ",
+                    "WWW.YouTube.com/shorts/dQw4w9WgXcQ"):
+            self.assertEqual(canonical_id(url), VIDEO, url)
+        self.assertEqual(canonical_id("https://WWW.FACEBOOK.COM/watch/?v=123"), "facebook:123")
+        # The ID itself is case-sensitive
+        self.assertEqual(canonical_id("https://youtu.be/DQW4W9WGXCQ"), "youtube:DQW4W9WGXCQ")
+
+    def test_facebook_forms(self):
+        self.assertEqual(canonical_id("https://www.facebook.com/watch/?v=1234567890"), "facebook:1234567890")
+        self.assertEqual(canonical_id("https://www.facebook.com/somepage/videos/1234567890/"),
+                         "facebook:1234567890")
+        self.assertEqual(canonical_id("https://www.facebook.com/somepage/videos/a-title/1234567890"),
+                         "facebook:1234567890")
+        self.assertEqual(canonical_id("https://www.facebook.com/reel/1234567890"), "facebook:1234567890")
+        self.assertEqual(canonical_id("https://fb.com/video.php?v=1234567890"), "facebook:1234567890")
+        self.assertEqual(canonical_id("https://fb.watch/aBc_12-x/"), "fb.watch:aBc_12-x")
+
+    def test_unrecognised_links(self):
+        for url in ("", None, "https://example.com/watch?v=dQw4w9WgXcQ", "https://www.youtube.com/",
+                    "https://www.youtube.com/playlist?list=PL0123456789"):
+            self.assertIsNone(canonical_id(url), url)
+
+
+class CollectionTest(unittest.TestCase):
+    def test_playlists_and_channels(self):
+        for url in ("https://www.youtube.com/playlist?list=PL0123456789",
+                    "https://www.youtube.com/watch?v=dQw4w9WgXcQ&list=PL0123456789",
+                    "https://www.youtube.com/@somechannel",
+                    "https://www.youtube.com/channel/UC0123456789",
+                    "https://www.youtube.com/c/somechannel",
+                    "https://www.youtube.com/user/someone",
+                    "HTTPS://WWW.YOUTUBE.COM/playlist?list=PL0123456789"):
+            self.assertTrue(is_collection_url(url), url)
+
+    def test_mixes_and_videos_are_single(self):
+        self.assertFalse(is_collection_url("https://www.youtube.com/watch?v=dQw4w9WgXcQ&list=RDdQw4w9WgXcQ"))
+        self.assertEqual(canonical_id("https://www.youtube.com/watch?v=dQw4w9WgXcQ&list=RDdQw4w9WgXcQ"), VIDEO)
+        self.assertFalse(is_collection_url("https://youtu.be/dQw4w9WgXcQ"))
+
+
+class FindUrlsTest(unittest.TestCase):
+    def test_links_in_text(self):
+        text = ("watch this: HTTPS://YOUTU.BE/dQw4w9WgXcQ, and (https://www.youtube.com/watch?v=dQw4w9WgXcQ) "
+                "plus https://www.youtube.com/playlist?list=PL0123456789. "
+                "not https://www.google.com/url?q=https://youtu.be/aaaaaaaaaaa")
+        self.assertEqual(list(find_urls(text)), [
+            "https://www.youtube.com/watch?v=dQw4w9WgXcQ",
+            "https://www.youtube.com/playlist?list=PL0123456789",
+        ])
+        self.assertEqual(canonical_url("www.facebook.com/reel/1234567890"),
+                         "https://www.facebook.com/reel/1234567890")
@@ -0,0 +1,36 @@
+"""
+Coalesced jobs for one video in several qualities: each quality ends up in a
+file of its own, downloaded from a local server through app.py's worker path
+"""
+
+import unittest
+
+import app
+from app_env import AppTestCase
+from jobs import Job, JobQueue, file_label
+
+
+class FileLabelTest(unittest.TestCase):
+    def test_top_quality_keeps_the_plain_name(self):
+        self.assertEqual(file_label("video", "best"), "")
+        self.assertEqual(file_label("audio", "320"), "")
+        self.assertEqual(file_label("audio", "best"), "")
+
+    def test_other_qualities_are_labelled(self):
+        self.assertEqual(file_label("video", "720"), " [720p]")
+        self.assertEqual(file_label("audio", "128"), " [128k]")
+        self.assertNotEqual(file_label("audio", "128"), file_label("audio", "192"))
+
+
+class VariantDownloadTest(AppTestCase):
+    def test_two_qualities_of_one_video_get_two_files(self):
+        best, low = Job(self.url, "video", "best"), Job(self.url, "video", "720")
+        self.assertEqual(app.url_queue.put(best), JobQueue.QUEUED)
+        self.assertEqual(app.url_queue.put(low), JobQueue.MERGED)
+        job = app.url_queue.get()
+        app.download_worker(job)
+        app.url_queue.task_done()
+
+        self.assertDownloaded("clip.mp4")
+        self.assertDownloaded("clip [720p].mp4")
+        self.assertEqual(app.job_store.pending(), [])
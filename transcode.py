@@ -0,0 +1,515 @@
+"""
+PlayGet - Transcode stage
+Encodes downloaded audio with ffmpeg on a separate pool of processes, so
+downloads keep the network busy while earlier files are being converted
+"""
+
+import itertools
+import json
+import os
+import queue
+import re
+import shutil
+import subprocess
+import sys
+import threading
+import time
+from collections import Counter
+
+from jobs import JobCancelled
+
+
+class EncoderPreset:
+    """
+    How the transcode stage encodes: which ffmpeg encoder, the output extension,
+    encoder options trading speed against quality, and the thread count.
+
+    Audio encoders barely use more than one thread, and the pool already runs one
+    ffmpeg per core, so presets default to `threads=1` rather than ffmpeg's "auto".
+    """
+
+    def __init__(self, name, encoder, ext, options=(), threads=1):
+        self.name = name
+        self.encoder = encoder
+        self.ext = ext
+        self.options = list(options)
+        self.threads = threads
+
+    def args(self, quality):
+        """ffmpeg output arguments for `quality` kbps."""
+        return ["-c:a", self.encoder, *self.options, "-b:a", f"{quality}k", "-threads", str(self.threads)]
+
+    def __repr__(self):
+        return f"EncoderPreset({self.name!r})"
+
+
+# compression_level: libmp3lame 0 (best) .. 9 (fastest), libopus 0 (fastest) .. 10 (best)
+PRESETS = {p.name: p for p in (
+    EncoderPreset("mp3", "libmp3lame", "mp3"),
+    EncoderPreset("mp3-fast", "libmp3lame", "mp3", ["-compression_level", "7"]),
+    EncoderPreset("mp3-hq", "libmp3lame", "mp3", ["-compression_level", "0"]),
+    EncoderPreset("opus", "libopus", "opus", ["-compression_level", "10"]),
+    EncoderPreset("opus-fast", "libopus", "opus", ["-compression_level", "3"]),
+    EncoderPreset("aac", "aac", "m4a", ["-aac_coder", "twoloop"]),
+    EncoderPreset("aac-fast", "aac", "m4a", ["-aac_coder", "fast"]),
+)}
+
+# Source codecs that can be stream-copied as-is, and the container they go in
+COPY_CONTAINERS = {
+    "aac": "m4a",
+    "opus": "opus",
+    "mp3": "mp3",
+    "vorbis": "ogg",
+}
+
+# Formats ffmpeg can decode from a pipe, without seeking back (mp4/m4a only when the index comes first,
+# which is how YouTube and most sites serve audio-only m4a)
+STREAMABLE_EXTS = {"webm", "weba", "ogg", "opus", "mp3", "aac", "m4a"}
+
+# yt-dlp acodec prefix -> ffprobe codec name
+ACODEC_NAMES = {"mp4a": "aac", "opus": "opus", "vorbis": "vorbis", "mp3": "mp3"}
+
+BLOCK_SIZE = 64 << 10
+
+# CPU seconds per second of audio assumed for an encode until one has been measured
+DEFAULT_ENCODE_COST = 0.02
+
+_BENCH = re.compile(r"bench: utime=([\d.]+)s stime=([\d.]+)s")
+
+
+class TranscodeError(Exception):
+    pass
+
+
+class TranscodeResult:
+    """What the transcode stage did with a file. `cpu_saved` is an estimate for copies."""
+
+    def __init__(self, path, mode, cpu_used=0.0, cpu_saved=0.0):
+        self.path = path
+        self.mode = mode  # "encoded" or "copied"
+        self.cpu_used = cpu_used
+        self.cpu_saved = cpu_saved
+
+    def summary(self):
+        ext = os.path.splitext(self.path)[1].lstrip(".")
+        if self.mode == "copied":
+            return f"kept original {ext}, saved ~{self.cpu_saved:.1f}s CPU"
+        return f"encoded {ext} in {self.cpu_used:.1f}s CPU"
+
+
+def find_tool(name, location=None):
+    """Path of an ffmpeg-suite binary: in the `location` folder if it's there, else on PATH."""
+    exe = name + (".exe" if sys.platform == "win32" else "")
+    if location:
+        candidate = os.path.join(location, exe)
+        if os.path.isfile(candidate):
+            return candidate
+    return shutil.which(name)
+
+
+def run_tool(argv):
+    """Runs an ffmpeg/ffprobe command without flashing a console window on Windows."""
+    flags = subprocess.CREATE_NO_WINDOW if sys.platform == "win32" else 0
+    return subprocess.run(argv, stdin=subprocess.DEVNULL, capture_output=True, creationflags=flags)
+
+
+def probe_audio(path, location=None):
+    """
+    Codec, bitrate (kbps) and duration (s) of the first audio stream, via ffprobe.
+    Values ffprobe can't determine are None.
+    """
+    ffprobe = find_tool("ffprobe", location)
+    if ffprobe is None:
+        raise TranscodeError("ffprobe not found")
+    result = run_tool([ffprobe, "-v", "error", "-select_streams", "a:0",
+                       "-show_entries", "stream=codec_name,bit_rate:format=bit_rate,duration",
+                       "-of", "json", path])
+    if result.returncode != 0:
+        raise TranscodeError(f"ffprobe failed on {os.path.basename(path)}")
+    data = json.loads(result.stdout or b"{}")
+    streams = data.get("streams") or [{}]
+    fmt = data.get("format") or {}
+    # WebM/Opus carries no per-stream bitrate; for an audio-only file the container's is the same
+    bit_rate = streams[0].get("bit_rate") or fmt.get("bit_rate")
+    duration = fmt.get("duration")
+    return {
+        "codec": streams[0].get("codec_name"),
+        "kbps": int(bit_rate) / 1000 if bit_rate not in (None, "N/A") else None,
+        "duration": float(duration) if duration not in (None, "N/A") else None,
+    }
+
+
+def copy_target(probe, quality):
+    """
+    Container to stream-copy into when that satisfies a request for `quality` kbps,
+    else None. Re-encoding a source that is already at or below the requested
+    bitrate only makes the file bigger without adding anything.
+    """
+    container = COPY_CONTAINERS.get(probe["codec"])
+    if container is None or probe["kbps"] is None:
+        return None
+    try:
+        kbps = float(quality)
+    except (TypeError, ValueError):
+        return None  # Not a bitrate (e.g. "best"): let the encoder handle it
+    # Small allowance for container overhead in the reported bitrate
+    if probe["kbps"] <= kbps * 1.05:
+        return container
+    return None
+
+
+def can_stream(info):
+    """True if yt-dlp selected a single progressive file that ffmpeg can read from a pipe."""
+    return bool(info.get("url") and info.get("protocol") in ("http", "https")
+                and not info.get("requested_formats") and not info.get("fragments")
+                and not info.get("is_live") and not info.get("request_data")
+                and info.get("ext") in STREAMABLE_EXTS)
+
+
+def info_probe(info):
+    """probe_audio()-style dict from yt-dlp's format metadata, for deciding before any bytes arrive."""
+    acodec = (info.get("acodec") or "").split(".")[0]
+    return {
+        "codec": ACODEC_NAMES.get(acodec),
+        "kbps": info.get("abr") or info.get("tbr"),
+        "duration": info.get("duration"),
+    }
+
+
+class _Task:
+    def __init__(self, source, preset, quality, callback, cancelled):
+        self.source = source
+        self.preset = preset
+        self.quality = quality
+        self.callback = callback
+        self.cancelled = cancelled
+
+
+class TranscodePool:
+    """
+    Bounded second stage of the download pipeline.
+
+    Download workers `submit()` the raw file they fetched and go back to the
+    queue; `workers` threads (one per CPU core by default) each drive one ffmpeg
+    process at a time. When `backlog` files are already waiting, `submit()`
+    blocks, so a slow CPU holds downloads back instead of filling the disk
+    with unconverted files.
+
+    With `smart=True` each file is probed first and stream-copied into its
+    native container when that already satisfies the request (see copy_target).
+
+    `callback(result, error)` runs on the transcode thread once a file is done,
+    with a TranscodeResult; `on_change()` is called whenever the stage's depth changes.
+    When the task's `cancelled()` turns true, a waiting file is skipped and a running
+    ffmpeg is killed, and the callback gets a JobCancelled error.
+    """
+
+    def __init__(self, ffmpeg_location=None, workers=None, backlog=None, on_change=None, smart=False):
+        self.ffmpeg_location = ffmpeg_location
+        self.workers = workers or os.cpu_count() or 2
+        self.on_change = on_change
+        self.smart = smart
+        self._tasks = queue.Queue(maxsize=backlog or 2 * self.workers)
+        self._lock = threading.Lock()
+        self._threads = []
+        self._procs = set()     # ffmpeg processes of submitted files, for stop()
+        self._sources = Counter()   # source -> submitted tasks still to finish with it
+        self._temp_ids = itertools.count(1)
+        self._stopping = threading.Event()
+        self.running = 0
+        # Measured encode cost, for estimating what a copy saved
+        self._encoded_cpu = 0.0
+        self._encoded_seconds = 0.0
+        self.cpu_saved = 0.0
+
+    def start(self):
+        for i in range(self.workers):
+            t = threading.Thread(target=self._run, name=f"transcode-{i + 1}", daemon=True)
+            t.start()
+            self._threads.append(t)
+
+    def submit(self, source, preset, quality, callback, cancelled=None):
+        """
+        Queues `source` for encoding with the PRESETS entry named `preset`. The
+        source is deleted once no submitted task still needs it.
+        """
+        with self._lock:
+            self._sources[source] += 1
+        self._tasks.put(_Task(source, PRESETS[preset], quality, callback, cancelled))
+        self._changed()
+
+    def depth(self):
+        """Files waiting for or going through ffmpeg."""
+        with self._lock:
+            return self._tasks.qsize() + self.running
+
+    def join(self):
+        """Blocks until every submitted file has been processed."""
+        self._tasks.join()
+
+    def close(self):
+        for _ in self._threads:
+            self._tasks.put(None)
+
+    def stop(self, timeout=None):
+        """
+        Shuts the stage down: files still waiting are dropped without a callback
+        (their sources stay on disk for the next session), running encodes get
+        `timeout` seconds to finish and are then killed. True if none had to be.
+        """
+        self._stopping.set()
+        while True:
+            try:
+                self._tasks.get_nowait()
+            except queue.Empty:
+                break
+            self._tasks.task_done()
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self.depth():
+            if deadline is not None and time.monotonic() >= deadline:
+                with self._lock:
+                    procs = list(self._procs)
+                for proc in procs:
+                    proc.kill()
+                return False
+            time.sleep(0.05)
+        return True
+
+    def encode_cost(self):
+        """CPU seconds per second of audio, from the encodes run so far."""
+        with self._lock:
+            if self._encoded_seconds:
+                return self._encoded_cpu / self._encoded_seconds
+        return DEFAULT_ENCODE_COST
+
+    def _changed(self):
+        if self.on_change is not None:
+            self.on_change()
+
+    def _run(self):
+        while True:
+            task = self._tasks.get()
+            if task is None:
+                self._tasks.task_done()
+                return
+            if self._stopping.is_set():
+                self._tasks.task_done()
+                continue
+            with self._lock:
+                self.running += 1
+            self._changed()
+            try:
+                if task.cancelled is not None and task.cancelled():
+                    raise JobCancelled()
+                result = self.process(task.source, task.preset, task.quality, task.cancelled, keep_source=True)
+            except Exception as e:
+                self._release(task.source)
+                if not self._stopping.is_set():
+                    task.callback(None, e)
+            else:
+                self._release(task.source, result.path)
+                task.callback(result, None)
+            finally:
+                with self._lock:
+                    self.running -= 1
+                self._tasks.task_done()
+                self._changed()
+
+    def _release(self, source, output=None):
+        """A task is done with `source`; the last one to finish deletes it if it produced `output`."""
+        with self._lock:
+            self._sources[source] -= 1
+            if self._sources[source] > 0:
+                return
+            del self._sources[source]
+        if output is not None and source != output and os.path.exists(source):
+            os.remove(source)
+
+    def process(self, source, preset, quality, cancelled=None, keep_source=False):
+        """Encodes or (in smart mode) copies `source`; returns a TranscodeResult."""
+        if isinstance(preset, str):
+            preset = PRESETS[preset]
+        probe = None
+        if self.smart:
+            try:
+                probe = probe_audio(source, self.ffmpeg_location)
+            except (TranscodeError, OSError, ValueError) as e:
+                print(f"[!] Probe failed, encoding instead: {e}")
+        container = copy_target(probe, quality) if probe else None
+        stem = os.path.splitext(source)[0]
+
+        if container is not None and os.path.splitext(source)[1] == f".{container}":
+            cpu = 0.0  # e.g. YouTube's m4a: already the file we'd write
+        else:
+            ext = container or preset.ext
+            cpu = self._ffmpeg(["-i", source], stem, ext, self._codec_args(container, preset, quality),
+                               cancelled=cancelled)
+            if source != f"{stem}.{ext}" and not keep_source:
+                os.remove(source)
+        return self._result(stem, container, preset, cpu, probe["duration"] if probe else None)
+
+    def stream(self, ydl, info, preset, quality, progress_hook=None):
+        """
+        Downloads the format selected in `info` straight into ffmpeg's stdin, on
+        the calling thread, so only the output file is ever written. In smart mode
+        the copy-or-encode decision uses yt-dlp's format metadata instead of ffprobe.
+        Check can_stream(info) first. Raises TranscodeError if ffmpeg rejects the stream.
+        """
+        if isinstance(preset, str):
+            preset = PRESETS[preset]
+        probe = info_probe(info) if self.smart else None
+        container = copy_target(probe, quality) if probe and probe["codec"] else None
+        stem = os.path.splitext(ydl.prepare_filename(info))[0]
+        with self._lock:
+            self.running += 1
+        self._changed()
+        try:
+            cpu = self._ffmpeg(["-i", "pipe:0"], stem, container or preset.ext,
+                               self._codec_args(container, preset, quality),
+                               feed=lambda stdin, tmp: self._pipe(ydl, info, stdin, tmp, progress_hook))
+        finally:
+            with self._lock:
+                self.running -= 1
+            self._changed()
+        return self._result(stem, container, preset, cpu, info.get("duration"))
+
+    def _codec_args(self, container, preset, quality):
+        if container is not None:
+            return ["-c:a", "copy"]
+        return preset.args(quality)
+
+    def _result(self, stem, container, preset, cpu, duration):
+        """Builds the TranscodeResult and updates the encode-cost figures."""
+        if container is not None:
+            saved = self.encode_cost() * (duration or 0)
+            with self._lock:
+                self.cpu_saved += saved
+            return TranscodeResult(f"{stem}.{container}", "copied", cpu, saved)
+        if duration:
+            with self._lock:
+                self._encoded_cpu += cpu
+                self._encoded_seconds += duration
+        return TranscodeResult(f"{stem}.{preset.ext}", "encoded", cpu)
+
+    def _pipe(self, ydl, info, stdin, tmp, progress_hook):
+        """Copies the media bytes into ffmpeg, in `http_chunk_size` ranges where the site needs them."""
+        from yt_dlp.networking import Request
+        from yt_dlp.utils import parse_http_range
+
+        chunk = (info.get("downloader_options") or {}).get("http_chunk_size")
+        total = info.get("filesize") or info.get("filesize_approx")
+        done = 0
+        start_time = time.time()
+        while True:
+            headers = dict(info.get("http_headers") or {})
+            if chunk:
+                headers["Range"] = f"bytes={done}-{done + chunk - 1}"
+            response = ydl.urlopen(Request(info["url"], headers=headers))
+            try:
+                if chunk:
+                    total = parse_http_range(response.headers.get("Content-Range"))[2] or total
+                else:
+                    total = int(response.headers.get("Content-Length") or 0) or total
+                received = 0
+                while True:
+                    block = response.read(BLOCK_SIZE)
+                    if not block:
+                        break
+                    stdin.write(block)
+                    received += len(block)
+                    done += len(block)
+                    if progress_hook is not None:
+                        percent = 100 * done / total if total else 0
+                        progress_hook({
+                            "status": "downloading",
+                            "downloaded_bytes": done,
+                            "total_bytes": total,
+                            "tmpfilename": tmp,
+                            "filename": tmp,
+                            "elapsed": time.time() - start_time,
+                            "info_dict": info,
+                            "_percent": percent,
+                            "_percent_str": f"{percent:5.1f}%",
+                        })
+            finally:
+                response.close()
+            if not chunk or received < chunk or (total and done >= total):
+                break
+        if progress_hook is not None:
+            progress_hook({"status": "finished", "downloaded_bytes": done, "total_bytes": done,
+                           "filename": tmp, "elapsed": time.time() - start_time, "info_dict": info})
+
+    def _ffmpeg(self, inputs, stem, ext, codec_args, feed=None, cancelled=None):
+        """
+        Runs ffmpeg into `<stem>.ext` via a temp file and returns the CPU seconds it used.
+        With `feed`, ffmpeg reads stdin and `feed(stdin, tmp)` writes it, on this thread;
+        otherwise ffmpeg is killed if `cancelled()` turns true while it runs.
+        """
+        ffmpeg = find_tool("ffmpeg", self.ffmpeg_location)
+        if ffmpeg is None:
+            raise TranscodeError("ffmpeg not found")
+        target = f"{stem}.{ext}"
+        # Own temp file per run: two tasks for one source must not write into the same one
+        tmp = f"{stem}.temp{next(self._temp_ids)}.{ext}"
+        argv = [ffmpeg, "-y", "-hide_banner", "-nostats", "-benchmark", *inputs, "-vn", *codec_args, tmp]
+        if feed is None:
+            returncode, stderr = self._run_watched(argv, tmp, cancelled)
+        else:
+            returncode, stderr = self._run_fed(argv, feed, tmp)
+        if returncode != 0:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            lines = stderr.strip().splitlines()
+            raise TranscodeError(lines[-1] if lines else f"ffmpeg exited with {returncode}")
+        os.replace(tmp, target)
+        m = _BENCH.search(stderr)
+        return float(m.group(1)) + float(m.group(2)) if m else 0.0
+
+    def _run_watched(self, argv, tmp, cancelled):
+        flags = subprocess.CREATE_NO_WINDOW if sys.platform == "win32" else 0
+        proc = subprocess.Popen(argv, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL,
+                                stderr=subprocess.PIPE, creationflags=flags)
+        with self._lock:
+            self._procs.add(proc)
+        try:
+            while True:
+                try:
+                    _, stderr = proc.communicate(timeout=0.25)
+                    return proc.returncode, stderr.decode(errors="replace")
+                except subprocess.TimeoutExpired:
+                    if cancelled is not None and cancelled():
+                        proc.kill()
+                        proc.wait()
+                        if os.path.exists(tmp):
+                            os.remove(tmp)
+                        raise JobCancelled()
+        finally:
+            with self._lock:
+                self._procs.discard(proc)
+
+    def _run_fed(self, argv, feed, tmp):
+        flags = subprocess.CREATE_NO_WINDOW if sys.platform == "win32" else 0
+        proc = subprocess.Popen(argv, stdin=subprocess.PIPE, stdout=subprocess.DEVNULL,
+                                stderr=subprocess.PIPE, creationflags=flags)
+        # Drain stderr on the side so a chatty ffmpeg can't block on a full pipe
+        err = []
+        reader = threading.Thread(target=lambda: err.append(proc.stderr.read()), daemon=True)
+        reader.start()
+        try:
+            feed(proc.stdin, tmp)
+        except BrokenPipeError:
+            pass  # ffmpeg gave up on the input; its exit code and stderr say why
+        except BaseException:
+            proc.kill()
+            proc.wait()
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+        finally:
+            try:
+                proc.stdin.close()
+            except BrokenPipeError:
+                pass
+        returncode = proc.wait()
+        reader.join()
+        return returncode, b"".join(err).decode(errors="replace")
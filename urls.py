@@ -0,0 +1,129 @@
+"""
+PlayGet - URL helpers
+Recognises the link forms PlayGet accepts, in a single URL or anywhere in a
+block of text, and reduces them to canonical URLs and video IDs
+"""
+
+import re
+
+MAX_URL_LENGTH = 2048   # Longer tokens aren't taken as links, which also keeps the scan linear
+
+_YOUTUBE_ID = re.compile(
+    r'(?:youtube(?:-nocookie)?\.com/(?:watch\?(?:[^#\s]*&)?v=|shorts/|embed/|live/|v/)|youtu\.be/)'
+    r'([A-Za-z0-9_-]{11})')
+_FACEBOOK_ID = re.compile(
+    r'(?:facebook|fb)\.com/(?:[^?#\s]*/videos/(?:[^/?#\s]+/)?|watch/?\?(?:[^#\s]*&)?v=|reel/|video\.php\?(?:[^#\s]*&)?v=)'
+    r'(\d+)')
+_FB_WATCH = re.compile(r'fb\.watch/([A-Za-z0-9_-]+)')
+# Playlists and channel pages; mixes (list=RD...) are endless, so they stay single videos
+_YOUTUBE_COLLECTION = re.compile(
+    r'youtube\.com/(?:(?:playlist|watch)\?(?:[^#\s]*&)?list=(?!RD)[A-Za-z0-9_-]+'
+    r'|@[^/?#\s]+|channel/[A-Za-z0-9_-]+|c/[^/?#\s]+|user/[^/?#\s]+)')
+# Scheme and host: the case-insensitive part of a URL
+_AUTHORITY = re.compile(r'\s*(?:[A-Za-z][A-Za-z0-9+.-]*://)?[^/?#\s]*')
+
+
+def canonical_id(url):
+    """
+    Returns a platform-qualified ID such as "youtube:dQw4w9WgXcQ", so the
+    youtu.be and youtube.com/watch forms of one video map to the same key.
+    Returns None when the URL isn't a single recognised video.
+    """
+    if not url:
+        return None
+    url = _lower_host(url)
+    if is_collection_url(url):
+        return None
+    m = _YOUTUBE_ID.search(url)
+    if m:
+        return f"youtube:{m.group(1)}"
+    m = _FACEBOOK_ID.search(url)
+    if m:
+        return f"facebook:{m.group(1)}"
+    m = _FB_WATCH.search(url)
+    if m:
+        # Short links can't be resolved to the numeric ID without a request
+        return f"fb.watch:{m.group(1)}"
+    return None
+
+
+def is_collection_url(url):
+    """True for YouTube playlist and channel URLs, which expand into one job per video."""
+    return bool(url) and _YOUTUBE_COLLECTION.search(_lower_host(url)) is not None
+
+
+def _lower_host(url):
+    m = _AUTHORITY.match(url)
+    return m.group().lower() + url[m.end():]
+
+
+# A platform domain followed by a path: where find_urls starts looking at a token. Case-insensitive
+# except the first letter, which as a plain class lets re skip ahead ~10x faster than re.I does
+_PLATFORM_HOST = re.compile(r'[yYfF](?i:outube(?:-nocookie)?\.com|outu\.be|acebook\.com|b\.com|b\.watch)/')
+# All that may come before that domain in a link: a scheme and subdomains (www., m., music., ...)
+_HOST_PREFIX = re.compile(r'(?:https?://)?(?:[a-z0-9-]+\.)*', re.I)
+# Characters that end a link in running text (spaces, quotes, brackets, list separators)
+_DELIMITER = re.compile(r'[\s"\'<>()\[\]{},|`]')
+_TRAILING = '.,;:!?\'"'
+
+
+def canonical_url(text):
+    """
+    The link in `text` (one URL, with or without a scheme) the way PlayGet queues
+    it: https, a lower-case host, and single YouTube videos as watch?v=ID, so
+    share parameters and timestamps are dropped. Returns None if it isn't a
+    supported video, playlist or channel link.
+    """
+    url = text.strip().rstrip(_TRAILING).replace("&amp;", "&")
+    if not url or len(url) > MAX_URL_LENGTH:
+        return None
+    m = _PLATFORM_HOST.search(url)
+    if m is None or not _HOST_PREFIX.fullmatch(url, 0, m.start()):
+        return None  # No platform link, or one inside another URL (a redirect, a search result)
+    host = url[:m.end()].lower()
+    if not host.startswith(("http://", "https://")):
+        host = "https://" + host
+    url = host + url[m.end():]
+    if is_collection_url(url):
+        return url
+    key = canonical_id(url)
+    if key is None:
+        return None
+    if key.startswith("youtube:"):
+        return f"https://www.youtube.com/watch?v={key[len('youtube:'):]}"
+    return url
+
+
+def url_platform(text):
+    """"youtube" or "facebook" when `text` is a supported link (see canonical_url), else None."""
+    url = canonical_url(text)
+    if url is None:
+        return None
+    return "youtube" if _PLATFORM_HOST.search(url).group().lower().startswith("you") else "facebook"
+
+
+def find_urls(text):
+    """
+    Yields the canonical URL of every supported link in `text`, once each, in
+    the order they appear: a pasted list, a chat message, an HTML page. Only
+    the platform domains are searched for, and each character is looked at a
+    bounded number of times, so multi-megabyte text takes linear time.
+    """
+    seen = set()
+    pos = 0
+    while True:
+        m = _PLATFORM_HOST.search(text, pos)
+        if m is None:
+            return
+        # Widen to the whole token: back to the previous delimiter, on to the next one
+        start = m.start()
+        floor = max(pos, start - MAX_URL_LENGTH)
+        while start > floor and not _DELIMITER.match(text, start - 1):
+            start -= 1
+        end_match = _DELIMITER.search(text, m.end())
+        end = end_match.start() if end_match else len(text)
+        pos = end
+        url = canonical_url(text[start:end]) if end - start <= MAX_URL_LENGTH else None
+        if url is not None and url not in seen:
+            seen.add(url)
+            yield url
@@ -0,0 +1,87 @@
+"""
+PlayGet - Download worker pool
+N worker threads draining one queue, with a per-host concurrency limit
+"""
+
+import threading
+import time
+from collections import defaultdict
+
+
+class WorkerPool:
+    """
+    Runs `handler(job)` for every job put on `job_queue`, up to `workers` at a time.
+
+    At most `per_host` jobs for the same platform run concurrently. Jobs for a
+    saturated host stay in the queue, where they still coalesce and keep their
+    priority; workers take the next job for another host meanwhile.
+    """
+
+    def __init__(self, job_queue, handler, workers=3, per_host=2):
+        self.job_queue = job_queue
+        self.handler = handler
+        self.workers = max(1, workers)
+        self.per_host = max(1, per_host)
+        self._lock = threading.Lock()
+        self._active = defaultdict(int)
+        self._threads = []
+        self._stopping = threading.Event()
+
+    def start(self):
+        for i in range(self.workers):
+            # daemon=True means the workers die when the main program exits
+            worker = threading.Thread(target=self._run, name=f"playget-worker-{i}", daemon=True)
+            worker.start()
+            self._threads.append(worker)
+
+    def pending(self):
+        """Jobs waiting to run."""
+        return self.job_queue.qsize()
+
+    def active(self):
+        with self._lock:
+            return sum(self._active.values())
+
+    def stop(self):
+        """No new jobs start after this; queued ones stay in the queue (and the job store)."""
+        self._stopping.set()
+
+    def wait(self, timeout=None):
+        """Waits for running jobs to return. True if none are left."""
+        return wait_idle(self.active, timeout)
+
+    def _run(self):
+        while True:
+            job = self.job_queue.get_claimed(self._claim)
+            try:
+                if not self._stopping.is_set():
+                    self.handler(job)
+            except Exception as e:
+                print(f"ERROR: worker crashed on {job.url}: {e}")
+            finally:
+                self.job_queue.task_done()
+                self._release(job)
+
+    def _claim(self, job):
+        """Takes a host slot for the job; False if the host is at its limit."""
+        with self._lock:
+            if self._active[job.host] < self.per_host:
+                self._active[job.host] += 1
+                return True
+            return False
+
+    def _release(self, job):
+        """Frees the job's host slot and lets waiting workers take a job for that host."""
+        with self._lock:
+            self._active[job.host] -= 1
+        self.job_queue.wake()
+
+
+def wait_idle(active, timeout=None):
+    """Polls `active()` until it reads 0; False if `timeout` seconds pass first."""
+    deadline = None if timeout is None else time.monotonic() + timeout
+    while active():
+        if deadline is not None and time.monotonic() >= deadline:
+            return False
+        time.sleep(0.05)
+    return True
@@ -0,0 +1,109 @@
+"""
+PlayGet - YoutubeDL instance pool
+Keeps long-lived YoutubeDL objects per option profile so every job doesn't
+re-initialise the extractors, cookie jar and HTTP opener
+"""
+
+import json
+import threading
+from contextlib import contextmanager
+
+
+def opts_fingerprint(opts):
+    """Stable digest of a yt-dlp options dict, ignoring per-job hooks."""
+    stable = {k: v for k, v in opts.items() if k != 'progress_hooks'}
+    return json.dumps(stable, sort_keys=True, default=repr)
+
+
+class _HookDispatcher:
+    """The one progress hook a pooled instance is built with; forwards to the current lease."""
+
+    def __init__(self):
+        self.target = None
+
+    def __call__(self, d):
+        if self.target is not None:
+            self.target(d)
+
+
+class _PooledYDL:
+    def __init__(self, ydl, fingerprint, dispatcher):
+        self.ydl = ydl
+        self.fingerprint = fingerprint
+        self.dispatcher = dispatcher
+
+
+class YDLPool:
+    """
+    Pool of YoutubeDL instances keyed by option profile (e.g. ("audio", "320")).
+
+    A YoutubeDL object is not safe to share between threads, so each lease gets an
+    instance to itself; idle instances are reused by the next job with the same
+    profile. When the options for a profile change, its idle instances are closed
+    and the next lease builds a fresh one.
+    """
+
+    def __init__(self, factory=None):
+        if factory is None:
+            import yt_dlp
+            factory = yt_dlp.YoutubeDL
+        self.factory = factory
+        self._lock = threading.Lock()
+        self._idle = {}          # profile -> [_PooledYDL]
+        self._fingerprints = {}  # profile -> fingerprint of the current options
+        self.created = 0
+
+    @contextmanager
+    def lease(self, profile, opts, hook=None):
+        pooled = self._acquire(profile, opts)
+        pooled.dispatcher.target = hook
+        try:
+            yield pooled.ydl
+        finally:
+            pooled.dispatcher.target = None
+            self._release(profile, pooled)
+
+    def warm_up(self, profile, opts):
+        """
+        Builds an idle instance for `profile` ahead of the first job, so the
+        yt-dlp import and extractor setup happen off the critical path (e.g. on
+        a background thread once the window is up).
+        """
+        self._release(profile, self._acquire(profile, opts))
+
+    def _acquire(self, profile, opts):
+        fingerprint = opts_fingerprint(opts)
+        stale = []
+        with self._lock:
+            if self._fingerprints.get(profile) != fingerprint:
+                stale = self._idle.pop(profile, [])
+                self._fingerprints[profile] = fingerprint
+            idle = self._idle.get(profile)
+            pooled = idle.pop() if idle else None
+        for old in stale:
+            old.ydl.close()
+        if pooled is not None:
+            return pooled
+
+        dispatcher = _HookDispatcher()
+        params = dict(opts)
+        params['progress_hooks'] = [dispatcher]
+        ydl = self.factory(params)
+        with self._lock:
+            self.created += 1
+        return _PooledYDL(ydl, fingerprint, dispatcher)
+
+    def _release(self, profile, pooled):
+        with self._lock:
+            if self._fingerprints.get(profile) == pooled.fingerprint:
+                self._idle.setdefault(profile, []).append(pooled)
+                return
+        # Options changed while this instance was out; don't hand it out again
+        pooled.ydl.close()
+
+    def close(self):
+        with self._lock:
+            idle, self._idle = self._idle, {}
+        for instances in idle.values():
+            for pooled in instances:
+                pooled.ydl.close()